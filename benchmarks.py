@@ -0,0 +1,680 @@
+# benchmarks.py
+# Mediciones reproducibles de lo que cuesta la barra (correr con Qt "offscreen")
+#
+#   python benchmarks.py                         # todo
+#   python benchmarks.py playing paused --seconds 60 --out resultados.json
+#   python benchmarks.py icons marquee
+#   python benchmarks.py payload                 # bytes y parseo de cada poll (sin Qt)
+#   python benchmarks.py engine --seconds 10     # el PlaybackEngine solo (sin Qt)
+#   python benchmarks.py ipc                     # servidor local con 100 suscriptores
+#   python benchmarks.py ws                      # WebSocket con 300 clientes (requiere websockets)
+#   python benchmarks.py modes                   # arranque y RSS: barra vs --headless
+#   python benchmarks.py sinks                   # escrituras a disco por hora (reloj virtual)
+#   python benchmarks.py covers                  # portadas: aciertos de caché y bytes ahorrados
+#
+# Escenarios del Overlay completo (con FakeSpotifyClient, sin red):
+#   playing, paused, idle, long_title, hotkey_spam
+# Imprime JSON para poder comparar entre commits.
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+from metrics import rss_bytes
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def _app():
+    from PySide6 import QtWidgets
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication(sys.argv)
+
+
+def bench_icons(minutes=1.0, poll_seconds=0.8):
+    """Simula set_playing() en cada poll y mide renders/allocs por minuto ya en régimen."""
+    _app()
+    import icons
+
+    icons.registry.clear()
+    icons.warm_up()
+    calls = int(minutes * 60 / poll_seconds)
+    renders_before = icons.registry.renders
+
+    tracemalloc.start()
+    snap_before = tracemalloc.take_snapshot()
+    t0 = time.process_time()
+    for i in range(calls):
+        (icons.icon_pause if i % 2 else icons.icon_play)()
+    cpu = time.process_time() - t0
+    snap_after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    grown = [s for s in snap_after.compare_to(snap_before, "filename")
+             if s.traceback[0].filename.endswith("icons.py") and s.size_diff > 0]
+    return {
+        "scenario": "icons",
+        "calls": calls,
+        "renders_per_minute": (icons.registry.renders - renders_before) / minutes,
+        "icons_py_alloc_bytes_per_minute": sum(s.size_diff for s in grown) / minutes,
+        "cpu_seconds": cpu,
+        "registry": icons.registry.stats(),
+    }
+
+
+def bench_engine(seconds=30.0):
+    """El PlaybackEngine solo (sin Qt) contra FakeSpotifyClient: CPU, polls y memoria."""
+    from fake_spotify import FakePlayer, FakeSpotifyClient
+    from playback_engine import PlaybackEngine
+
+    client = FakeSpotifyClient(FakePlayer())
+    engine = PlaybackEngine(client, state_file=None)
+    counts = {"states": 0, "events": 0}
+    engine.subscribe_state(lambda *_: counts.__setitem__("states", counts["states"] + 1))
+    engine.events.subscribe(lambda *_: counts.__setitem__("events", counts["events"] + 1))
+
+    tracemalloc.start()
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    engine.start()
+    time.sleep(seconds)
+    engine.stop()
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    hours = wall / 3600
+    return {
+        "scenario": "engine",
+        "seconds": wall,
+        "cpu_ms_per_minute": 1000 * cpu / (wall / 60),
+        "py_alloc_peak_bytes": peak,
+        "polls_per_hour": engine.poll_requests.total / hours,
+        "state_changes": counts["states"],
+        "events": counts["events"],
+    }
+
+
+def bench_ipc(subscribers=100, changes=200, interval=0.01):
+    """Fan-out del servidor local: N suscriptores reciben cada cambio de estado.
+
+    Mide, por cambio, cuánto tarda en llegarle al último suscriptor (p50/p99).
+    Los suscriptores no agregan ninguna llamada a la API.
+    """
+    import asyncio
+    import tempfile
+    import threading
+    from fake_spotify import FakeSpotifyClient
+    from ipc_server import USE_UNIX_SOCKET, IpcServer
+    from playback_engine import PlaybackEngine
+    from playback_state import CHG_TEXT, CHG_TRACK, PlaybackState
+
+    client = FakeSpotifyClient()
+    engine = PlaybackEngine(client, state_file=None)
+    path = os.path.join(tempfile.mkdtemp(), "bench.sock")
+    server = IpcServer(engine, path=path, port=0).start()
+    sent_at = {}
+    last_arrival = {}
+
+    async def subscriber():
+        if USE_UNIX_SOCKET:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        writer.write(b'{"op":"subscribe"}\n')
+        await reader.readline()                 # estado inicial
+        return reader, writer
+
+    async def consume(reader):
+        for _ in range(changes):
+            msg = json.loads(await reader.readline())
+            i = int(msg["state"]["track_id"])
+            last_arrival[i] = max(last_arrival.get(i, 0.0), time.perf_counter())
+
+    def produce():
+        for i in range(changes):
+            sent_at[i] = time.perf_counter()
+            server.publish(PlaybackState(f"Tema {i} — Artista", True, track_id=str(i)), CHG_TEXT | CHG_TRACK)
+            time.sleep(interval)
+
+    async def run():
+        conns = await asyncio.gather(*(subscriber() for _ in range(subscribers)))
+        producer = threading.Thread(target=produce)
+        cpu0 = time.process_time()
+        producer.start()
+        await asyncio.gather(*(consume(r) for r, _ in conns))
+        cpu = time.process_time() - cpu0
+        producer.join()
+        for _, w in conns:
+            w.close()
+        return cpu
+
+    cpu = asyncio.run(run())
+    stats = server.stats()
+    server.stop()
+    lat = sorted((last_arrival[i] - sent_at[i]) * 1000 for i in range(changes))
+    return {
+        "scenario": "ipc",
+        "subscribers": subscribers,
+        "changes": changes,
+        "fanout_ms_p50": lat[len(lat) // 2],
+        "fanout_ms_p99": lat[int(len(lat) * 0.99) - 1],
+        "fanout_ms_max": lat[-1],
+        "cpu_seconds": cpu,
+        "messages_sent": stats["messages_sent"],
+        "bytes_sent": stats["bytes_sent"],
+        "dropped_clients": stats["dropped_clients"],
+        "api_calls": client.total_calls,
+    }
+
+
+def bench_ws(clients=300, slow=20, changes=200, interval=0.05):
+    """Fan-out del WebSocket: N clientes al día y algunos que no leen nada.
+
+    Mide, por cambio, cuánto tarda en llegarle al último cliente que lee
+    (p50/p99); los que no leen no deberían moverlo. Los lentos son sockets
+    TCP crudos que hacen el handshake y nunca leen, con buffers chicos de los
+    dos lados: el servidor tiene que fusionarles los cambios (coalesced > 0).
+    """
+    import asyncio
+    import base64
+    import socket
+    import threading
+    from fake_spotify import FakeSpotifyClient
+    from playback_engine import PlaybackEngine
+    from playback_state import CHG_TEXT, CHG_TRACK, PlaybackState
+    import ws_server
+    if ws_server.serve is None:
+        return {"scenario": "ws", "skipped": "falta el paquete websockets"}
+    try:
+        from websockets.asyncio.client import connect
+    except ImportError:
+        from websockets import connect
+
+    engine = PlaybackEngine(FakeSpotifyClient(), state_file=None)
+    server = ws_server.WsServer(engine, port=0, progress_seconds=0).start()
+    sent_at = {}
+    last_arrival = {}
+
+    def stall():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.connect((server.host, server.port))
+        key = base64.b64encode(os.urandom(16)).decode()
+        sock.sendall((f"GET / HTTP/1.1\r\nHost: {server.host}:{server.port}\r\n"
+                      "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        return sock
+
+    async def consume(ws):
+        while True:
+            track = json.loads(await ws.recv())["patch"].get("track_id")
+            if track is None:
+                continue
+            i = int(track)
+            last_arrival[i] = max(last_arrival.get(i, 0.0), time.perf_counter())
+            if i == changes - 1:
+                return
+
+    def produce():
+        for i in range(changes):
+            sent_at[i] = time.perf_counter()
+            server.publish(PlaybackState(f"Tema {i} — Artista " + "x" * 2000, True, track_id=str(i)),
+                           CHG_TEXT | CHG_TRACK)
+            time.sleep(interval)
+
+    async def run():
+        url = server.address
+        readers = await asyncio.gather(*(connect(url) for _ in range(clients)))
+        # Los lentos: ni siquiera leen la respuesta del handshake
+        stalled = [stall() for _ in range(slow)]
+        # En loopback el kernel agranda el buffer de envío hasta varios MB y se
+        # traga todo: se lo fija chico a los lentos para que el atraso llegue
+        # al servidor, como con un cliente real en una red lenta.
+        ports = {sock.getsockname()[1] for sock in stalled}
+        while len(server._peers) < clients + slow:
+            await asyncio.sleep(0.01)
+        for peer in list(server._peers):
+            if peer.ws.remote_address[1] in ports:
+                peer.ws.transport.get_extra_info("socket").setsockopt(
+                    socket.SOL_SOCKET, socket.SO_SNDBUF, 4096)
+        for ws in readers:
+            json.loads(await ws.recv())         # estado inicial
+        producer = threading.Thread(target=produce)
+        cpu0 = time.process_time()
+        producer.start()
+        await asyncio.gather(*(consume(ws) for ws in readers))
+        cpu = time.process_time() - cpu0
+        producer.join()
+        for ws in readers:
+            ws.transport.abort()
+        for sock in stalled:
+            sock.close()
+        return cpu
+
+    cpu = asyncio.run(run())
+    stats = server.stats()
+    server.stop()
+    if slow:
+        assert stats["coalesced"] > 0, "los clientes lentos no llegaron a atrasarse"
+    lat = sorted((last_arrival[i] - sent_at[i]) * 1000 for i in last_arrival)
+    return {
+        "scenario": "ws",
+        "clients": clients,
+        "slow_clients": slow,
+        "changes": changes,
+        "fanout_ms_p50": lat[len(lat) // 2],
+        "fanout_ms_p99": lat[int(len(lat) * 0.99) - 1],
+        "fanout_ms_max": lat[-1],
+        "cpu_seconds": cpu,
+        "messages_sent": stats["messages_sent"],
+        "encodes": stats["encodes"],
+        "coalesced": stats["coalesced"],
+        "coalesced_per_slow_client": stats["coalesced"] / slow if slow else 0,
+    }
+
+
+def bench_modes(runs=3):
+    """Arranque y memoria de main.py con barra vs --headless, contra fake_spotify.
+
+    Cada modo corre en un proceso aparte (HOME temporal, sin socket local) y
+    sale al primer dato real imprimiendo sus marcas de arranque y su RSS.
+    """
+    import subprocess
+    import tempfile
+    from fake_spotify import FakeSpotifyServer
+
+    main_py = os.path.join(os.path.dirname(os.path.abspath(__file__)), "main.py")
+    results = {}
+    with FakeSpotifyServer() as server, tempfile.TemporaryDirectory() as home:
+        # Las portadas las sirve el mismo servidor falso; la caché queda en el HOME temporal
+        env = dict(os.environ, NOWPLAYING_API_BASE=server.base_url, HOME=home, USERPROFILE=home,
+                   NOWPLAYING_COVER_CACHE=os.path.join(home, "covers"))
+        for mode, extra in (("gui", []), ("headless", ["--headless"])):
+            reports = []
+            for _ in range(runs):
+                t0 = time.perf_counter()
+                out = subprocess.run(
+                    [sys.executable, main_py, "--no-ipc", "--exit-after-first-data", *extra],
+                    env=env, capture_output=True, text=True, timeout=60, check=True,
+                ).stdout
+                report = json.loads(out.strip().splitlines()[-1])
+                report["process_wall_ms"] = (time.perf_counter() - t0) * 1000
+                reports.append(report)
+            best = min(reports, key=lambda r: r["startup_ms"].get("first_live_data", 1e9))
+            results[mode] = {
+                "first_live_data_ms": best["startup_ms"].get("first_live_data"),
+                "process_wall_ms": best["process_wall_ms"],
+                "rss_bytes": min(r["rss_bytes"] for r in reports),
+                "qt_loaded": best["qt_loaded"],
+            }
+    gui, headless = results["gui"], results["headless"]
+    return {
+        "scenario": "modes",
+        "runs": runs,
+        **{f"{mode}_{k}": v for mode, r in results.items() for k, v in r.items()},
+        "rss_saved_bytes": gui["rss_bytes"] - headless["rss_bytes"],
+    }
+
+
+def bench_sinks(hours=1.0):
+    """Sinks de archivo durante horas simuladas con un tema larguísimo sonando:
+    después de la primera escritura no debería haber ninguna más."""
+    import tempfile
+    from pathlib import Path
+
+    from clocks import VirtualClock
+    from fake_spotify import FakePlayer, FakeSpotifyClient
+    from playback_engine import PlaybackEngine
+    from sinks import CoverSink, JsonSink, Sinks, TextSink
+
+    class _Timed(FakeSpotifyClient):
+        def _call(self, name):
+            super()._call(name)
+            if clock.monotonic() >= hours * 3600:
+                engine.stop()
+
+    clock = VirtualClock()
+    track = {"id": "long", "name": "Tema larguísimo", "artists": ["Alguien"],
+             "duration_ms": int((hours + 1) * 3600 * 1000)}
+    client = _Timed(FakePlayer([track], clock=clock.monotonic))
+    engine = PlaybackEngine(client, clock=clock, state_file=None).start_commands()
+    with tempfile.TemporaryDirectory() as d:
+        d = Path(d)
+        sinks = Sinks()
+        sinks.add(TextSink, d / "np.txt")
+        sinks.add(JsonSink, d / "np.json")
+        sinks.add(CoverSink, d / "np.jpg", fetch=lambda url: b"\xff\xd8" + url.encode())
+        sinks.attach(engine)
+        engine.run()
+        engine.stop()
+        sinks.stop()
+        stats = sinks.stats()
+    writes = sum(s["writes"] for s in stats["sinks"].values())
+    return {
+        "scenario": "sinks",
+        "simulated_hours": clock.monotonic() / 3600,
+        "polls": client.total_calls,
+        "writes": writes,
+        "writes_per_hour_after_first": (writes - len(stats["sinks"])) / hours,
+        "sinks": stats["sinks"],
+    }
+
+
+def bench_covers(tracks=300, albums=25, sessions=2, image_bytes=60_000):
+    """Portadas de una escucha típica (varios temas por álbum), en varias sesiones
+    sobre la misma caché en disco. Descarga y decodificación simuladas (sin red ni Qt)."""
+    import tempfile
+    import threading
+    from cover_loader import CoverLoader
+
+    def fetch(url):
+        return url.encode().ljust(image_bytes, b"\0")
+
+    def decode(data, px):
+        return data[:px * px * 4]       # lo que ocuparía una QImage ARGB de px×px
+
+    results = []
+    with tempfile.TemporaryDirectory() as d:
+        for _ in range(sessions):
+            loader = CoverLoader(fetch=fetch, cache_dir=d, decode=decode)
+            for i in range(tracks):
+                url = f"https://i.scdn.co/image/album{(i * 7) % albums}-64"
+                done = threading.Event()
+                if loader.load(url, 44, lambda *_: done.set()) is None:
+                    done.wait()
+                loader.get_bytes(url.replace("-64", "-300"))    # el sink de portada
+            loader.shutdown()
+            results.append(loader.stats())
+    return {"scenario": "covers", "tracks": tracks, "albums": albums, "sessions": results}
+
+
+def bench_payload(polls=2000, polls_per_hour=360):
+    """Bytes y tiempo de parseo por poll: spotipy (/me/player + json) contra slim_playback.
+
+    polls_per_hour por defecto es lo que hace PollScheduler con un tema sonando.
+    """
+    import json as std_json
+    from fake_spotify import FakePlayer
+    from playback_state import PlaybackSnapshot
+    import slim_playback
+
+    player = FakePlayer()
+    full = std_json.dumps(player.playback(with_device=True)).encode()
+    slim = std_json.dumps(player.playback(with_device=False)).encode()
+
+    def measure(parse, raw):
+        t0 = time.perf_counter_ns()
+        for _ in range(polls):
+            PlaybackSnapshot.from_playback(parse(raw), 0.0)
+        return (time.perf_counter_ns() - t0) / polls / 1000
+
+    full_us = measure(std_json.loads, full)
+    slim_us = measure(slim_playback.parse_playback, slim)
+    return {
+        "scenario": "payload",
+        "decoder": slim_playback.JSON_DECODER,
+        "polls_per_hour": polls_per_hour,
+        "full_bytes_per_poll": len(full),
+        "slim_bytes_per_poll": len(slim),
+        "full_bytes_per_hour": len(full) * polls_per_hour,
+        "slim_bytes_per_hour": len(slim) * polls_per_hour,
+        "full_parse_us_per_poll": full_us,
+        "slim_parse_us_per_poll": slim_us,
+    }
+
+
+def _run_for(app, seconds):
+    from PySide6 import QtCore
+    loop = QtCore.QEventLoop()
+    QtCore.QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+def _legacy_marquee_class():
+    """La marquesina anterior (mide y re-dibuja todo el texto en cada frame), para comparar."""
+    from PySide6 import QtCore, QtGui, QtWidgets
+    from config import MARQUEE_SPEED_MS
+
+    class LegacyMarquee(QtWidgets.QLabel):
+        def __init__(self, *args):
+            super().__init__(*args)
+            self.offset = 0
+            self.timer = QtCore.QTimer(self)
+            self.timer.timeout.connect(self.tick)
+
+        def start(self):
+            self.timer.start(MARQUEE_SPEED_MS)
+
+        def tick(self):
+            self.offset += 1
+            if self.offset > self.fontMetrics().horizontalAdvance(self.text()) + 40:
+                self.offset = 0
+            self.update()
+
+        def paintEvent(self, e):
+            p = QtGui.QPainter(self)
+            txt = self.text()
+            text_w = self.fontMetrics().horizontalAdvance(txt)
+            x = -self.offset
+            while x < self.width():
+                p.drawText(x, 0, max(text_w + 40, self.width()), self.height(),
+                           QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft, txt)
+                x += text_w + 40
+
+    return LegacyMarquee
+
+
+def _measure_marquee(cls, text, seconds):
+    from PySide6 import QtCore
+    app = _app()
+    label = cls(text)
+    label.resize(180, 24)
+    paints = [0]
+
+    class _Count(QtCore.QObject):
+        def eventFilter(self, obj, e):
+            if obj is label and e.type() == QtCore.QEvent.Paint:
+                paints[0] += 1
+            return False
+
+    counter = _Count()
+    label.installEventFilter(counter)
+    label.show()
+    label.start()
+    _run_for(app, 0.2)          # que arranque y se exponga
+    paints[0] = 0
+    t0 = time.process_time()
+    _run_for(app, seconds)
+    cpu = time.process_time() - t0
+    label.hide()
+    return {"cpu_ms_per_second": 1000 * cpu / seconds, "paints_per_second": paints[0] / seconds}
+
+
+def bench_marquee(seconds=5.0):
+    """CPU por segundo con un título largo desplazándose: marquesina actual vs la anterior."""
+    from overlay_ui import MarqueeLabel
+    long_title = "Una canción con un título bastante largo — Artista Uno, Artista Dos, Artista Tres"
+    short_title = "Corto — Yo"
+    return {
+        "scenario": "marquee",
+        "seconds": seconds,
+        "legacy_long": _measure_marquee(_legacy_marquee_class(), long_title, seconds),
+        "current_long": _measure_marquee(MarqueeLabel, long_title, seconds),
+        "legacy_short": _measure_marquee(_legacy_marquee_class(), short_title, seconds),
+        "current_short": _measure_marquee(MarqueeLabel, short_title, seconds),
+    }
+
+
+# ----- Overlay completo -----
+LONG_TITLE = [{"id": "bench000000000000000long", "duration_ms": 240000,
+               "name": "Un título larguísimo para forzar la marquesina a desplazarse todo el tiempo",
+               "artists": ["Artista Uno", "Artista Dos", "Artista Tres"]}]
+SHORT_TITLE = [{"id": "bench00000000000000short", "duration_ms": 240000,
+                "name": "Corto", "artists": ["Yo"]}]
+
+
+class _EventCounter:
+    """Cuenta eventos Timer y Paint de toda la aplicación."""
+
+    def __init__(self, app):
+        from PySide6 import QtCore
+
+        counts = self.counts = {"timer": 0, "paint": 0}
+        timer_t, paint_t = QtCore.QEvent.Timer, QtCore.QEvent.Paint
+
+        class _Filter(QtCore.QObject):
+            def eventFilter(self, obj, e):
+                t = e.type()
+                if t == timer_t:
+                    counts["timer"] += 1
+                elif t == paint_t:
+                    counts["paint"] += 1
+                return False
+
+        self._filter = _Filter()
+        self._app = app
+        app.installEventFilter(self._filter)
+
+    def reset(self):
+        self.counts["timer"] = self.counts["paint"] = 0
+
+    def remove(self):
+        self._app.removeEventFilter(self._filter)
+
+
+def _bench_overlay(name, playlist, playing=True, seconds=30.0, spam=False):
+    from PySide6 import QtCore
+    from cover_loader import CoverLoader
+    from fake_spotify import COVER_PNG, FakePlayer, FakeSpotifyClient
+    from hotkeys import HK_NEXT, HK_VOL_UP
+    from overlay_ui import Overlay
+
+    app = _app()
+    client = FakeSpotifyClient(FakePlayer(playlist, playing=playing))
+    # Portadas sin red ni caché en disco: el benchmark no sale de la máquina
+    covers = CoverLoader(fetch=lambda url: COVER_PNG, cache_dir=None)
+    overlay = Overlay(client, state_file=None, covers=covers)
+    overlay.show()
+    _run_for(app, 1.0)                  # primer poll, primer paint, warm-up
+
+    events = _EventCounter(app)
+    spam_timers = []
+    if spam:
+        for hk, ms in ((HK_VOL_UP, 50), (HK_NEXT, 300)):
+            t = QtCore.QTimer()
+            t.timeout.connect(lambda hk=hk: overlay.handle_hotkey(hk))
+            t.start(ms)
+            spam_timers.append(t)
+
+    calls0 = client.total_calls
+    polls0 = overlay.engine.poll_requests.total
+    frames0 = overlay.frames.wakeups
+    rss0 = rss_bytes()
+    tracemalloc.start()
+    snap0 = tracemalloc.take_snapshot()
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+
+    _run_for(app, seconds)
+
+    wall = time.perf_counter() - wall0
+    cpu = time.process_time() - cpu0
+    snap1 = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss1 = rss_bytes()
+    for t in spam_timers:
+        t.stop()
+    events.remove()
+    overlay.stop_polling()
+    overlay.hide()
+    overlay.deleteLater()
+    covers.shutdown()
+
+    alloc_diff = sum(s.size_diff for s in snap1.compare_to(snap0, "filename"))
+    polls = overlay.engine.poll_requests.total - polls0
+    hours = wall / 3600
+    return {
+        "scenario": name,
+        "seconds": wall,
+        "cpu_ms_per_minute": 1000 * cpu / (wall / 60),
+        "wakeups_per_second": (events.counts["timer"] + polls) / wall,
+        "frame_clock_wakeups_per_second": (overlay.frames.wakeups - frames0) / wall,
+        "paints_per_second": events.counts["paint"] / wall,
+        "py_alloc_growth_bytes": alloc_diff,
+        "py_alloc_peak_bytes": peak,
+        "rss_growth_bytes": rss1 - rss0,
+        "api_calls_per_hour": (client.total_calls - calls0) / hours,
+        "polls_per_hour": polls / hours,
+        "api_calls": dict(client.calls),
+        "coalescer": overlay.engine.coalescer.stats(),
+    }
+
+
+def bench_playing(seconds=30.0):
+    return _bench_overlay("playing", SHORT_TITLE, seconds=seconds)
+
+
+def bench_paused(seconds=30.0):
+    return _bench_overlay("paused", SHORT_TITLE, playing=False, seconds=seconds)
+
+
+def bench_idle(seconds=30.0):
+    return _bench_overlay("idle", [], playing=False, seconds=seconds)
+
+
+def bench_long_title(seconds=30.0):
+    return _bench_overlay("long_title", LONG_TITLE, seconds=seconds)
+
+
+def bench_hotkey_spam(seconds=30.0):
+    return _bench_overlay("hotkey_spam", SHORT_TITLE, seconds=seconds, spam=True)
+
+
+BENCHES = {
+    "playing": bench_playing,
+    "paused": bench_paused,
+    "idle": bench_idle,
+    "long_title": bench_long_title,
+    "hotkey_spam": bench_hotkey_spam,
+    "icons": bench_icons,
+    "marquee": bench_marquee,
+    "payload": bench_payload,
+    "engine": bench_engine,
+    "ipc": bench_ipc,
+    "ws": bench_ws,
+    "modes": bench_modes,
+    "sinks": bench_sinks,
+    "covers": bench_covers,
+}
+TIMED = {"playing", "paused", "idle", "long_title", "hotkey_spam", "marquee", "engine"}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmarks de NowPlayingBar")
+    ap.add_argument("benches", nargs="*", help="de: " + ", ".join(BENCHES) + " (por defecto, todos)")
+    ap.add_argument("--seconds", type=float, default=30.0, help="duración de cada escenario")
+    ap.add_argument("--out", help="además de imprimir, guardar el JSON en este archivo")
+    args = ap.parse_args(argv)
+    unknown = [n for n in args.benches if n not in BENCHES]
+    if unknown:
+        ap.error(f"benchmark desconocido: {', '.join(unknown)}")
+
+    results = []
+    for name in args.benches or list(BENCHES):
+        fn = BENCHES[name]
+        results.append(fn(seconds=args.seconds) if name in TIMED else fn())
+
+    text = json.dumps({"python": sys.version.split()[0], "results": results}, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
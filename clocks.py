@@ -0,0 +1,74 @@
+# clocks.py
+# Relojes inyectables: el del sistema y uno virtual para reproducir sesiones grabadas
+
+import threading
+import time
+
+
+class SystemClock:
+    """Reloj real. wait() es un Event.wait() común."""
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def monotonic_ns(self) -> int:
+        return time.monotonic_ns()
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def wait(self, event, timeout) -> bool:
+        """Espera a que event se active o pase timeout; devuelve event.is_set()."""
+        return event.wait(timeout)
+
+
+class VirtualClock:
+    """Reloj simulado: el tiempo solo avanza con sleep()/wait()/advance().
+
+    speed=None avanza al instante (una sesión de horas corre en segundos);
+    speed=100 duerme de verdad 1/100 del tiempo virtual.
+    """
+
+    def __init__(self, start=0.0, epoch=1_700_000_000.0, speed=None):
+        self._now = float(start)
+        self._epoch = epoch
+        self._speed = speed
+        self._lock = threading.Lock()
+
+    def monotonic(self) -> float:
+        with self._lock:
+            return self._now
+
+    def monotonic_ns(self) -> int:
+        with self._lock:
+            return int(self._now * 1_000_000_000)
+
+    def time(self) -> float:
+        with self._lock:
+            return self._epoch + self._now
+
+    def advance(self, seconds):
+        with self._lock:
+            self._now += max(0.0, seconds)
+
+    def sleep(self, seconds):
+        if self._speed:
+            time.sleep(seconds / self._speed)
+        self.advance(seconds)
+
+    def wait(self, event, timeout) -> bool:
+        if event.is_set():
+            return True
+        if not self._speed:
+            self.advance(timeout)
+            return event.is_set()
+        t0 = time.monotonic()
+        woke = event.wait(timeout / self._speed)
+        self.advance(min(timeout, (time.monotonic() - t0) * self._speed) if woke else timeout)
+        return woke
+
+
+system_clock = SystemClock()
@@ -0,0 +1,177 @@
+# commands.py
+# Ejecutor de comandos de Spotify (prev/next/play/pausa/volumen) fuera del hilo de la UI
+
+import queue
+import threading
+
+from config import COMMAND_QUEUE_SIZE, COALESCE_WINDOW_SECONDS
+
+
+class CommandExecutor:
+    """Un hilo dedicado que ejecuta los comandos en orden, con cola acotada.
+
+    on_result(nombre, ok, resultado) se llama desde el hilo del ejecutor;
+    la UI le pasa el .emit de una señal para recibirlo en el hilo de Qt.
+    """
+
+    def __init__(self, on_result=None, maxsize=COMMAND_QUEUE_SIZE):
+        self._on_result = on_result
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(
+            target=self._run, name="spotify-commands", daemon=True
+        )
+        self.dropped = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def submit(self, name, fn, *args) -> bool:
+        """Encola fn(*args). Devuelve False si la cola está llena (se descarta)."""
+        try:
+            self._queue.put_nowait((name, fn, args))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            name, fn, args = job
+            try:
+                result, ok = fn(*args), True
+            except Exception as e:
+                result, ok = e, False
+            if self._on_result:
+                try:
+                    self._on_result(name, ok, result)
+                except Exception:
+                    pass
+
+
+def set_volume_relative(sp, snapshots, delta, max_age):
+    """Aplica delta al volumen del snapshot (GET solo si está viejo) y hace un PUT.
+
+    El poller usa currently_playing (sin dispositivo), así que el GET se hace
+    si el volumen conocido es viejo aunque el resto del snapshot sea reciente.
+
+    Actualiza el snapshot antes del PUT para que el próximo comando ya parta
+    del volumen nuevo; si el PUT falla, lo vuelve atrás.
+
+    El GET va con prioridad de comando (GovernedSpotify.command): lo pidió
+    el usuario, no puede quedar afuera por la reserva de los polls.
+    """
+    command = getattr(sp, "command", None)
+    fetch = command("current_playback") if command is not None else sp.current_playback
+    snap = snapshots.get_fresh(fetch, max_age, need_device=True)
+    if snap.volume_percent is None:
+        return None
+    old_vol = snap.volume_percent
+    new_vol = max(0, min(100, old_vol + delta))
+    if new_vol == old_vol:
+        return new_vol
+    snapshots.update(volume_percent=new_vol)
+    try:
+        sp.volume(new_vol)
+    except Exception:
+        snapshots.update(volume_percent=old_vol)
+        raise
+    return new_vol
+
+
+class CommandCoalescer:
+    """Junta ráfagas de volumen y de skips antes de pasarlas al ejecutor.
+
+    - Volumen: los deltas de una ventana se suman en un solo sp.volume().
+    - Skips: N "next" y M "prev" dentro de la ventana se reducen a |N-M|
+      llamadas en la dirección neta (aproximado: "prev" con la canción
+      avanzada reinicia el tema en vez de volver, igual que en Spotify).
+
+    Los contadores requested/issued permiten ver cuántas llamadas se ahorraron.
+    on_submit(nombre) se llama por cada comando que realmente sale (una
+    ráfaga que se anula, p.ej. next + prev, no llama a nada).
+    """
+
+    def __init__(self, executor, sp, snapshots, max_age, window=COALESCE_WINDOW_SECONDS,
+                 on_submit=None):
+        self._executor = executor
+        self._on_submit = on_submit
+        self._sp = sp
+        self._snapshots = snapshots
+        self._max_age = max_age
+        self._window = window
+        self._lock = threading.Lock()
+        self._timer = None
+        self._vol_delta = 0
+        self._skips = 0
+        self.requested = 0
+        self.issued = 0
+
+    @property
+    def saved(self) -> int:
+        return max(0, self.requested - self.issued)
+
+    def stats(self) -> dict:
+        return {"requested": self.requested, "issued": self.issued, "saved": self.saved}
+
+    def volume(self, delta):
+        with self._lock:
+            self._vol_delta += delta
+            self.requested += 1
+            self._schedule()
+
+    def skip(self, n):
+        """n=+1 para "next", n=-1 para "prev"."""
+        with self._lock:
+            self._skips += n
+            self.requested += 1
+            self._schedule()
+
+    def flush(self):
+        """Manda ya lo acumulado (lo llama el timer de la ventana)."""
+        with self._lock:
+            self._timer = None
+            delta, self._vol_delta = self._vol_delta, 0
+            skips, self._skips = self._skips, 0
+
+        if skips:
+            fn = self._sp.next_track if skips > 0 else self._sp.previous_track
+            name = "next" if skips > 0 else "prev"
+            for _ in range(abs(skips)):
+                if self._executor.submit(name, fn):
+                    self._issued(name)
+        if delta:
+            if self._executor.submit(
+                "volume", set_volume_relative, self._sp, self._snapshots, delta, self._max_age
+            ):
+                self._issued("volume")
+
+    def _issued(self, name):
+        self.issued += 1
+        if self._on_submit:
+            self._on_submit(name)
+
+    def cancel(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _schedule(self):
+        # Se llama con el lock tomado
+        if self._timer is None:
+            self._timer = threading.Timer(self._window, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
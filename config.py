@@ -3,6 +3,7 @@
 # Configuración global del NowPlayingOverlay
 # -------------------------------------
 
+import os
 from pathlib import Path
 
 # --- Credenciales Spotify ---
@@ -16,16 +17,119 @@ SCOPE = "user-read-currently-playing user-read-playback-state user-modify-playba
 # --- Archivos y rutas ---
 CACHE_PATH = str(Path.home() / ".cache-spotipy-nowplaying")
 
+# --- Token OAuth (ver token_manager.py) ---
+TOKEN_REFRESH_MARGIN_SECONDS = 300   # refrescar en segundo plano 5 min antes de que venza
+TOKEN_RETRY_SECONDS = 30             # si falla el refresco, reintentar a los...
+
+# --- HTTP (ver transport.py) ---
+HTTP_POOL_SIZE = 4                 # conexiones keep-alive por host (poll + comandos a la vez)
+HTTP_CONNECT_TIMEOUT = 3.05        # segundos para conectar
+HTTP_READ_TIMEOUT = 5.0            # segundos esperando la respuesta
+HTTP_RETRIES = 2                   # reintentos ante fallas de red / 5xx
+HTTP_BACKOFF_SECONDS = 0.3         # backoff exponencial: 0.3, 0.6, 1.2...
+HTTP_BACKOFF_JITTER_SECONDS = 0.25 # + jitter aleatorio
+LATENCY_BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600, 3200)
+
+# --- Rate limit propio (ver rate_limit.py) ---
+# Spotify no publica el número exacto (ventana móvil de 30 s); nos quedamos bien abajo.
+RATE_BUCKET_CAPACITY = 20          # ráfaga máxima
+RATE_BUCKET_PER_SECOND = 1.5       # recarga (~90 requests/min sostenidos)
+RATE_POLL_RESERVE = 5              # tokens que los polls no pueden usar (quedan para comandos)
+RATE_COMMAND_MAX_WAIT = 2.0        # un comando espera a lo sumo esto por un token
+
+# --- API alternativa (p.ej. fake_spotify.py para pruebas sin red) ---
+# Si está definida, el cliente usa esa base en vez de api.spotify.com y pide
+# el token a <base>/api/token (client credentials, sin navegador).
+API_BASE_URL = os.environ.get("NOWPLAYING_API_BASE") or None
+# Si está definida, graba cada poll en esa traza (ver playback_trace.py)
+TRACE_PATH = os.environ.get("NOWPLAYING_TRACE") or None
+
+# --- Servidor local (ver ipc_server.py) ---
+# Otras herramientas (overlays de stream, barras de estado, bots) leen el estado
+# por este socket en vez de consultar a Spotify cada una por su cuenta.
+IPC_ENABLED = True
+IPC_SOCKET_PATH = os.environ.get("NOWPLAYING_IPC") or str(
+    Path(os.environ.get("XDG_RUNTIME_DIR") or Path.home()) / ".nowplaying.sock"
+)
+IPC_TCP_PORT = 47811                   # Windows (asyncio no tiene sockets Unix): 127.0.0.1
+IPC_MAX_CLIENT_BUFFER = 256 * 1024     # un cliente que no lee y acumula más que esto se desconecta
+
+# --- WebSocket para browser sources de OBS (ver ws_server.py; requiere websockets) ---
+# Opcional: también con --ws en main.py. Solo escucha en localhost.
+WS_ENABLED = os.environ.get("NOWPLAYING_WS", "").lower() in ("1", "true", "yes")
+WS_HOST = "127.0.0.1"
+WS_PORT = int(os.environ.get("NOWPLAYING_WS_PORT") or 47812)
+WS_PROGRESS_SECONDS = 1.0   # mientras suena, un tick de progreso por segundo (0 = sin ticks)
+WS_MAX_CLIENT_BUFFER = 64 * 1024   # con más que esto sin leer, al cliente le llega solo lo último
+
+# --- Salidas a archivo (ver sinks.py); también --text / --json en main.py ---
+SINK_TEXT_PATH = os.environ.get("NOWPLAYING_TEXT") or None    # "título — artistas"
+SINK_JSON_PATH = os.environ.get("NOWPLAYING_JSON") or None    # estado completo
+SINK_COVER_PATH = os.environ.get("NOWPLAYING_COVER") or None  # portada del tema actual
+SINK_BATCH_SECONDS = 0.25   # los cambios que llegan juntos se escriben en una sola pasada
+# Tamaño de portada para clientes externos (JSON, IPC, sink de portada): la
+# imagen más chica de al menos este ancho (Spotify ofrece 64, 300 y 640).
+COVER_WIRE_PX = 300
+
+# --- Portadas (ver cover_loader.py) ---
+COVER_THUMB_PX = 22          # miniatura en la barra (px lógicos; en HiDPI se pide más grande)
+# Caché en disco por contenido: un álbum se descarga una vez, no una por tema
+COVER_CACHE_DIR = os.environ.get("NOWPLAYING_COVER_CACHE") or str(
+    Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "nowplaying" / "covers"
+)
+COVER_CACHE_MAX_BYTES = 20 * 1024 * 1024    # al pasarse, se borran las menos usadas
+COVER_MEMORY_MAX_BYTES = 4 * 1024 * 1024    # imágenes ya decodificadas en memoria
+COVER_FETCH_WORKERS = 2                     # descargas/decodificaciones en paralelo
+
 # --- Actualización / tiempos ---
-POLL_SECONDS = 4           # cada cuántos segundos consulta Spotify
 MARQUEE_SPEED_MS = 35      # velocidad del texto desplazable
 
+# Animaciones (ver frame_clock.py): un solo timer compartido que se apaga en reposo
+ANIMATION_MAX_WAKEUPS_PER_SEC = 30   # presupuesto de despertares por segundo
+PRECISE_TIMER_MAX_MS = 50            # por encima de esto alcanza con un timer "coarse"
+PROGRESS_MIN_FRAME_MS = 60           # la barra de progreso no pide más frames que esto
+PROGRESS_MAX_FRAME_MS = 1000         # ... ni menos (1 px suele tardar cientos de ms)
+
 # Poll adaptativo (segundos)
-FAST_POLL_SECONDS   = 0.8   # cuando está reproduciendo
 PAUSED_POLL_SECONDS = 2.0   # cuando está en pausa
 IDLE_POLL_SECONDS   = 4.0   # cuando no hay reproducción / error
 
-# Si querés ir aún más rápido, probá 0.5. Menos de ~0.5s te puede rate-limitar.
+# Sin conexión (ver connectivity.py): backoff exponencial con jitter a partir
+# de IDLE_POLL_SECONDS, con tope; "offline" tras varios fallos seguidos.
+OFFLINE_AFTER_FAILURES = 3
+OFFLINE_BACKOFF_MAX_SECONDS = 300.0
+RESUME_GAP_SECONDS = 30.0   # si el reloj de pared se adelantó esto al monotónico: volvimos de suspensión
+# Las esperas del poller se cortan en tramos de esto para notar a tiempo una
+# vuelta de suspensión o (sin conexión) un cambio de red, sin esperar el backoff entero.
+WAIT_SLICE_SECONDS = 5.0
+
+# Poll guiado por el fin del tema (ver poll_scheduler.py): a mitad de tema se
+# consulta poco y se agenda un poll justo cuando el tema debería terminar.
+MID_TRACK_POLL_SECONDS  = 10.0          # máximo entre polls mientras suena
+TRACK_END_SLACK_SECONDS = 0.25          # margen tras el final previsto
+MIN_POLL_SECONDS        = 0.5           # nunca más seguido que esto
+POLL_BURST_DELAYS       = (0.5, 1.0, 2.0)  # ráfaga tras un comando o un cambio externo
+# La barra no muestra el volumen: los polls usan /me/player/currently-playing
+# (sin dispositivo) y el volumen se pide solo cuando hace falta (hotkeys).
+POLL_DEVICE_INFO        = False
+
+# Reloj de progreso (ver playback_clock.py)
+CLOCK_SLEW_MS = 400      # en cuánto tiempo se absorbe una diferencia chica con Spotify
+CLOCK_SNAP_MS = 1500     # diferencias mayores (seek, tema nuevo) saltan directo
+# Eventos (ver playback_events.py): un cambio de tema con el anterior a menos
+# de esto del final cuenta como "terminó", si no como "skip".
+EVENT_END_TOLERANCE_MS = 3000
+
+# Snapshot compartido: las acciones de la UI (copiar, volumen) reusan la última
+# respuesta del poller y solo vuelven a pedirla si es más vieja que esto.
+SNAPSHOT_MAX_AGE_SECONDS = 5.0
+
+# Comandos (prev/next/play/volumen): se ejecutan en un hilo aparte con cola acotada.
+COMMAND_QUEUE_SIZE = 16
+# Tras un comando, esperar esto antes de re-consultar (Spotify tarda en reflejarlo).
+COMMAND_SETTLE_SECONDS = 0.35
+# Ventana para juntar ráfagas de hotkeys de volumen / skip en una sola llamada.
+COALESCE_WINDOW_SECONDS = 0.2
 
 # --- Layout de la barra ---
 PADDING_X = 6
@@ -38,10 +142,19 @@ MARGIN_RIGHT = 12
 # --- Apariencia ---
 STYLE_BG = "QFrame { background: rgba(0,0,0,255); border-radius: 9px; }"
 STYLE_LABEL = "color: white; font-size: 11px;"
+STYLE_LABEL_STALE = "color: rgba(255,255,255,140); font-size: 11px;"   # último tema conocido, sin confirmar
 STYLE_PROGRESS = (
     "QProgressBar { background: rgba(255,255,255,28); border: none; }"
     "QProgressBar::chunk { background: #1DB954; }"
 )
+STYLE_PROGRESS_OFFLINE = (
+    "QProgressBar { background: rgba(255,255,255,28); border: none; }"
+    "QProgressBar::chunk { background: #777777; }"
+)
+STYLE_PROGRESS_RATE_LIMITED = (
+    "QProgressBar { background: rgba(255,255,255,28); border: none; }"
+    "QProgressBar::chunk { background: #E5A50A; }"
+)
 
 # --- Posicionamiento “abajo-derecha” por defecto ---
 MARGIN_RIGHT   = 8
@@ -0,0 +1,93 @@
+# connectivity.py
+# Estado de conexión del poller (online / degraded / offline) y backoff exponencial
+
+import random
+import socket
+import threading
+
+from config import (
+    IDLE_POLL_SECONDS,
+    OFFLINE_AFTER_FAILURES,
+    OFFLINE_BACKOFF_MAX_SECONDS,
+)
+
+ONLINE = "online"
+DEGRADED = "degraded"          # fallaron algunos polls; se sigue mostrando lo último
+OFFLINE = "offline"            # varios fallos seguidos: "(sin conexión)"
+RATE_LIMITED = "rate_limited"  # Spotify respondió 429 (no es un problema de red)
+
+
+class Connectivity:
+    """Máquina de estados de la conexión con backoff exponencial con jitter.
+
+    on_failure() devuelve cuánto esperar antes de reintentar:
+    base·2^(n-1), con tope en `cap` y jitter entre 50% y 100% ("equal jitter")
+    para no sincronizarse con nadie. Tras un cambio de red o la vuelta de
+    una suspensión, reset_backoff() reinicia la escalera.
+    """
+
+    def __init__(self, base=IDLE_POLL_SECONDS, cap=OFFLINE_BACKOFF_MAX_SECONDS,
+                 offline_after=OFFLINE_AFTER_FAILURES, rng=random.random):
+        self._base = base
+        self._cap = cap
+        self._offline_after = offline_after
+        self._rng = rng
+        self._lock = threading.Lock()
+        self.state = ONLINE
+        self.failures = 0
+        self.transitions = 0
+
+    def _set(self, state):
+        if state != self.state:
+            self.state = state
+            self.transitions += 1
+            return True
+        return False
+
+    def on_success(self) -> bool:
+        """Devuelve True si cambió el estado."""
+        with self._lock:
+            self.failures = 0
+            return self._set(ONLINE)
+
+    def on_rate_limited(self) -> bool:
+        with self._lock:
+            return self._set(RATE_LIMITED)
+
+    def on_failure(self) -> float:
+        with self._lock:
+            self.failures += 1
+            self._set(OFFLINE if self.failures >= self._offline_after else DEGRADED)
+            return self._delay_locked()
+
+    def backoff_delay(self) -> float:
+        with self._lock:
+            return self._delay_locked()
+
+    def reset_backoff(self):
+        """Red nueva o vuelta de suspensión: el backoff vuelve a empezar.
+
+        Quien llama además despierta al poller para reintentar ya.
+        """
+        with self._lock:
+            self.failures = min(self.failures, max(0, self._offline_after - 1))
+
+    def _delay_locked(self):
+        if self.failures <= 0:
+            return 0.0
+        # Exponente acotado: tras días sin red, 2**n no debe desbordar el float
+        delay = min(self._cap, self._base * 2 ** min(self.failures - 1, 32))
+        return delay * (0.5 + self._rng() / 2)
+
+
+def local_address():
+    """IP local de la ruta por defecto (None sin red). No manda paquetes:
+    connect() de UDP solo elige la interfaz. Si cambia, cambió la red."""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect(("192.0.2.1", 9))     # TEST-NET-1: nunca se contacta
+        return s.getsockname()[0]
+    except OSError:
+        return None
+    finally:
+        s.close()
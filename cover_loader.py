@@ -0,0 +1,296 @@
+# cover_loader.py
+# -------------------------------------
+# Portadas: descarga, caché y decodificación fuera del hilo de Qt.
+#
+#   memoria (LRU por bytes, imágenes ya escaladas)
+#     → disco (por contenido: <sha256>, LRU por mtime, tope en bytes)
+#       → red
+#
+# Los temas de un mismo álbum comparten portada: con la caché en disco, un
+# álbum se descarga una sola vez (también entre sesiones). La decodificación
+# a QImage corre en un worker; Qt se importa recién ahí, así que el modo
+# --headless y los sinks no lo cargan.
+# -------------------------------------
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import urllib.request
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config import (
+    COVER_CACHE_DIR,
+    COVER_CACHE_MAX_BYTES,
+    COVER_FETCH_WORKERS,
+    COVER_MEMORY_MAX_BYTES,
+)
+from settings_store import write_atomic
+
+log = logging.getLogger("nowplaying")
+
+
+def download(url, timeout=10) -> bytes:
+    with urllib.request.urlopen(url, timeout=timeout) as r:
+        return r.read()
+
+
+def decode_qimage(data, px):
+    """bytes → QImage escalada a lo sumo a px×px (sirve en cualquier hilo, a diferencia de QPixmap)."""
+    from PySide6.QtCore import Qt
+    from PySide6.QtGui import QImage
+
+    image = QImage.fromData(data)
+    if image.isNull():
+        raise ValueError("no es una imagen")
+    if max(image.width(), image.height()) > px:
+        image = image.scaled(px, px, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    return image
+
+
+def _cost(obj) -> int:
+    size = getattr(obj, "sizeInBytes", None)
+    return size() if size is not None else len(obj)
+
+
+class MemoryLRU:
+    """key → valor, con tope en bytes (los menos usados salen primero)."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()     # key -> (valor, costo)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            self._items.move_to_end(key)
+            return item[0]
+
+    def put(self, key, value, cost):
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            if cost > self.max_bytes:
+                return
+            self._items[key] = (value, cost)
+            self.bytes += cost
+            while self.bytes > self.max_bytes:
+                _, (_, c) = self._items.popitem(last=False)
+                self.bytes -= c
+                self.evictions += 1
+
+
+class DiskCache:
+    """Archivos nombrados por el sha256 del contenido + un índice url → sha256.
+
+    Dos URLs con la misma imagen ocupan un solo archivo. Cada lectura toca el
+    mtime; al pasar max_bytes se borran los de mtime más viejo.
+    """
+
+    INDEX = "index.json"
+
+    def __init__(self, root, max_bytes):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = {}
+        self._bytes = None              # se calcula la primera vez que hace falta
+        self.evictions = 0
+        try:
+            self._index = json.loads((self.root / self.INDEX).read_text(encoding="utf-8"))
+        except Exception:
+            pass
+
+    def _blobs(self):
+        for p in self.root.iterdir():
+            if p.name != self.INDEX and not p.name.endswith(".tmp"):
+                yield p
+
+    @property
+    def bytes(self) -> int:
+        with self._lock:
+            return self._total()
+
+    def _total(self) -> int:
+        if self._bytes is None:
+            try:
+                self._bytes = sum(p.stat().st_size for p in self._blobs())
+            except FileNotFoundError:
+                self._bytes = 0
+        return self._bytes
+
+    def get(self, url):
+        with self._lock:
+            digest = self._index.get(url)
+        if digest is None:
+            return None
+        path = self.root / digest
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            with self._lock:
+                self._index.pop(url, None)
+            return None
+
+    def put(self, url, data):
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            path = self.root / digest
+            if not path.exists():
+                total = self._total()
+                write_atomic(path, data)
+                self._bytes = total + len(data)
+            self._index[url] = digest
+            if self._bytes > self.max_bytes:
+                self._evict()
+            write_atomic(self.root / self.INDEX, json.dumps(self._index, separators=(",", ":")))
+        return digest
+
+    def _evict(self):
+        # Con el lock tomado
+        blobs = sorted((st.st_mtime, st.st_size, p) for p, st in ((p, p.stat()) for p in self._blobs()))
+        gone = set()
+        for _, size, p in blobs:
+            if self._bytes <= self.max_bytes:
+                break
+            try:
+                p.unlink()
+            except FileNotFoundError:
+                pass
+            self._bytes -= size
+            self.evictions += 1
+            gone.add(p.name)
+        self._index = {u: d for u, d in self._index.items() if d not in gone}
+
+
+class CoverLoader:
+    """Portadas para la barra (QImage escalada) y para los sinks (bytes).
+
+    load(url, px, callback) devuelve la imagen si ya está en memoria; si no,
+    devuelve None y más tarde llama callback(url, imagen o None) desde un
+    worker. Pedidos iguales en vuelo se juntan en una sola descarga.
+    """
+
+    def __init__(self, fetch=download, cache_dir=COVER_CACHE_DIR,
+                 disk_bytes=COVER_CACHE_MAX_BYTES, memory_bytes=COVER_MEMORY_MAX_BYTES,
+                 workers=COVER_FETCH_WORKERS, decode=decode_qimage):
+        self._fetch = fetch
+        self._decode = decode
+        self.disk = DiskCache(cache_dir, disk_bytes) if cache_dir else None
+        self.memory = MemoryLRU(memory_bytes)
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="cover")
+        self._lock = threading.Lock()
+        self._inflight = {}             # (url, px) -> [callbacks]
+        self.requests = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.downloads = 0
+        self.bytes_downloaded = 0
+        self.bytes_saved = 0            # lo que se habría descargado sin caché
+        self.errors = 0
+
+    # ----- Para la barra -----
+    def load(self, url, px, callback):
+        key = (url, px)
+        hit = self.memory.get(key)
+        with self._lock:
+            self.requests += 1
+            if hit is not None:
+                self.memory_hits += 1
+                self.bytes_saved += hit[1]
+                return hit[0]
+            waiting = self._inflight.get(key)
+            if waiting is not None:
+                waiting.append(callback)
+                return None
+            self._inflight[key] = [callback]
+        self._pool.submit(self._work, key)
+        return None
+
+    def _work(self, key):
+        url, px = key
+        image = None
+        try:
+            data = self._bytes(url)
+            image = self._decode(data, px)
+            self.memory.put(key, (image, len(data)), _cost(image))
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+            log.warning("portada %s: %s", url, e)
+        with self._lock:
+            callbacks = self._inflight.pop(key, [])
+        for cb in callbacks:
+            cb(url, image)
+
+    # ----- Para los sinks (en su hilo) -----
+    def get_bytes(self, url) -> bytes:
+        with self._lock:
+            self.requests += 1
+        return self._bytes(url)
+
+    def _bytes(self, url) -> bytes:
+        data = self.disk.get(url) if self.disk is not None else None
+        if data is not None:
+            with self._lock:
+                self.disk_hits += 1
+                self.bytes_saved += len(data)
+            return data
+        data = self._fetch(url)
+        with self._lock:
+            self.downloads += 1
+            self.bytes_downloaded += len(data)
+        if self.disk is not None:
+            try:
+                self.disk.put(url, data)
+            except OSError as e:
+                log.warning("no se pudo guardar la portada en caché: %s", e)
+        return data
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "requests": self.requests,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "downloads": self.downloads,
+                "hit_rate": hits / self.requests if self.requests else 0.0,
+                "bytes_downloaded": self.bytes_downloaded,
+                "bytes_saved": self.bytes_saved,
+                "errors": self.errors,
+                "memory_bytes": self.memory.bytes,
+                "memory_items": len(self.memory),
+                "disk_bytes": self.disk.bytes if self.disk is not None else 0,
+            }
+
+
+# ----- Uno por proceso (la barra y el sink de portada comparten caché) -----
+_loader = None
+_loader_lock = threading.Lock()
+
+
+def shared_loader() -> CoverLoader:
+    global _loader
+    with _loader_lock:
+        if _loader is None:
+            _loader = CoverLoader()
+        return _loader
@@ -0,0 +1,404 @@
+# fake_spotify.py
+# -------------------------------------
+# Servidor local que imita la Web API de Spotify (para benchmarks y pruebas sin red)
+#
+#   python fake_spotify.py --port 8899 --latency-ms 80 --jitter-ms 40
+#   NOWPLAYING_API_BASE=http://127.0.0.1:8899 python main.py
+#
+# Implementa lo que usa la barra: /v1/me/player, /v1/me/player/currently-playing,
+# play/pause/next/previous/volume y /api/token, más las portadas (/image/...,
+# un PNG de 1×1) para que nada salga a la red. Se le pueden inyectar latencia,
+# jitter, 429 con Retry-After y errores 5xx.
+# -------------------------------------
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+IMAGE_BASE = "https://i.scdn.co/image"
+# Portada de prueba: un PNG válido de 1×1 (QImage lo decodifica igual que uno real)
+COVER_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+
+DEFAULT_PLAYLIST = [
+    {"id": "fake0000000000000000001", "name": "Primera canción", "artists": ["Artista Uno"], "duration_ms": 201000},
+    {"id": "fake0000000000000000002", "name": "Un tema con un título bastante más largo que el ancho de la barra",
+     "artists": ["Artista Dos", "Artista Tres"], "duration_ms": 187000},
+    {"id": "fake0000000000000000003", "name": "Corto", "artists": ["Yo"], "duration_ms": 95000},
+]
+
+
+class FakePlayer:
+    """Estado de reproducción simulado. El progreso avanza con time.monotonic()
+    (o el reloj que se inyecte) y al terminar un tema pasa solo al siguiente.
+    Las URLs de portada salen de image_base (FakeSpotifyServer la apunta a sí mismo)."""
+
+    def __init__(self, playlist=None, playing=True, volume=50, clock=time.monotonic):
+        self._clock = clock
+        self.image_base = IMAGE_BASE
+        self._lock = threading.Lock()
+        self.playlist = list(DEFAULT_PLAYLIST if playlist is None else playlist)
+        self.index = 0
+        self.is_playing = playing and bool(self.playlist)
+        self.volume = volume
+        self._pos_ms = 0.0
+        self._since = clock()
+        self._changed_ms = int(time.time() * 1000)
+
+    # ----- Estado -----
+    def _advance(self):
+        # Se llama con el lock tomado
+        now = self._clock()
+        if self.is_playing:
+            self._pos_ms += (now - self._since) * 1000
+        self._since = now
+        while self.playlist and self._pos_ms >= self.playlist[self.index]["duration_ms"]:
+            self._pos_ms -= self.playlist[self.index]["duration_ms"]
+            self.index = (self.index + 1) % len(self.playlist)
+            self._changed_ms = int(time.time() * 1000)
+
+    def _touch(self):
+        self._changed_ms = int(time.time() * 1000)
+
+    def playback(self, with_device=True):
+        with self._lock:
+            self._advance()
+            if not self.playlist:
+                return None
+            track = self.playlist[self.index]
+            data = {
+                "timestamp": self._changed_ms,
+                "progress_ms": int(self._pos_ms),
+                "is_playing": self.is_playing,
+                "currently_playing_type": "track",
+                "context": {"type": "playlist", "uri": "spotify:playlist:fake"},
+                "item": _track_json(track, self.image_base),
+            }
+            if with_device:
+                data["device"] = {
+                    "id": "fake-device", "is_active": True, "name": "Fake Speaker",
+                    "type": "Computer", "volume_percent": self.volume,
+                }
+                data["shuffle_state"] = False
+                data["repeat_state"] = "off"
+            return data
+
+    # ----- Comandos -----
+    def play(self):
+        with self._lock:
+            self._advance()
+            self.is_playing = bool(self.playlist)
+            self._touch()
+
+    def pause(self):
+        with self._lock:
+            self._advance()
+            self.is_playing = False
+            self._touch()
+
+    def next(self):
+        with self._lock:
+            self._advance()
+            if self.playlist:
+                self.index = (self.index + 1) % len(self.playlist)
+            self._pos_ms = 0.0
+            self._touch()
+
+    def previous(self):
+        with self._lock:
+            self._advance()
+            # Igual que Spotify: pasados 3 s, "previous" reinicia el tema
+            if self._pos_ms < 3000 and self.playlist:
+                self.index = (self.index - 1) % len(self.playlist)
+            self._pos_ms = 0.0
+            self._touch()
+
+    def seek(self, position_ms):
+        with self._lock:
+            self._advance()
+            self._pos_ms = float(position_ms)
+            self._touch()
+
+    def set_volume(self, volume):
+        with self._lock:
+            self.volume = max(0, min(100, int(volume)))
+
+
+def _track_json(track, image_base=IMAGE_BASE):
+    """Arma un "item" con la misma forma (y el mismo peso) que el real."""
+    tid = track["id"]
+    return {
+        "id": tid,
+        "name": track["name"],
+        "type": "track",
+        "uri": f"spotify:track:{tid}",
+        "duration_ms": track["duration_ms"],
+        "explicit": False,
+        "popularity": 50,
+        "external_urls": {"spotify": f"https://open.spotify.com/track/{tid}"},
+        "artists": [
+            {"id": f"artist{i}", "name": name, "type": "artist",
+             "external_urls": {"spotify": f"https://open.spotify.com/artist/artist{i}"}}
+            for i, name in enumerate(track["artists"])
+        ],
+        "album": {
+            "id": f"album-{tid}", "name": track.get("album", "Álbum de prueba"),
+            "album_type": "album", "release_date": "2024-01-01",
+            "images": track.get("images") or [
+                {"url": f"{image_base}/{tid}-640", "width": 640, "height": 640},
+                {"url": f"{image_base}/{tid}-300", "width": 300, "height": 300},
+                {"url": f"{image_base}/{tid}-64", "width": 64, "height": 64},
+            ],
+            "available_markets": ["AR", "ES", "MX", "US"] * 20,
+        },
+        "available_markets": ["AR", "ES", "MX", "US"] * 20,
+    }
+
+
+class FakeSpotifyClient:
+    """Cliente en proceso con la interfaz de spotipy.Spotify que usa la barra.
+
+    Va directo contra un FakePlayer (sin HTTP) y cuenta cada llamada; sirve
+    para benchmarks donde solo interesa el costo de la barra.
+    """
+
+    def __init__(self, player=None, latency=0.0):
+        self.player = player or FakePlayer()
+        self.latency = latency
+        self.calls = Counter()
+
+    def _call(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    def current_playback(self, *args, **kwargs):
+        self._call("current_playback")
+        return self.player.playback(with_device=True)
+
+    def currently_playing(self, *args, **kwargs):
+        self._call("currently_playing")
+        return self.player.playback(with_device=False)
+
+    def start_playback(self, *args, **kwargs):
+        self._call("start_playback"); self.player.play()
+
+    def pause_playback(self, *args, **kwargs):
+        self._call("pause_playback"); self.player.pause()
+
+    def next_track(self, *args, **kwargs):
+        self._call("next_track"); self.player.next()
+
+    def previous_track(self, *args, **kwargs):
+        self._call("previous_track"); self.player.previous()
+
+    def seek_track(self, position_ms, *args, **kwargs):
+        self._call("seek_track"); self.player.seek(position_ms)
+
+    def volume(self, volume_percent, *args, **kwargs):
+        self._call("volume"); self.player.set_volume(volume_percent)
+
+
+class Faults:
+    """Latencia, jitter y errores inyectados. Con seed fija es determinístico."""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, rate_429=0.0, retry_after=1,
+                 rate_5xx=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.rate_5xx = rate_5xx
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        with self._lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+        return max(0.0, self.latency_ms + jitter) / 1000.0
+
+    def pick_error(self):
+        """None, o (status, headers) para responder con error."""
+        with self._lock:
+            r = self._rng.random()
+        if r < self.rate_429:
+            return 429, {"Retry-After": str(self.retry_after)}
+        if r < self.rate_429 + self.rate_5xx:
+            return 503, {}
+        return None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "FakeSpotify/1.0"
+    protocol_version = "HTTP/1.1"   # keep-alive, como la API real
+
+    def log_message(self, fmt, *args):
+        pass
+
+    # ----- Respuestas -----
+    def _send(self, status, body=None, headers=None):
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        if body is not None:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if payload:
+            self.wfile.write(payload)
+        self.server.stats["bytes_out"] += len(payload)
+
+    def _handle(self, method):
+        srv = self.server
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        srv.stats[f"{method} {url.path}"] += 1
+        srv.stats["requests"] += 1
+
+        time.sleep(srv.faults.delay())
+        error = srv.faults.pick_error() if url.path != "/api/token" else None
+        if error:
+            status, headers = error
+            srv.stats[f"status {status}"] += 1
+            self._send(status, {"error": {"status": status, "message": "fake error"}}, headers)
+            return
+
+        route = (method, url.path)
+        player = srv.player
+        if method == "GET" and url.path.startswith("/image/"):
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(COVER_PNG)))
+            self.end_headers()
+            self.wfile.write(COVER_PNG)
+            srv.stats["bytes_out"] += len(COVER_PNG)
+        elif route == ("POST", "/api/token"):
+            self._send(200, {
+                "access_token": "fake-access-token", "token_type": "Bearer",
+                "expires_in": srv.token_ttl, "scope": srv.scope,
+                "refresh_token": "fake-refresh-token",
+            })
+        elif route == ("GET", "/v1/me/player"):
+            pb = player.playback(with_device=True)
+            if pb:
+                self._send(200, pb)
+            else:
+                self._send(204)
+        elif route == ("GET", "/v1/me/player/currently-playing"):
+            pb = player.playback(with_device=False)
+            if pb:
+                self._send(200, pb)
+            else:
+                self._send(204)
+        elif route == ("PUT", "/v1/me/player/play"):
+            player.play(); self._send(204)
+        elif route == ("PUT", "/v1/me/player/pause"):
+            player.pause(); self._send(204)
+        elif route == ("POST", "/v1/me/player/next"):
+            player.next(); self._send(204)
+        elif route == ("POST", "/v1/me/player/previous"):
+            player.previous(); self._send(204)
+        elif route == ("PUT", "/v1/me/player/seek"):
+            player.seek(int(query.get("position_ms", ["0"])[0])); self._send(204)
+        elif route == ("PUT", "/v1/me/player/volume"):
+            player.set_volume(int(query.get("volume_percent", ["50"])[0])); self._send(204)
+        else:
+            self._send(404, {"error": {"status": 404, "message": "Service not found"}})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_PUT(self):
+        self._handle("PUT")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+class FakeSpotifyServer(ThreadingHTTPServer):
+    """Servidor HTTP en un hilo propio. Usar como context manager o start()/stop()."""
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, player=None, faults=None,
+                 token_ttl=3600, scope=""):
+        super().__init__((host, port), _Handler)
+        self.player = player or FakePlayer()
+        self.player.image_base = f"{self.base_url}/image"
+        self.faults = faults or Faults()
+        self.token_ttl = token_ttl
+        self.scope = scope
+        self.stats = Counter()
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-spotify", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def load_playlist(path):
+    """Lista de temas en JSON: [{"id", "name", "artists": [...], "duration_ms"}, ...]"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Web API de Spotify falsa, local")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8899)
+    ap.add_argument("--playlist", help="JSON con los temas a reproducir")
+    ap.add_argument("--paused", action="store_true", help="arrancar en pausa")
+    ap.add_argument("--latency-ms", type=float, default=0.0)
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--rate-429", type=float, default=0.0, help="probabilidad de 429 por request")
+    ap.add_argument("--retry-after", type=int, default=1)
+    ap.add_argument("--rate-5xx", type=float, default=0.0, help="probabilidad de 503 por request")
+    ap.add_argument("--token-ttl", type=int, default=3600)
+    ap.add_argument("--seed", type=int)
+    args = ap.parse_args(argv)
+
+    player = FakePlayer(load_playlist(args.playlist) if args.playlist else None, playing=not args.paused)
+    faults = Faults(args.latency_ms, args.jitter_ms, args.rate_429, args.retry_after, args.rate_5xx, args.seed)
+    srv = FakeSpotifyServer(args.host, args.port, player, faults, args.token_ttl)
+    print(f"Fake Spotify en {srv.base_url}  (NOWPLAYING_API_BASE={srv.base_url})")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
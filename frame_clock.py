@@ -0,0 +1,117 @@
+# frame_clock.py
+# Un solo timer para todas las animaciones de la barra (marquesina, progreso)
+
+import time
+
+from PySide6 import QtCore, QtGui
+
+from config import ANIMATION_MAX_WAKEUPS_PER_SEC, PRECISE_TIMER_MAX_MS
+
+
+class FrameClock(QtCore.QObject):
+    """Reloj de animación compartido.
+
+    Cada suscriptor pide un intervalo (ms) mientras está animando, o None
+    cuando no. El timer corre solo si hay alguno activo, al intervalo más
+    corto pedido, redondeado a frames de la pantalla y limitado por
+    max_wakeups_per_sec. Los suscriptores reciben el tiempo real
+    transcurrido (ms) para avanzar sin depender de la frecuencia real.
+    """
+
+    def __init__(self, parent=None, max_wakeups_per_sec=ANIMATION_MAX_WAKEUPS_PER_SEC):
+        super().__init__(parent)
+        self._max_wakeups = max_wakeups_per_sec
+        self._subs = {}          # callback -> [intervalo_ms, último_ns]
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self._on_tick)
+        self.wakeups = 0
+        self._count_since = time.monotonic()
+
+    # ----- Suscripción -----
+    def subscribe(self, callback, interval_ms=None):
+        """callback(dt_ms). interval_ms=None: suscripto pero en reposo."""
+        self._subs[callback] = [interval_ms, time.monotonic_ns()]
+        self._reschedule()
+
+    def unsubscribe(self, callback):
+        self._subs.pop(callback, None)
+        self._reschedule()
+
+    def set_active(self, callback, interval_ms):
+        """Cambia el intervalo pedido (None = no animar)."""
+        sub = self._subs.get(callback)
+        if sub is None or sub[0] == interval_ms:
+            return
+        if sub[0] is None:
+            sub[1] = time.monotonic_ns()  # que el primer dt no incluya el reposo
+        sub[0] = interval_ms
+        self._reschedule()
+
+    def is_active(self, callback) -> bool:
+        sub = self._subs.get(callback)
+        return sub is not None and sub[0] is not None and self._timer.isActive()
+
+    # ----- Presupuesto / medición -----
+    def set_max_wakeups_per_sec(self, n):
+        self._max_wakeups = max(1, n)
+        self._reschedule()
+
+    def interval_ms(self):
+        """Intervalo actual del timer (None si está parado)."""
+        return self._timer.interval() if self._timer.isActive() else None
+
+    def wakeups_per_second(self) -> float:
+        elapsed = time.monotonic() - self._count_since
+        return self.wakeups / elapsed if elapsed > 0 else 0.0
+
+    def reset_stats(self):
+        self.wakeups = 0
+        self._count_since = time.monotonic()
+
+    # ----- Interno -----
+    def _frame_ms(self):
+        app = QtGui.QGuiApplication.instance()
+        screen = app.primaryScreen() if app else None
+        hz = screen.refreshRate() if screen else 60.0
+        return 1000.0 / (hz if hz and hz > 0 else 60.0)
+
+    def _reschedule(self):
+        wanted = [s[0] for s in self._subs.values() if s[0] is not None]
+        if not wanted:
+            self._timer.stop()
+            return
+        frame = self._frame_ms()
+        interval = max(min(wanted), 1000.0 / self._max_wakeups)
+        interval = max(1, round(interval / frame)) * frame
+        interval = int(round(interval))
+        timer_type = QtCore.Qt.PreciseTimer if interval <= PRECISE_TIMER_MAX_MS else QtCore.Qt.CoarseTimer
+        if self._timer.isActive() and self._timer.interval() == interval and self._timer.timerType() == timer_type:
+            return
+        self._timer.setTimerType(timer_type)
+        self._timer.start(interval)
+
+    def _on_tick(self):
+        self.wakeups += 1
+        now = time.monotonic_ns()
+        tick_ns = self._timer.interval() * 1_000_000
+        for callback, sub in list(self._subs.items()):
+            interval, last = sub
+            if interval is None:
+                continue
+            dt_ns = now - last
+            # Los que piden menos frecuencia se saltean ticks (con medio tick de tolerancia)
+            if dt_ns + tick_ns // 2 < interval * 1_000_000:
+                continue
+            sub[1] = now
+            callback(dt_ns / 1_000_000)
+
+
+_shared = None
+
+
+def shared_clock() -> FrameClock:
+    """Reloj compartido por defecto (uno por proceso)."""
+    global _shared
+    if _shared is None:
+        _shared = FrameClock(QtCore.QCoreApplication.instance())
+    return _shared
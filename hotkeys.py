@@ -24,10 +24,13 @@ VK_LEFT      = 0x25
 VK_RIGHT     = 0x27
 # (Si querés otros, agregá VK_* que necesites)
 
-# Win32 APIs
-user32 = ctypes.windll.user32
-RegisterHotKey   = user32.RegisterHotKey
-UnregisterHotKey = user32.UnregisterHotKey
+# Win32 APIs (fuera de Windows no hay atajos globales y register_hotkeys no hace nada)
+try:
+    user32 = ctypes.windll.user32
+    RegisterHotKey   = user32.RegisterHotKey
+    UnregisterHotKey = user32.UnregisterHotKey
+except AttributeError:
+    user32 = None
 
 # MSG struct (para leer el mensaje nativo)
 class MSG(ctypes.Structure):
@@ -130,6 +133,8 @@ class _GlobalHotkeys:
 
 def register_hotkeys(widget, handler):
     """Mantiene la misma interfaz que usabas: devuelve un objeto para cleanup."""
+    if user32 is None:
+        return None
     gh = _GlobalHotkeys(handler)
     gh.start()
     widget._global_hotkeys = gh
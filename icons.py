@@ -1,60 +1,50 @@
-# icons.py
 # Iconitos dibujados con QPainter (minis de 16 px)
+#
+# Cada glifo se dibuja una sola vez por (tamaño, devicePixelRatio, color): se
+# empaquetan todos en una tira ("atlas") y se reparten QIcons cacheados.
+# icon_play(), icon_pause(), etc. devuelven siempre el mismo QIcon, con un
+# pixmap por cada DPR de las pantallas conectadas: Qt elige el de la pantalla
+# donde está la barra, sin reescalar.
 
 from PySide6 import QtGui, QtCore
 
-def _mk_icon(paint_fn, w=16, h=16):
-    pm = QtGui.QPixmap(w, h)
-    pm.fill(QtCore.Qt.transparent)
-    p = QtGui.QPainter(pm)
-    p.setRenderHint(QtGui.QPainter.Antialiasing, True)
-    paint_fn(p, w, h)
-    p.end()
-    return QtGui.QIcon(pm)
 
-def icon_play():
-    def paint(p, w, h):
-        p.setBrush(QtGui.QColor("white")); p.setPen(QtCore.Qt.NoPen)
-        pts = [QtCore.QPointF(w*0.30, h*0.20),
-               QtCore.QPointF(w*0.30, h*0.80),
-               QtCore.QPointF(w*0.78, h*0.50)]
-        p.drawPolygon(QtGui.QPolygonF(pts))
-    return _mk_icon(paint)
+# ----- Dibujo de cada glifo: paint(p, w, h, color) -----
+def _paint_play(p, w, h, color):
+    p.setBrush(color); p.setPen(QtCore.Qt.NoPen)
+    pts = [QtCore.QPointF(w*0.30, h*0.20),
+           QtCore.QPointF(w*0.30, h*0.80),
+           QtCore.QPointF(w*0.78, h*0.50)]
+    p.drawPolygon(QtGui.QPolygonF(pts))
 
-def icon_pause():
-    def paint(p, w, h):
-        p.setBrush(QtGui.QColor("white")); p.setPen(QtCore.Qt.NoPen)
-        bw = w*0.22; gap = w*0.12
-        p.drawRoundedRect(w*0.24, h*0.20, bw, h*0.60, 2, 2)
-        p.drawRoundedRect(w*0.24+bw+gap, h*0.20, bw, h*0.60, 2, 2)
-    return _mk_icon(paint)
+def _paint_pause(p, w, h, color):
+    p.setBrush(color); p.setPen(QtCore.Qt.NoPen)
+    bw = w*0.22; gap = w*0.12
+    p.drawRoundedRect(QtCore.QRectF(w*0.24, h*0.20, bw, h*0.60), 2, 2)
+    p.drawRoundedRect(QtCore.QRectF(w*0.24+bw+gap, h*0.20, bw, h*0.60), 2, 2)
 
-def icon_next():
-    def paint(p, w, h):
-        p.setBrush(QtGui.QColor("white")); p.setPen(QtCore.Qt.NoPen)
-        tri = [QtCore.QPointF(w*0.18, h*0.20),
-               QtCore.QPointF(w*0.18, h*0.80),
-               QtCore.QPointF(w*0.58, h*0.50)]
-        p.drawPolygon(QtGui.QPolygonF(tri))
-        p.drawRect(w*0.66, h*0.20, w*0.12, h*0.60)
-    return _mk_icon(paint)
+def _paint_next(p, w, h, color):
+    p.setBrush(color); p.setPen(QtCore.Qt.NoPen)
+    tri = [QtCore.QPointF(w*0.18, h*0.20),
+           QtCore.QPointF(w*0.18, h*0.80),
+           QtCore.QPointF(w*0.58, h*0.50)]
+    p.drawPolygon(QtGui.QPolygonF(tri))
+    p.drawRect(QtCore.QRectF(w*0.66, h*0.20, w*0.12, h*0.60))
 
-def icon_prev():
-    def paint(p, w, h):
-        p.setBrush(QtGui.QColor("white")); p.setPen(QtCore.Qt.NoPen)
-        tri = [QtCore.QPointF(w*0.82, h*0.20),
-               QtCore.QPointF(w*0.82, h*0.80),
-               QtCore.QPointF(w*0.42, h*0.50)]
-        p.drawPolygon(QtGui.QPolygonF(tri))
-        p.drawRect(w*0.22, h*0.20, w*0.12, h*0.60)
-    return _mk_icon(paint)
+def _paint_prev(p, w, h, color):
+    p.setBrush(color); p.setPen(QtCore.Qt.NoPen)
+    tri = [QtCore.QPointF(w*0.82, h*0.20),
+           QtCore.QPointF(w*0.82, h*0.80),
+           QtCore.QPointF(w*0.42, h*0.50)]
+    p.drawPolygon(QtGui.QPolygonF(tri))
+    p.drawRect(QtCore.QRectF(w*0.22, h*0.20, w*0.12, h*0.60))
 
-def icon_volume(level=100):
+def _paint_volume(level):
     """level: 0..100 → cambia levemente según volumen"""
-    def paint(p, w, h):
-        p.setBrush(QtGui.QColor("white")); p.setPen(QtCore.Qt.NoPen)
+    def paint(p, w, h, color):
+        p.setBrush(color); p.setPen(QtCore.Qt.NoPen)
         # parlante
-        p.drawRect(w*0.10, h*0.35, w*0.18, h*0.30)
+        p.drawRect(QtCore.QRectF(w*0.10, h*0.35, w*0.18, h*0.30))
         pts = [QtCore.QPointF(w*0.28, h*0.30),
                QtCore.QPointF(w*0.45, h*0.30),
                QtCore.QPointF(w*0.60, h*0.18),
@@ -63,47 +53,167 @@ def icon_volume(level=100):
                QtCore.QPointF(w*0.28, h*0.70)]
         p.drawPolygon(QtGui.QPolygonF(pts))
         # ondas
-        pen = QtGui.QPen(QtGui.QColor("white")); pen.setWidthF(1.4); p.setPen(pen); p.setBrush(QtCore.Qt.NoBrush)
+        pen = QtGui.QPen(color); pen.setWidthF(1.4); p.setPen(pen); p.setBrush(QtCore.Qt.NoBrush)
         if level > 0:
-            p.drawArc(int(w*0.62), int(h*0.28), int(w*0.24), int(h*0.44), 60*16, -120*16)
+            p.drawArc(QtCore.QRectF(w*0.62, h*0.28, w*0.24, h*0.44), 60*16, -120*16)
         if level > 40:
-            p.drawArc(int(w*0.70), int(h*0.20), int(w*0.32), int(h*0.60), 60*16, -120*16)
-    return _mk_icon(paint)
+            p.drawArc(QtCore.QRectF(w*0.70, h*0.20, w*0.32, h*0.60), 60*16, -120*16)
+    return paint
 
-def icon_mute():
-    def paint(p, w, h):
-        ic = icon_volume(0).pixmap(16,16)
-        pm = QtGui.QPixmap(ic)
-        painter = QtGui.QPainter(pm); painter.setRenderHint(QtGui.QPainter.Antialiasing, True)
-        pen = QtGui.QPen(QtGui.QColor("red")); pen.setWidthF(2.0); painter.setPen(pen)
-        painter.drawLine(w*0.60, h*0.28, w*0.88, h*0.72)
-        painter.drawLine(w*0.88, h*0.28, w*0.60, h*0.72)
-        painter.end()
-        return QtGui.QIcon(pm)
-    return icon_mute()
+def _paint_mute(p, w, h, color):
+    _paint_volume(0)(p, w, h, color)
+    pen = QtGui.QPen(QtGui.QColor("red")); pen.setWidthF(2.0); p.setPen(pen)
+    p.drawLine(QtCore.QPointF(w*0.60, h*0.28), QtCore.QPointF(w*0.88, h*0.72))
+    p.drawLine(QtCore.QPointF(w*0.88, h*0.28), QtCore.QPointF(w*0.60, h*0.72))
 
-def icon_share():
+def _paint_share(p, w, h, color):
     """Icono minimalista: flecha hacia arriba (outline)."""
-    def paint(p, w, h):
+    pen = QtGui.QPen(color)
+    pen.setWidthF(2.4 * w / 16)
+    pen.setJoinStyle(QtCore.Qt.RoundJoin)
+    pen.setCapStyle(QtCore.Qt.RoundCap)
+    p.setPen(pen)
+    p.setBrush(QtCore.Qt.NoBrush)
+
+    # ---- Triángulo superior (punta) ----
+    tip = QtCore.QPointF(w * 0.50, h * 0.15)      # punta arriba
+    left = QtCore.QPointF(w * 0.32, h * 0.40)     # base izquierda
+    right = QtCore.QPointF(w * 0.68, h * 0.40)    # base derecha
+    p.drawPolygon(QtGui.QPolygonF([tip, left, right]))
+
+    # ---- Palo vertical de la flecha ----
+    p.drawLine(
+        QtCore.QPointF(w * 0.50, h * 0.40),
+        QtCore.QPointF(w * 0.50, h * 0.80)
+    )
+
+
+GLYPHS = {
+    "play":        _paint_play,
+    "pause":       _paint_pause,
+    "next":        _paint_next,
+    "prev":        _paint_prev,
+    "volume_off":  _paint_volume(0),
+    "volume_low":  _paint_volume(1),
+    "volume_high": _paint_volume(100),
+    "mute":        _paint_mute,
+    "share":       _paint_share,
+}
+
+
+def _screen_dprs():
+    """Los devicePixelRatio distintos de todas las pantallas (ordenados)."""
+    app = QtGui.QGuiApplication.instance()
+    screens = app.screens() if app else []
+    return tuple(sorted({s.devicePixelRatio() for s in screens})) or (1.0,)
+
+
+class IconRegistry:
+    """Cache de íconos: un atlas por (tamaño, dpr, color) y un QIcon por glifo.
+
+    renders cuenta cuántas veces se dibujó algo con QPainter; en régimen
+    estable tiene que quedar fijo (ver benchmarks.py icons).
+    """
+
+    def __init__(self, glyphs=GLYPHS):
+        self._glyphs = glyphs
+        self._order = {name: i for i, name in enumerate(glyphs)}
+        self._atlases = {}
+        self._icons = {}
+        self.renders = 0
+        self.hits = 0
+        self.misses = 0
+
+    def icon(self, name, size=16, dpr=None, color="white") -> QtGui.QIcon:
+        """dpr=None: un pixmap por cada DPR de las pantallas conectadas."""
+        dprs = _screen_dprs() if dpr is None else (dpr,)
+        key = (name, size, dprs, color)
+        ic = self._icons.get(key)
+        if ic is not None:
+            self.hits += 1
+            return ic
+        self.misses += 1
+        ic = QtGui.QIcon()
+        for d in dprs:
+            atlas = self._atlas(size, d, color)
+            px = int(round(size * d))
+            pm = atlas.copy(QtCore.QRect(self._order[name] * px, 0, px, px))
+            pm.setDevicePixelRatio(d)
+            ic.addPixmap(pm)
+        self._icons[key] = ic
+        return ic
+
+    def warm_up(self, size=16, dpr=None, color="white"):
+        """Dibuja el atlas y crea todos los QIcons de una (llamar al arrancar)."""
+        for name in self._glyphs:
+            self.icon(name, size, dpr, color)
+
+    def clear(self):
+        self._atlases.clear()
+        self._icons.clear()
+
+    def stats(self) -> dict:
+        return {
+            "renders": self.renders,
+            "atlases": len(self._atlases),
+            "icons": len(self._icons),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _atlas(self, size, dpr, color):
+        key = (size, dpr, color)
+        atlas = self._atlases.get(key)
+        if atlas is not None:
+            return atlas
+        px = int(round(size * dpr))
+        atlas = QtGui.QPixmap(px * len(self._glyphs), px)
+        atlas.fill(QtCore.Qt.transparent)
+        p = QtGui.QPainter(atlas)
         p.setRenderHint(QtGui.QPainter.Antialiasing, True)
+        qcolor = QtGui.QColor(color)
+        for name, paint in self._glyphs.items():
+            p.save()
+            p.translate(self._order[name] * px, 0)
+            p.scale(dpr, dpr)
+            # Sin clip, lo que se pasa del borde (p.ej. la onda exterior de
+            # volume_high) mancharía la celda de al lado
+            p.setClipRect(QtCore.QRectF(0, 0, size, size))
+            paint(p, size, size, qcolor)
+            p.restore()
+        p.end()
+        self.renders += 1
+        self._atlases[key] = atlas
+        return atlas
+
+
+registry = IconRegistry()
+
+
+def warm_up(size=16):
+    registry.warm_up(size)
 
-        pen = QtGui.QPen(QtGui.QColor("white"))
-        pen.setWidthF(2.4)
-        pen.setJoinStyle(QtCore.Qt.RoundJoin)
-        pen.setCapStyle(QtCore.Qt.RoundCap)
-        p.setPen(pen)
-        p.setBrush(QtCore.Qt.NoBrush)
-
-        # ---- Triángulo superior (punta) ----
-        tip = QtCore.QPointF(w * 0.50, h * 0.15)      # punta arriba
-        left = QtCore.QPointF(w * 0.32, h * 0.40)     # base izquierda
-        right = QtCore.QPointF(w * 0.68, h * 0.40)    # base derecha
-        p.drawPolygon(QtGui.QPolygonF([tip, left, right]))
-
-        # ---- Palo vertical de la flecha ----
-        p.drawLine(
-            QtCore.QPointF(w * 0.50, h * 0.40),
-            QtCore.QPointF(w * 0.50, h * 0.80)
-        )
-
-    return _mk_icon(paint)
+def icon_play():
+    return registry.icon("play")
+
+def icon_pause():
+    return registry.icon("pause")
+
+def icon_next():
+    return registry.icon("next")
+
+def icon_prev():
+    return registry.icon("prev")
+
+def icon_volume(level=100):
+    """level: 0..100 → cambia levemente según volumen"""
+    if level <= 0:
+        return registry.icon("volume_off")
+    return registry.icon("volume_low" if level <= 40 else "volume_high")
+
+def icon_mute():
+    return registry.icon("mute")
+
+def icon_share():
+    """Icono minimalista: flecha hacia arriba (outline)."""
+    return registry.icon("share")
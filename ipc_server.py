@@ -0,0 +1,261 @@
+# ipc_server.py
+# -------------------------------------
+# Estado de reproducción por un socket local, para que otras herramientas no
+# consulten a Spotify por su cuenta: todas comparten el poll del PlaybackEngine.
+#
+# Protocolo: una línea JSON por mensaje, en los dos sentidos.
+#   → {"op": "get"}                      ← {"type": "state", ...} (una vez)
+#   → {"op": "subscribe"}                ← el estado actual y después uno por cambio
+#   → {"op": "subscribe", "events": true}   además {"type": "event", ...}
+#   → {"op": "unsubscribe"}
+#   → {"op": "ping"}                     ← {"type": "pong"}
+# Mensaje de estado:
+#   {"type": "state", "seq": 12, "at_ms": <epoch ms>, "changed": ["text", "track"],
+#    "state": {"text": ..., "is_playing": ..., "progress_ms": ..., ...}}
+# progress_ms es la posición estimada en at_ms; si is_playing, sigue avanzando.
+#
+# Socket Unix en IPC_SOCKET_PATH; en Windows, TCP en 127.0.0.1:IPC_TCP_PORT.
+#   python ipc_server.py get        # imprime el estado actual
+#   python ipc_server.py watch      # sigue los cambios
+# -------------------------------------
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import sys
+import time
+
+from config import IPC_MAX_CLIENT_BUFFER, IPC_SOCKET_PATH, IPC_TCP_PORT
+from loop_thread import LoopThread
+from payload import encode
+from playback_state import mask_names
+
+log = logging.getLogger("nowplaying")
+
+USE_UNIX_SOCKET = hasattr(socket, "AF_UNIX") and sys.platform != "win32"
+
+
+class _Client:
+    __slots__ = ("writer", "subscribed", "events")
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.subscribed = False
+        self.events = False
+
+
+class IpcServer:
+    """Servidor asyncio en un hilo propio, alimentado por un PlaybackEngine.
+
+    Cada cambio se codifica una sola vez y se escribe a todos los
+    suscriptores sin esperar a ninguno: un cliente que deja de leer y
+    acumula más de max_buffer bytes se desconecta (no frena a los demás).
+    """
+
+    def __init__(self, engine, path=IPC_SOCKET_PATH, port=IPC_TCP_PORT,
+                 max_buffer=IPC_MAX_CLIENT_BUFFER, unix=USE_UNIX_SOCKET):
+        self.engine = engine
+        self.path = path
+        self.port = port
+        self._unix = unix
+        self._max_buffer = max_buffer
+        self._thread = LoopThread("ipc-server")
+        self._clients = set()
+        self._seq = 0
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.dropped_clients = 0
+
+    # ----- Ciclo de vida -----
+    @property
+    def address(self) -> str:
+        return self.path if self._unix else f"127.0.0.1:{self.port}"
+
+    def start(self):
+        """Abre el socket (en el hilo del servidor) y se suscribe al motor."""
+        self._thread.start(self._listen, on_close=self._on_close)
+        self.engine.subscribe_state(self.publish)
+        self.engine.events.subscribe(self.publish_event)
+        return self
+
+    def stop(self):
+        self.engine.unsubscribe_state(self.publish)
+        self.engine.events.unsubscribe(self.publish_event)
+        self._thread.stop()
+
+    def _on_close(self):
+        for client in list(self._clients):
+            client.writer.close()
+        if self._unix:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+    async def _listen(self):
+        if not self._unix:
+            server = await asyncio.start_server(self._handle, "127.0.0.1", self.port)
+            self.port = server.sockets[0].getsockname()[1]
+            return server
+        if os.path.exists(self.path):
+            if _is_listening(self.path):
+                raise OSError(f"ya hay otro NowPlayingBar en {self.path}")
+            os.unlink(self.path)        # socket viejo de una sesión que no cerró bien
+        server = await asyncio.start_unix_server(self._handle, self.path)
+        os.chmod(self.path, 0o600)
+        return server
+
+    # ----- Desde otros hilos (poller) -----
+    def publish(self, state, mask):
+        """Suscriptor de engine.subscribe_state()."""
+        self._thread.call_soon(self._broadcast_state, state, mask)
+
+    def publish_event(self, event):
+        """Suscriptor de engine.events."""
+        self._thread.call_soon(self._broadcast_event, event)
+
+    # ----- En el hilo del servidor -----
+    def _state_message(self, state, mask):
+        self._seq += 1
+        progress = self.engine.playback_clock.position_ms() if state.track_id else None
+        return encode({
+            "type": "state",
+            "seq": self._seq,
+            "at_ms": int(time.time() * 1000),
+            "changed": mask_names(mask),
+            "state": state.to_wire(progress),
+        }) + b"\n"
+
+    def _broadcast_state(self, state, mask):
+        subscribers = [c for c in self._clients if c.subscribed]
+        if not subscribers:
+            return
+        data = self._state_message(state, mask)
+        for client in subscribers:
+            self._send(client, data)
+
+    def _broadcast_event(self, event):
+        subscribers = [c for c in self._clients if c.events]
+        if not subscribers:
+            return
+        data = encode({"type": "event", "event": event.to_wire()}) + b"\n"
+        for client in subscribers:
+            self._send(client, data)
+
+    def _send(self, client, data):
+        writer = client.writer
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > self._max_buffer:
+            self.dropped_clients += 1
+            self._clients.discard(client)
+            writer.close()
+            return
+        writer.write(data)
+        self.messages_sent += 1
+        self.bytes_sent += len(data)
+
+    def _current(self):
+        state = self.engine.state()
+        if state is None:
+            return encode({"type": "state", "seq": self._seq, "state": None}) + b"\n"
+        return self._state_message(state, 0)
+
+    async def _handle(self, reader, writer):
+        client = _Client(writer)
+        self._clients.add(client)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    req = json.loads(line)
+                    op = req.get("op")
+                except (ValueError, AttributeError):
+                    self._send(client, encode({"type": "error", "error": "JSON inválido"}) + b"\n")
+                    continue
+                if op == "get":
+                    self._send(client, self._current())
+                elif op == "subscribe":
+                    client.subscribed = True
+                    client.events = bool(req.get("events"))
+                    self._send(client, self._current())
+                elif op == "unsubscribe":
+                    client.subscribed = client.events = False
+                elif op == "ping":
+                    self._send(client, b'{"type":"pong"}\n')
+                else:
+                    self._send(client, encode({"type": "error", "error": f"op desconocida: {op}"}) + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            self._clients.discard(client)
+            writer.close()
+
+    def stats(self) -> dict:
+        return {
+            "address": self.address,
+            "clients": len(self._clients),
+            "subscribers": sum(1 for c in self._clients if c.subscribed),
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "dropped_clients": self.dropped_clients,
+        }
+
+
+def _is_listening(path) -> bool:
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(path)
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+
+def start_server(engine):
+    """Arranca el servidor del proceso; si no se puede (otra instancia, permisos), avisa y sigue."""
+    try:
+        server = IpcServer(engine).start()
+    except OSError as e:
+        log.warning("servidor local deshabilitado: %s", e)
+        return None
+    log.info("servidor local en %s", server.address)
+    return server
+
+
+# ----- Cliente mínimo (también sirve de ejemplo para otras herramientas) -----
+def connect(path=IPC_SOCKET_PATH, port=IPC_TCP_PORT, timeout=None):
+    if USE_UNIX_SOCKET:
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        s.settimeout(timeout)
+        s.connect(path)
+    else:
+        s = socket.create_connection(("127.0.0.1", port), timeout)
+    return s
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Leer el estado de NowPlayingBar por el socket local")
+    ap.add_argument("cmd", choices=["get", "watch"])
+    ap.add_argument("--events", action="store_true", help="con watch: también los eventos")
+    args = ap.parse_args(argv)
+
+    with connect() as s, s.makefile("rwb") as f:
+        req = {"op": "get"} if args.cmd == "get" else {"op": "subscribe", "events": args.events}
+        f.write(encode(req) + b"\n")
+        f.flush()
+        for line in f:
+            print(line.decode("utf-8").rstrip(), flush=True)
+            if args.cmd == "get":
+                break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+# loop_thread.py
+# Un event loop de asyncio en un hilo propio, para los servidores locales
+# (ipc_server.py, ws_server.py): el poller y Qt nunca esperan a un cliente.
+
+import asyncio
+import threading
+
+
+class LoopThread:
+    """Hilo con su loop: start(listen) abre el servidor ahí y stop() lo cierra.
+
+    listen es una corrutina que corre en el loop y devuelve el servidor
+    (con close()/wait_closed()); si falla, start() relanza su error.
+    on_close() corre en el loop al cerrar, antes de esperar al servidor.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.loop = None
+        self.server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    def start(self, listen, on_close=None):
+        self._thread = threading.Thread(target=self._run, args=(listen, on_close),
+                                        name=self.name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+        return self.server
+
+    def call_soon(self, fn, *args):
+        """Desde cualquier hilo: fn(*args) en el loop (si sigue abierto)."""
+        loop = self.loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(fn, *args)
+
+    def stop(self):
+        loop = self.loop
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(2)
+
+    def _run(self, listen, on_close):
+        loop = asyncio.new_event_loop()
+        self.loop = loop
+        try:
+            self.server = loop.run_until_complete(listen())
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+            loop.close()
+            return
+        self._ready.set()
+        try:
+            loop.run_forever()
+        finally:
+            self.server.close()
+            if on_close is not None:
+                on_close()
+            loop.run_until_complete(self.server.wait_closed())
+            loop.close()
@@ -1,14 +1,28 @@
 # main.py
 # -------------------------------------
 # Punto de entrada del programa (con auto-inicio opcional en Windows)
+#
+#   python main.py                       # la barra
+#   python main.py --headless --text np.txt --json np.json --cover np.jpg
+#                                        # solo el poller (sin PySide6): sinks + socket local
+#   python main.py --ws                  # además, WebSocket en ws://127.0.0.1:47812
 # -------------------------------------
 
+from metrics import startup  # primero: marca el "cero" del arranque
+
+import argparse
+import json
+import logging
+import os
+import signal
 import sys
 import platform
-from PySide6 import QtWidgets
+import threading
 
-from spotify_client import get_spotify_client
-from overlay_ui import Overlay
+from config import (IPC_ENABLED, SINK_COVER_PATH, SINK_JSON_PATH, SINK_TEXT_PATH, TRACE_PATH,
+                    WS_ENABLED, WS_PORT)
+from connectivity import ONLINE
+from metrics import rss_bytes
 
 # Autostart opcional (solo Windows)
 try:
@@ -23,6 +37,7 @@ def _maybe_prompt_autostart(parent=None):
     """Pregunta 1 sola vez si querés agregar al inicio (solo Windows)."""
     if platform.system().lower() != "windows":
         return
+    from PySide6 import QtWidgets
     try:
         if not is_registered_in_startup():
             resp = QtWidgets.QMessageBox.question(
@@ -38,16 +53,113 @@ def _maybe_prompt_autostart(parent=None):
         # No rompemos el flujo por un fallo del registro
         QtWidgets.QMessageBox.warning(parent, "Inicio automático", f"No se pudo configurar el inicio:\n{e}")
 
-def main():
+def _spotify_client():
+    from spotify_client import get_spotify_client
+    sp = get_spotify_client()
+    if TRACE_PATH:
+        from playback_trace import TraceRecorder
+        sp = TraceRecorder(sp, TRACE_PATH)
+    return sp
+
+def _outputs(engine, args):
+    """Sinks de archivo, socket local y WebSocket, suscriptos al motor.
+    Devuelve (sinks, servidores que arrancaron)."""
+    from sinks import build_sinks
+    sinks = build_sinks(args.text, args.json, args.cover).attach(engine)
+    servers = []
+    if IPC_ENABLED and not args.no_ipc:
+        from ipc_server import start_server
+        servers.append(start_server(engine))
+    if args.ws:
+        from ws_server import start_ws_server
+        servers.append(start_ws_server(engine, args.ws_port))
+    return sinks, [s for s in servers if s is not None]
+
+def _startup_report(mode) -> str:
+    return json.dumps({
+        "mode": mode,
+        "startup_ms": startup.report(),
+        "rss_bytes": rss_bytes(),
+        "qt_loaded": "PySide6" in sys.modules,
+    })
+
+def run_gui(args):
+    from PySide6 import QtCore, QtWidgets
+    from overlay_ui import Overlay
+
     app = QtWidgets.QApplication(sys.argv)
+    startup.mark("qt_app")
 
     # Pregunta de auto-inicio (Windows)
     _maybe_prompt_autostart()
 
-    sp = get_spotify_client()
-    w = Overlay(sp)
+    w = Overlay(_spotify_client())
     w.show()
-    sys.exit(app.exec())
+    startup.mark("overlay_shown")
+
+    sinks, servers = _outputs(w.engine, args)
+    app.aboutToQuit.connect(sinks.stop)
+    for server in servers:
+        app.aboutToQuit.connect(server.stop)
+    if args.exit_after_first_data:
+        reported = []
+        def on_state(state, mask):
+            if not state.stale and state.status == ONLINE and not reported:
+                reported.append(True)
+                print(_startup_report("gui"), flush=True)
+                app.quit()
+        w.stateChanged.connect(on_state)
+        state = w.engine.state()
+        if state is not None:
+            QtCore.QTimer.singleShot(0, lambda: on_state(state, 0))
+    return app.exec()
+
+def run_headless(args):
+    """Solo el PlaybackEngine: ni PySide6 ni widgets. Termina con Ctrl+C / SIGTERM."""
+    from playback_engine import shared_engine
+
+    engine = shared_engine(_spotify_client())
+    startup.mark("engine_started")
+    sinks, servers = _outputs(engine, args)
+
+    done = threading.Event()
+    if args.exit_after_first_data:
+        def on_state(state, mask):
+            if not state.stale and state.status == ONLINE and not done.is_set():
+                print(_startup_report("headless"), flush=True)
+                done.set()
+        engine.subscribe_state(on_state)
+        state = engine.state()
+        if state is not None:
+            on_state(state, 0)
+    signal.signal(signal.SIGINT, lambda *_: done.set())
+    signal.signal(signal.SIGTERM, lambda *_: done.set())
+    while not done.wait(1.0):       # con timeout: en Windows Ctrl+C no corta un wait() sin él
+        pass
+
+    engine.save_state()
+    engine.stop()
+    sinks.stop()
+    for server in servers:
+        server.stop()
+    return 0
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="NowPlayingBar")
+    ap.add_argument("--headless", action="store_true", help="sin ventana: solo el poller, sinks y socket local")
+    ap.add_argument("--text", default=SINK_TEXT_PATH, help='archivo con "título — artistas"')
+    ap.add_argument("--json", default=SINK_JSON_PATH, help="archivo con el estado en JSON")
+    ap.add_argument("--cover", default=SINK_COVER_PATH, help="archivo con la portada del tema actual")
+    ap.add_argument("--no-ipc", action="store_true", help="no abrir el socket local")
+    ap.add_argument("--ws", action="store_true", default=WS_ENABLED,
+                    help="servidor WebSocket para browser sources (requiere websockets)")
+    ap.add_argument("--ws-port", type=int, default=WS_PORT)
+    ap.add_argument("--exit-after-first-data", action="store_true",
+                    help="al llegar el primer dato real, imprimir tiempos de arranque y memoria, y salir")
+    args = ap.parse_args(argv)
+
+    logging.basicConfig(level=os.environ.get("NOWPLAYING_LOG", "WARNING").upper())
+    sys.exit(run_headless(args) if args.headless else run_gui(args))
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,58 @@
+# metrics.py
+# Marcas de tiempo de arranque (time-to-first-paint / time-to-first-live-data)
+
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger("nowplaying")
+
+
+class StartupTimer:
+    """Guarda cuánto tardó cada hito desde el arranque del proceso.
+
+    El "cero" es el momento en que se importa este módulo (main.py lo
+    importa primero). Cada hito se marca una sola vez.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self._clock = clock
+        self._t0 = clock()
+        self._marks = {}
+        self._lock = threading.Lock()
+
+    def mark(self, name) -> bool:
+        """Marca el hito si todavía no estaba; devuelve True la primera vez."""
+        with self._lock:
+            if name in self._marks:
+                return False
+            ms = (self._clock() - self._t0) * 1000
+            self._marks[name] = ms
+        log.info("startup: %s a los %.1f ms", name, ms)
+        return True
+
+    def get(self, name):
+        """Milisegundos desde el arranque hasta el hito (None si no ocurrió)."""
+        with self._lock:
+            return self._marks.get(name)
+
+    def report(self) -> dict:
+        with self._lock:
+            return dict(self._marks)
+
+
+startup = StartupTimer()
+
+
+def rss_bytes():
+    """RSS actual (Linux: /proc; si no, el máximo de getrusage)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return 0
@@ -1,7 +1,7 @@
 # nowPlayingOverlay.py
 # Overlay minimalista "Now Playing" (hotkeys globales + auto-inicio opcional + menú contextual + doble-click)
 
-import sys, os, time, threading, webbrowser, ctypes
+import sys, os, webbrowser, ctypes
 from pathlib import Path
 from ctypes import wintypes
 
@@ -9,6 +9,8 @@ from PySide6 import QtCore, QtGui, QtWidgets
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
 
+from playback_engine import shared_engine
+
 # --- Configuración Spotify ---
 SCOPE = "user-read-currently-playing user-read-playback-state user-modify-playback-state"
 CACHE_PATH = str(Path.home() / ".cache-spotipy-nowplaying")
@@ -17,7 +19,6 @@ CLIENT_SEC = "12bc8bd5b998465fbdca85c3030cf961"
 REDIRECT   = "http://127.0.0.1:8888/callback"
 
 # --- UI / Layout ---
-POLL_SECONDS = 4
 MARQUEE_SPEED_MS = 35
 PADDING_X = 10
 PADDING_Y = 5
@@ -177,7 +178,8 @@ class Overlay(QtWidgets.QWidget):
 
     def __init__(self, sp: spotipy.Spotify):
         super().__init__()
-        self.sp = sp
+        self.engine = shared_engine(sp)   # el mismo poller que overlay_ui, uno por proceso
+        self.sp = self.engine.sp
         self.playing = False
         self._hotkeys_registered = False
 
@@ -256,14 +258,15 @@ class Overlay(QtWidgets.QWidget):
         self.newProg.connect(self.progress.setValue)
         self.newState.connect(self.set_playing)
 
-        self.worker = threading.Thread(target=self.loop_spotify, daemon=True)
-        self.worker.start()
+        self.engine.subscribe_state(self._on_state)
+        state = self.engine.state()
+        if state is not None:
+            self._on_state(state, 0)
         self.label.start()
 
         self.smooth = QtCore.QTimer(self)
         self.smooth.setInterval(200)
         self.smooth.timeout.connect(self._tick_progress_local)
-        self._progress_local = 0
         self.smooth.start()
 
         QtCore.QTimer.singleShot(0, self._register_hotkeys)
@@ -326,50 +329,24 @@ class Overlay(QtWidgets.QWidget):
 
     def _tick_progress_local(self):
         if self.playing:
-            self.progress.setValue(min(1000, self.progress.value() + 3))
+            self.progress.setValue(int(1000 * self.engine.playback_clock.fraction()))
 
-    # -------- Spotify ----------
+    # -------- Spotify (via PlaybackEngine) ----------
     def on_prev(self):
-        try: self.sp.previous_track()
-        except: pass
+        self.engine.skip(-1)
 
     def on_toggle(self):
-        try:
-            if self.playing: self.sp.pause_playback()
-            else: self.sp.start_playback()
-        except: pass
+        # El estado optimista que publica el motor ya actualiza el botón
+        self.engine.toggle(not self.playing)
 
     def on_next(self):
-        try: self.sp.next_track()
-        except: pass
+        self.engine.skip(+1)
 
-    def loop_spotify(self):
-        last_txt = None
-        while True:
-            try:
-                pb = self.sp.current_playback()
-                is_playing = False
-                txt = "Nada reproduciéndose"
-                pct = 0
-                if pb and pb.get("item"):
-                    name = pb["item"]["name"]
-                    artists = ", ".join(a["name"] for a in pb["item"]["artists"])
-                    txt = f"{name} — {artists}"
-                    is_playing = bool(pb.get("is_playing"))
-                    pos = int(pb.get("progress_ms") or 0)
-                    dur = int(pb["item"].get("duration_ms") or 1)
-                    pct = int(1000 * pos / max(1, dur))
-                if txt != last_txt:
-                    self.newText.emit(txt)
-                    last_txt = txt
-                self.newState.emit(is_playing)
-                self.newProg.emit(pct)
-                self._progress_local = pct
-            except Exception:
-                self.newText.emit("(sin conexión)")
-                self.newState.emit(False)
-                self.newProg.emit(0)
-            time.sleep(POLL_SECONDS)
+    def _on_state(self, state, mask):
+        # Hilo del poller: las señales lo pasan al hilo de Qt
+        self.newText.emit(state.text)
+        self.newState.emit(state.is_playing)
+        self.newProg.emit(int(1000 * self.engine.playback_clock.fraction()))
 
     # --- Hotkeys globales ---
     def _register_hotkeys(self):
@@ -389,6 +366,7 @@ class Overlay(QtWidgets.QWidget):
         hwnd = int(self.winId())
         for hk in (HK_TOGGLE, HK_PREV, HK_NEXT):
             user32.UnregisterHotKey(hwnd, hk)
+        self.engine.stop()
         e.accept()
 
 class _WinHotkeyFilter(QtCore.QAbstractNativeEventFilter):
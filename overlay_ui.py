@@ -1,29 +1,33 @@
 # overlay_ui.py
 # Barra con controles (prev/play/next), sin volumen, atajos GLOBALS.
 
-import time, threading, webbrowser
+import logging, threading, webbrowser
 from PySide6 import QtCore, QtGui, QtWidgets
 from PySide6.QtCore import Qt
 
 from config import (
-    FAST_POLL_SECONDS,
-    IDLE_POLL_SECONDS,
     PADDING_X,
     PADDING_Y,
-    PAUSED_POLL_SECONDS,
     WIDTH,
     HEIGHT,
     STYLE_BG,
     STYLE_LABEL,
+    STYLE_LABEL_STALE,
     STYLE_PROGRESS,
+    STYLE_PROGRESS_OFFLINE,
+    STYLE_PROGRESS_RATE_LIMITED,
     MARQUEE_SPEED_MS,
+    PROGRESS_MIN_FRAME_MS,
+    PROGRESS_MAX_FRAME_MS,
     MARGIN_RIGHT,
     TASKBAR_GAP_PX,
     REMEMBER_POS,
     LOCK_POSITION_DEFAULT,
     DRAG_SNAP_PX,
+    SNAPSHOT_MAX_AGE_SECONDS,
+    COVER_THUMB_PX,
 )
-from icons import icon_play, icon_pause, icon_next, icon_prev, icon_share
+from icons import icon_play, icon_pause, icon_next, icon_prev, icon_share, warm_up as warm_up_icons
 from hotkeys import (
     HK_VOL_DOWN,
     HK_VOL_UP,
@@ -33,49 +37,167 @@ from hotkeys import (
     HK_PREV,
     HK_NEXT,
 )
-from settings_store import load_settings, save_settings
+from settings_store import STATE_FILE, load_settings, save_settings
+from metrics import startup
+from playback_state import (
+    CHG_ALL,
+    CHG_PLAYING,
+    CHG_PROGRESS,
+    CHG_STALE,
+    CHG_STATUS,
+    CHG_TEXT,
+    CHG_TRACK,
+    pick_image,
+)
+from playback_engine import PlaybackEngine, shared_engine
+from cover_loader import shared_loader
+from frame_clock import shared_clock
+from connectivity import DEGRADED, OFFLINE, RATE_LIMITED
+from rate_limit import PRIORITY_COMMAND
+
+log = logging.getLogger("nowplaying")
+
+COMMAND_NAMES = {
+    "toggle": "reproducir/pausar",
+    "next": "pasar al siguiente",
+    "prev": "volver al anterior",
+    "volume": "cambiar el volumen",
+}
+
+STATUS_TOOLTIPS = {
+    DEGRADED: "Sin respuesta de Spotify; reintentando…",
+    OFFLINE: "Sin conexión",
+    RATE_LIMITED: "Spotify pidió esperar (límite de consultas)",
+}
 
 
 # ---------- Label con marquesina ----------
 class MarqueeLabel(QtWidgets.QLabel):
-    def __init__(self, *args, **kwargs):
+    """Texto desplazable.
+
+    El texto se mide y se prepara una sola vez por cambio (QStaticText); cada
+    frame solo lo dibuja corrido. Se anima con el FrameClock compartido y se
+    da de baja si el texto entra completo, si el label está oculto o si la
+    ventana no está expuesta.
+    """
+    GAP_PX = 40
+
+    def __init__(self, *args, frame_clock=None, **kwargs):
         super().__init__(*args, **kwargs)
-        self.offset = 0
-        self.timer = QtCore.QTimer(self)
-        self.timer.timeout.connect(self.tick)
+        self.offset = 0.0
+        self._running = False
+        self._animating = False
+        self._static = QtGui.QStaticText()
+        self._static.setTextFormat(QtCore.Qt.PlainText)
+        self._text_w = 0
+        self._text_h = 0
+        self._watched_window = None
+        self.frames = frame_clock or shared_clock()
+        self.frames.subscribe(self.tick)
         self.setStyleSheet(STYLE_LABEL)
         self.setAlignment(QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft)
+        self._relayout()
 
     def start(self):
-        self.timer.start(MARQUEE_SPEED_MS)
+        self._running = True
+        self._update_timer()
+
+    def stop(self):
+        self._running = False
+        self._update_timer()
 
     def reset_scroll(self):
-        self.offset = 0
+        self.offset = 0.0
         self.update()
 
-    def tick(self):
-        self.offset += 1
-        if self.offset > self.fontMetrics().horizontalAdvance(self.text()) + 40:
-            self.offset = 0
+    def setText(self, txt):
+        super().setText(txt)
+        self._relayout()
+
+    def needs_scroll(self) -> bool:
+        return self._text_w > self.width()
+
+    def is_scrolling(self) -> bool:
+        return self._animating
+
+    def tick(self, dt_ms=MARQUEE_SPEED_MS):
+        """Avanza 1 px cada MARQUEE_SPEED_MS, sin importar cada cuánto llegue el frame."""
+        if not self._exposed():
+            self._update_timer()
+            return
+        self.offset += dt_ms / MARQUEE_SPEED_MS
+        period = self._text_w + self.GAP_PX
+        if self.offset >= period:
+            self.offset %= period
         self.update()
 
     def paintEvent(self, e):
         p = QtGui.QPainter(self)
+        y = (self.height() - self._text_h) / 2
+        if not self.needs_scroll():
+            p.drawStaticText(QtCore.QPointF(0, y), self._static)
+            return
+        period = self._text_w + self.GAP_PX
+        x = -int(self.offset)
+        while x < self.width():
+            p.drawStaticText(QtCore.QPointF(x, y), self._static)
+            x += period
+
+    # ----- Layout / visibilidad -----
+    def _relayout(self):
+        """Mide y prepara el texto (solo cuando cambia el texto o la fuente)."""
         txt = self.text()
+        self._static.setText(txt)
+        self._static.prepare(QtGui.QTransform(), self.font())
         fm = self.fontMetrics()
-        text_w = fm.horizontalAdvance(txt)
-        h = self.height()
-        x = -self.offset
-        while x < self.width():
-            p.drawText(
-                x,
-                0,
-                max(text_w + 40, self.width()),
-                h,
-                QtCore.Qt.AlignVCenter | QtCore.Qt.AlignLeft,
-                txt,
-            )
-            x += text_w + 40
+        self._text_w = fm.horizontalAdvance(txt)
+        self._text_h = fm.height()
+        if self.offset >= self._text_w + self.GAP_PX:
+            self.offset = 0.0
+        self._update_timer()
+        self.update()
+
+    def _exposed(self) -> bool:
+        handle = self.window().windowHandle()
+        return self.isVisible() and (handle is None or handle.isExposed())
+
+    def _update_timer(self):
+        want = self._running and self.needs_scroll() and self._exposed()
+        if want != self._animating:
+            self._animating = want
+            self.frames.set_active(self.tick, MARQUEE_SPEED_MS if want else None)
+        if not self.needs_scroll():
+            self.offset = 0.0
+
+    def _watch_window(self):
+        # Los cambios de exposición (ventana tapada / minimizada) llegan al QWindow
+        handle = self.window().windowHandle()
+        if handle is not None and handle is not self._watched_window:
+            handle.installEventFilter(self)
+            self._watched_window = handle
+
+    def eventFilter(self, obj, e):
+        if obj is self._watched_window and e.type() == QtCore.QEvent.Expose:
+            self._update_timer()
+        return False
+
+    def changeEvent(self, e):
+        super().changeEvent(e)
+        if e.type() in (QtCore.QEvent.FontChange, QtCore.QEvent.StyleChange):
+            self._relayout()
+
+    def resizeEvent(self, e):
+        super().resizeEvent(e)
+        self._update_timer()
+
+    def showEvent(self, e):
+        super().showEvent(e)
+        self._watch_window()
+        self._update_timer()
+
+    def hideEvent(self, e):
+        super().hideEvent(e)
+        self._update_timer()
 
 
 # ---------- Grip de arrastre ----------
@@ -125,14 +247,37 @@ class DragGrip(QtWidgets.QFrame):
 
 # ---------- Ventana principal ----------
 class Overlay(QtWidgets.QWidget):
-    newText = QtCore.Signal(str)
-    newProg = QtCore.Signal(int)
-    newState = QtCore.Signal(bool)
-
-    def __init__(self, spotify):
+    # (PlaybackState, máscara CHG_*): se emite solo cuando algo cambió
+    stateChanged = QtCore.Signal(object, int)
+    linkReady = QtCore.Signal(object)
+    commandDone = QtCore.Signal(str, bool, object)
+    # PlaybackEvent (ver playback_events.py), ya en el hilo de Qt
+    playbackEvent = QtCore.Signal(object)
+    # (url, QImage o None) desde los workers de cover_loader
+    coverReady = QtCore.Signal(str, object)
+
+    def __init__(self, spotify, clock=None, start_worker=True, state_file=STATE_FILE, engine=None,
+                 covers=None):
+        """Frontend de un PlaybackEngine (ver playback_engine.py).
+
+        Sin engine usa el del proceso (shared_engine), creándolo con spotify,
+        clock y state_file si hace falta. start_worker=False crea uno propio
+        sin poller: quien llame corre self.engine.run() (p.ej. con reloj virtual).
+        Sin covers usa el CoverLoader del proceso (shared_loader).
+        """
         super().__init__()
-        self.sp = spotify
+        if engine is None:
+            if start_worker:
+                engine = shared_engine(spotify, clock=clock, state_file=state_file)
+            else:
+                engine = PlaybackEngine(spotify, clock=clock, state_file=state_file).start_commands()
+        self.engine = engine
+        self.sp = engine.sp
+        self.playback_clock = engine.playback_clock   # solo lectura: interpolar el progreso
+        self._painted = False
         self.playing = False
+        self.covers = covers if covers is not None else shared_loader()
+        self._cover_url = None
         self.pos_locked = LOCK_POSITION_DEFAULT
         self._drag_offset = QtCore.QPoint(0, 0)
 
@@ -153,7 +298,8 @@ class Overlay(QtWidgets.QWidget):
         self.grip.doDrag.connect(self._on_do_drag)
         self.grip.endDrag.connect(self._on_end_drag)
 
-        # Controles
+        # Controles (los íconos se dibujan una sola vez, acá)
+        warm_up_icons()
         self.btnPrev = QtWidgets.QToolButton()
         self.btnPlay = QtWidgets.QToolButton()
         self.btnNext = QtWidgets.QToolButton()
@@ -189,6 +335,11 @@ class Overlay(QtWidgets.QWidget):
         """
         )
 
+        # Portada (se carga en segundo plano; oculta si no hay)
+        self.cover = QtWidgets.QLabel()
+        self.cover.setFixedSize(COVER_THUMB_PX, COVER_THUMB_PX)
+        self.cover.hide()
+
         # Texto
         self.label = MarqueeLabel("Esperando reproducción…")
         self.label.setMinimumWidth(150)
@@ -212,6 +363,7 @@ class Overlay(QtWidgets.QWidget):
         top.addWidget(self.btnPlay)
         top.addWidget(self.btnNext)
         top.addSpacing(4)
+        top.addWidget(self.cover)
         top.addWidget(self.label, 1)   # el texto se expande
         top.addWidget(self.btnCopy)    # botón copiar, pegado a la derecha
 
@@ -229,24 +381,28 @@ class Overlay(QtWidgets.QWidget):
         self._restore_or_default_position()
 
         # Señales UI
-        self.newText.connect(self.set_text)
-        self.newProg.connect(self.progress.setValue)
-        self.newState.connect(self.set_playing)
+        self.stateChanged.connect(self.apply_state)
+        self.linkReady.connect(self._copy_url)
+        self.coverReady.connect(self._show_cover)
+        self.commandDone.connect(self._on_command_done)
 
-        # Worker Spotify
-        self.worker = threading.Thread(target=self.loop_spotify, daemon=True)
-        self.worker.start()
+        # El motor avisa desde sus hilos; las señales lo traen al hilo de Qt
+        self.engine.subscribe_state(self.stateChanged.emit)
+        self.engine.subscribe_commands(self.commandDone.emit)
+        self.engine.events.subscribe(self.playbackEvent.emit)
+        self._network_info = self._watch_network()
 
         self.label.start()
 
-        # Progreso suave
-        self.smooth = QtCore.QTimer(self)
-        self.smooth.timeout.connect(self._tick_progress_local)
-        self._progress_local = 0
-        self._progress_real = 0
-        self._last_update_time = 0
-        self._track_duration_ms = 1
-        self.smooth.start(60)  # 60ms para suavidad
+        # Progreso suave (interpolado por self.playback_clock), en el mismo
+        # FrameClock que la marquesina y solo mientras suena
+        self.frames = self.label.frames
+        self.frames.subscribe(self._tick_progress_local)
+
+        # Estado actual del motor (al arrancar, el último tema conocido, atenuado)
+        state = self.engine.state()
+        if state is not None:
+            self.apply_state(state, CHG_ALL)
 
         # Interacciones
         self.bg.mouseDoubleClickEvent = self.open_spotify
@@ -260,6 +416,10 @@ class Overlay(QtWidgets.QWidget):
         # Atajos GLOBALS
         self._hotkeys = register_hotkeys(self, self.handle_hotkey)
 
+        # "Salir" (y cualquier quit()) no pasa por closeEvent: guardar acá también
+        self._shut_down = False
+        QtWidgets.QApplication.instance().aboutToQuit.connect(self.shutdown)
+
     # ----- Posición / persistencia / magnetismo -----
     def position_bottom_right(self):
         screen = (
@@ -363,143 +523,140 @@ class Overlay(QtWidgets.QWidget):
     def set_playing(self, is_playing):
         self.playing = is_playing
         self.btnPlay.setIcon(icon_pause() if is_playing else icon_play())
+        self._update_progress_animation()
+
+    def _update_progress_animation(self):
+        """Pide frames solo mientras suena, y solo tan seguido como avance un píxel."""
+        if not (self.playing and self.isVisible()):
+            self.frames.set_active(self._tick_progress_local, None)
+            return
+        ms_per_px = self.playback_clock.duration_ms / max(1, self.progress.width())
+        interval = int(min(PROGRESS_MAX_FRAME_MS, max(PROGRESS_MIN_FRAME_MS, ms_per_px)))
+        self.frames.set_active(self._tick_progress_local, interval)
+
+    def apply_state(self, state, mask):
+        """Slot de stateChanged: toca solo los widgets que cambiaron."""
+        if mask & CHG_STALE:
+            self.label.setStyleSheet(STYLE_LABEL_STALE if state.stale else STYLE_LABEL)
+        if mask & CHG_TEXT:
+            self.set_text(state.text)
+        if mask & CHG_PLAYING:
+            self.set_playing(state.is_playing)
+        if mask & (CHG_PROGRESS | CHG_TRACK | CHG_PLAYING):
+            self.progress.setValue(int(1000 * self.playback_clock.fraction()))
+        if mask & CHG_TRACK:
+            self._update_progress_animation()
+            self.set_cover(state.images)
+        if mask & CHG_STATUS:
+            self.set_status(state.status)
+
+    def set_cover(self, images):
+        """Miniatura del tema: la imagen más chica que alcance para esta pantalla."""
+        dpr = self.devicePixelRatioF()
+        px = round(COVER_THUMB_PX * dpr)
+        url = pick_image(images, px)
+        self._cover_url = url
+        if not url:
+            self.cover.hide()
+            return
+        image = self.covers.load(url, px, self.coverReady.emit)
+        if image is not None:
+            self._show_cover(url, image)
+
+    def _show_cover(self, url, image):
+        if url != self._cover_url:
+            return          # llegó tarde: ya cambió el tema
+        if image is None:
+            self.cover.hide()
+            return
+        pixmap = QtGui.QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(self.devicePixelRatioF())
+        self.cover.setPixmap(pixmap)
+        self.cover.show()
+
+    def _on_command_done(self, name, ok, result):
+        """Slot de commandDone: si un comando falló, avisarlo (el motor ya
+        deshizo el cambio optimista y el poll que sigue confirma el estado)."""
+        if ok:
+            return
+        detail = str(result).strip().splitlines()[0][:120] if str(result).strip() else type(result).__name__
+        text = f"No se pudo {COMMAND_NAMES.get(name, name)}: {detail}"
+        log.warning(text)
+        QtWidgets.QToolTip.showText(self.mapToGlobal(QtCore.QPoint(0, self.height())), text, self)
+
+    def set_status(self, status):
+        """Online / degraded / offline / rate_limited: color de la barra y tooltip."""
+        if status == RATE_LIMITED:
+            self.progress.setStyleSheet(STYLE_PROGRESS_RATE_LIMITED)
+        elif status in (DEGRADED, OFFLINE):
+            self.progress.setStyleSheet(STYLE_PROGRESS_OFFLINE)
+        else:
+            self.progress.setStyleSheet(STYLE_PROGRESS)
+        self.label.setToolTip(STATUS_TOOLTIPS.get(status, ""))
+
+    def _watch_network(self):
+        """Avisos de red del sistema (Qt 6.1+): al cambiar, reintentar ya."""
+        try:
+            from PySide6 import QtNetwork
+            info_cls = QtNetwork.QNetworkInformation
+            if not info_cls.loadDefaultBackend():
+                return None
+            info = info_cls.instance()
+            info.reachabilityChanged.connect(self.engine.on_network_changed)
+            return info
+        except Exception:
+            return None
 
     # Copiar enlace de la canción actual
     def copy_link(self):
-        try:
-            pb = self.sp.current_playback()
-            item = pb.get("item") if pb else None
-            if not item:
-                raise RuntimeError("no item")
-            url = (item.get("external_urls") or {}).get("spotify")
-            if not url:
-                tid = item.get("id")
-                if tid:
-                    url = f"https://open.spotify.com/track/{tid}"
-            if not url:
-                raise RuntimeError("no url")
+        """Usa el snapshot del poller; si está viejo lo refresca fuera del hilo de la UI."""
+        snapshots = self.engine.snapshots
+        if not snapshots.is_stale(SNAPSHOT_MAX_AGE_SECONDS):
+            self._copy_url(snapshots.get().url)
+            return
+
+        def refetch():
+            try:
+                snap = self.engine.fresh_snapshot(SNAPSHOT_MAX_AGE_SECONDS, PRIORITY_COMMAND)
+                self.linkReady.emit(snap.url)
+            except Exception:
+                self.linkReady.emit(None)
+
+        threading.Thread(target=refetch, daemon=True).start()
+
+    def _copy_url(self, url):
+        if url:
             QtGui.QGuiApplication.clipboard().setText(url)
             QtWidgets.QToolTip.showText(
                 QtGui.QCursor.pos(), "Enlace copiado ✔", self.btnCopy, 1500
             )
-        except Exception:
+        else:
             QtWidgets.QToolTip.showText(
                 QtGui.QCursor.pos(), "No hay canción activa", self.btnCopy, 1500
             )
 
-    def _tick_progress_local(self):
-        """Progreso suave local que se sincroniza con el real."""
+    def _tick_progress_local(self, dt_ms=0):
+        """Progreso suave: lee la posición estimada por el PlaybackClock."""
         if not self.playing:
             return
+        value = int(1000 * self.playback_clock.fraction())
+        if value != self.progress.value():
+            self.progress.setValue(value)
 
-        current_time = time.time() * 1000  # en milisegundos
-
-        if self._last_update_time == 0:
-            self._last_update_time = current_time
-            return
+    def stop_polling(self):
+        """Detiene el motor (poller y comandos)."""
+        self.engine.stop()
 
-        time_diff = current_time - self._last_update_time
-        self._last_update_time = current_time
-
-        if self._track_duration_ms > 0:
-            ms_progress = time_diff
-            progress_increment = (ms_progress / self._track_duration_ms) * 1000
-
-            self._progress_local = min(1000, self._progress_local + progress_increment)
-
-            diff_with_real = abs(self._progress_local - self._progress_real)
-            if diff_with_real < 50:
-                self.progress.setValue(int(self._progress_local))
-
-    def loop_spotify(self):
-        last_txt = None
-        is_playing_prev = False
-
-        while True:
-            sleep_s = IDLE_POLL_SECONDS
-            try:
-                pb = self.sp.current_playback()
-                is_playing = False
-                txt = "Nada reproduciéndose"
-                pct = 0
-                duration_ms = 1
-
-                if pb:
-                    if pb.get("item"):
-                        name = pb["item"]["name"]
-                        artists = ", ".join(a["name"] for a in pb["item"]["artists"])
-                        txt = f"{name} — {artists}"
-                        pos = int(pb.get("progress_ms") or 0)
-                        duration_ms = int(pb["item"].get("duration_ms") or 1)
-                        pct = int(1000 * pos / max(1, duration_ms))
-
-                        self._track_duration_ms = duration_ms
-
-                    is_playing = bool(pb.get("is_playing"))
-
-                if txt != last_txt:
-                    self.newText.emit(txt)
-                    last_txt = txt
-
-                self.newState.emit(is_playing)
-
-                self._progress_real = pct
-
-                if abs(self._progress_local - pct) > 30 or not is_playing_prev:
-                    self._progress_local = pct
-                    self.progress.setValue(pct)
-
-                if is_playing != is_playing_prev:
-                    self._last_update_time = time.time() * 1000
-
-                if is_playing:
-                    sleep_s = FAST_POLL_SECONDS
-                else:
-                    sleep_s = PAUSED_POLL_SECONDS
-
-                is_playing_prev = is_playing
-
-            except Exception as e:
-                retry_after = None
-                try:
-                    if hasattr(e, "http_status") and e.http_status == 429:
-                        retry_after = float(
-                            getattr(e, "headers", {}).get("Retry-After", "")
-                        )
-                except Exception:
-                    pass
-
-                if retry_after:
-                    sleep_s = max(retry_after, IDLE_POLL_SECONDS)
-                else:
-                    self.newText.emit("(sin conexión)")
-                    self.newState.emit(False)
-                    self.newProg.emit(0)
-                    sleep_s = IDLE_POLL_SECONDS
-
-            time.sleep(sleep_s)
-
-    # ----- Controles Spotify -----
+    # ----- Controles Spotify (UI optimista; el motor confirma con el próximo poll) -----
     def on_prev(self):
-        try:
-            self.sp.previous_track()
-        except Exception:
-            pass
+        self.engine.skip(-1)       # la barra vuelve a 0 cuando el skip sale (ver _on_coalesced)
 
     def on_toggle(self):
-        try:
-            if self.playing:
-                self.sp.pause_playback()
-            else:
-                self.sp.start_playback()
-        except Exception:
-            pass
+        # El motor publica el estado optimista y apply_state cambia el ícono
+        self.engine.toggle(not self.playing)
 
     def on_next(self):
-        try:
-            self.sp.next_track()
-        except Exception:
-            pass
+        self.engine.skip(+1)       # la barra vuelve a 0 cuando el skip sale (ver _on_coalesced)
 
     # ----- Atajos globales -----
     def handle_hotkey(self, hotkey_id):
@@ -516,21 +673,42 @@ class Overlay(QtWidgets.QWidget):
             self.adjust_volume(-5)
 
     def adjust_volume(self, delta):
-        """Sube o baja el volumen actual en pasos de 5%."""
-        try:
-            pb = self.sp.current_playback()
-            if not pb or "device" not in pb:
-                return
-            vol = pb["device"].get("volume_percent", 50)
-            new_vol = max(0, min(100, vol + delta))
-            self.sp.volume(new_vol)
-        except Exception:
-            pass
+        """Sube o baja el volumen actual en pasos de 5%.
+
+        Parte del volumen del snapshot compartido (solo hace GET si está viejo)
+        y lo actualiza localmente, así mantener la hotkey no agrega GETs.
+        Corre en el ejecutor de comandos, nunca en el hilo de la UI, y las
+        repeticiones rápidas se suman en un solo PUT (ver CommandCoalescer).
+        """
+        self.engine.adjust_volume(delta)
 
     def open_spotify(self, event):
         webbrowser.open("https://open.spotify.com/")
 
-    def closeEvent(self, e):
+    def showEvent(self, e):
+        super().showEvent(e)
+        self._update_progress_animation()
+
+    def hideEvent(self, e):
+        super().hideEvent(e)
+        self._update_progress_animation()
+
+    def paintEvent(self, e):
+        if not self._painted:
+            self._painted = True
+            startup.mark("first_paint")
+        super().paintEvent(e)
+
+    def shutdown(self):
+        """Guarda posición y último tema, suelta los atajos y para el motor (una sola vez)."""
+        if self._shut_down:
+            return
+        self._shut_down = True
         self._save_position()
+        self.engine.save_state()
         unregister_hotkeys(self)
+        self.stop_polling()
+
+    def closeEvent(self, e):
+        self.shutdown()
         e.accept()
@@ -0,0 +1,16 @@
+# payload.py
+# JSON compacto para clientes externos (socket local, WebSocket, sinks de archivo)
+#
+# Sin dependencias de asyncio ni de los servidores: cualquier salida lo puede
+# importar. Usa orjson si está instalado.
+
+import json
+
+try:
+    import orjson
+
+    def encode(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def encode(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
@@ -0,0 +1,116 @@
+# playback_clock.py
+# Reloj de progreso monotónico anclado a las respuestas de Spotify
+
+import threading
+import time
+
+from config import CLOCK_SLEW_MS, CLOCK_SNAP_MS
+
+
+class PlaybackClock:
+    """Estima la posición del tema entre polls.
+
+    Cada respuesta ancla (posición, instante) usando time.monotonic_ns, así
+    los saltos del reloj del sistema no afectan. El instante se corrige por
+    latencia: se asume que Spotify midió progress_ms a mitad del round trip.
+
+    Si la estimación y el ancla nuevo difieren poco (< CLOCK_SNAP_MS), la
+    diferencia se reparte en CLOCK_SLEW_MS para que la barra no salte; si
+    difieren mucho (seek, tema nuevo, pausa), se salta directo.
+
+    `clock` se puede inyectar (debe devolver nanosegundos) para tests.
+    """
+
+    def __init__(self, clock=time.monotonic_ns, slew_ms=CLOCK_SLEW_MS, snap_ms=CLOCK_SNAP_MS):
+        self._clock = clock
+        self._slew_ns = int(slew_ms * 1_000_000)
+        self._snap_ms = snap_ms
+        self._lock = threading.Lock()
+        self._anchor_ns = clock()
+        self._anchor_pos = 0.0
+        self._duration_ms = 1
+        self._playing = False
+        self._track_id = None
+        self._corr_ms = 0.0         # corrección pendiente (se desvanece en slew)
+        self._corr_ns = 0           # cuándo arrancó la corrección
+
+    # ----- Anclas -----
+    def anchor(self, progress_ms, duration_ms, is_playing, track_id=None,
+               sent_ns=None, received_ns=None):
+        """Ancla a una respuesta; sent_ns/received_ns son monotonic_ns del request."""
+        now = self._clock()
+        if received_ns is None:
+            received_ns = now
+        if sent_ns is None:
+            sent_ns = received_ns
+        measured_ns = received_ns - (received_ns - sent_ns) // 2
+
+        with self._lock:
+            shown = self._position_locked(now)
+            self._anchor_ns = measured_ns
+            self._anchor_pos = float(progress_ms)
+            same_track = track_id == self._track_id
+            same_state = bool(is_playing) == self._playing
+            self._duration_ms = max(1, int(duration_ms))
+            self._playing = bool(is_playing)
+            self._track_id = track_id
+
+            error = self._raw_position_locked(now) - shown
+            if same_track and same_state and abs(error) < self._snap_ms:
+                # Arrancamos desde lo que ya se ve y convergemos suave
+                self._corr_ms = -error
+                self._corr_ns = now
+            else:
+                self._corr_ms = 0.0
+
+    def set_playing(self, is_playing):
+        """Congela/reanuda en la posición actual (UI optimista de play/pausa)."""
+        with self._lock:
+            now = self._clock()
+            self._anchor_pos = self._position_locked(now)
+            self._anchor_ns = now
+            self._corr_ms = 0.0
+            self._playing = bool(is_playing)
+
+    def reset(self):
+        """Vuelve a 0 sin cambiar play/pausa (UI optimista de skip)."""
+        with self._lock:
+            self._anchor_pos = 0.0
+            self._anchor_ns = self._clock()
+            self._corr_ms = 0.0
+            self._track_id = None
+
+    # ----- Lectura -----
+    @property
+    def playing(self) -> bool:
+        return self._playing
+
+    @property
+    def duration_ms(self) -> int:
+        return self._duration_ms
+
+    def position_ms(self, now=None) -> float:
+        with self._lock:
+            return self._position_locked(self._clock() if now is None else now)
+
+    def fraction(self, now=None) -> float:
+        """Progreso 0..1."""
+        with self._lock:
+            pos = self._position_locked(self._clock() if now is None else now)
+            return pos / self._duration_ms
+
+    def _raw_position_locked(self, now):
+        pos = self._anchor_pos
+        if self._playing:
+            pos += (now - self._anchor_ns) / 1_000_000
+        return pos
+
+    def _position_locked(self, now):
+        pos = self._raw_position_locked(now)
+        if self._corr_ms:
+            t = now - self._corr_ns
+            if t >= self._slew_ns:
+                self._corr_ms = 0.0
+            else:
+                pos += self._corr_ms * (1 - t / self._slew_ns)
+        return min(max(pos, 0.0), float(self._duration_ms))
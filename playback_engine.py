@@ -0,0 +1,420 @@
+# playback_engine.py
+# Motor de reproducción sin GUI: polling, estado, comandos y scheduling en un solo lugar
+#
+# La barra (overlay_ui.Overlay), la versión vieja (nowPlayingOverlay.py) y
+# cualquier otro frontend se suscriben a un PlaybackEngine; no consultan a
+# Spotify por su cuenta. Hay un solo poller por proceso (shared_engine).
+# No importa Qt: se puede probar y medir sin QApplication.
+
+import logging
+import threading
+from dataclasses import replace
+
+from config import (
+    COMMAND_SETTLE_SECONDS,
+    IDLE_POLL_SECONDS,
+    MIN_POLL_SECONDS,
+    POLL_DEVICE_INFO,
+    RESUME_GAP_SECONDS,
+    SNAPSHOT_MAX_AGE_SECONDS,
+    WAIT_SLICE_SECONDS,
+)
+from clocks import system_clock
+from commands import CommandCoalescer, CommandExecutor
+from connectivity import Connectivity, DEGRADED, OFFLINE, ONLINE, RATE_LIMITED, local_address
+from metrics import startup
+from playback_clock import PlaybackClock
+from playback_events import EventBus, EventDetector, Listeners, log_event
+from playback_state import (
+    CHG_PLAYING,
+    CHG_TEXT,
+    CHG_TRACK,
+    PlaybackState,
+    SnapshotStore,
+)
+from poll_scheduler import PollScheduler, RequestCounter
+from rate_limit import PRIORITY_COMMAND, PRIORITY_POLL, RateLimited, governor, retry_after_from
+from settings_store import STATE_FILE, load_last_state, save_last_state
+
+log = logging.getLogger("nowplaying")
+
+_UNSAMPLED = object()
+
+
+class PlaybackEngine:
+    """Dueño del poller de Spotify y de todo lo que se deriva de él.
+
+    - Estado: PlaybackState + máscara CHG_* a los suscriptores de
+      subscribe_state(), solo cuando algo cambió.
+    - Eventos: self.events (ver playback_events.py).
+    - Comandos: toggle/skip/adjust_volume, fuera del hilo que llama y con
+      la actualización optimista del estado y del reloj de progreso.
+    - Scheduling, rate limit y conexión: PollScheduler, el gobernador del
+      proceso y Connectivity.
+
+    Los callbacks corren en hilos del motor (poller / ejecutor de
+    comandos); un frontend de Qt les pasa el .emit de una señal.
+    """
+
+    def __init__(self, sp, clock=None, state_file=STATE_FILE, poll_device_info=POLL_DEVICE_INFO):
+        """clock: reloj inyectable (ver clocks.py); state_file=None no persiste nada."""
+        self.sp = sp
+        self.clock = clock or system_clock
+        self._state_file = state_file
+        self._poll_device_info = poll_device_info
+        self.snapshots = SnapshotStore(clock=self.clock.monotonic)
+        self.playback_clock = PlaybackClock(clock=self.clock.monotonic_ns)
+        self._state = None
+        self._state_lock = threading.Lock()
+
+        # _cmd_epoch cambia con cada comando encolado/terminado: un poll que
+        # arrancó antes no pisa el estado optimista.
+        self._cmd_epoch = 0
+        self._optimistic_playing = None     # lo que mostró el último toggle (para deshacerlo)
+        self._settle_at = 0.0
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.scheduler = PollScheduler(clock=self.clock.monotonic)
+        self.poll_requests = RequestCounter(clock=self.clock.monotonic)   # .per_hour() para verificar el volumen de polls
+        self.connectivity = Connectivity()
+        self.network_probe = local_address     # None: solo avisos de afuera (on_network_changed)
+        self._net_address = _UNSAMPLED
+
+        self.state_listeners = Listeners()      # (PlaybackState, máscara)
+        self.command_listeners = Listeners()    # (nombre, ok, resultado)
+        self.events = EventBus()
+        self._event_detector = EventDetector()
+        self.events.subscribe(log_event)
+
+        self.commands = CommandExecutor(on_result=self._on_command_done)
+        self.coalescer = CommandCoalescer(
+            self.commands, self.sp, self.snapshots, SNAPSHOT_MAX_AGE_SECONDS,
+            on_submit=self._on_coalesced,
+        )
+
+        # Arranque en caliente: el último tema conocido (stale) hasta el primer poll
+        self._load_warm_state()
+
+    # ----- Ciclo de vida -----
+    def start(self):
+        """Arranca el poller y el ejecutor de comandos (en hilos propios)."""
+        _claim(self)
+        self.commands.start()
+        self._thread = threading.Thread(target=self.run, name="spotify-poller", daemon=True)
+        self._thread.start()
+        return self
+
+    def start_commands(self):
+        """Solo el ejecutor de comandos; el poller lo corre quien llame a run()."""
+        _claim(self)
+        self.commands.start()
+        return self
+
+    def stop(self):
+        """Termina el poller después del poll en curso y suelta los comandos pendientes."""
+        self._stop.set()
+        self._wake.set()
+        self.coalescer.cancel()
+        self.commands.stop()
+        _release(self)
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def wake(self):
+        """Poll ya (p.ej. la red volvió)."""
+        self._wake.set()
+
+    def _network_changed(self) -> bool:
+        """Solo mientras hay problemas de conexión (si anda, no hace falta mirar)."""
+        if self.network_probe is None or self.connectivity.state == ONLINE:
+            self._net_address = _UNSAMPLED
+            return False
+        address = self.network_probe()
+        changed = self._net_address is not _UNSAMPLED and address != self._net_address
+        self._net_address = address
+        return changed
+
+    def on_network_changed(self, *_):
+        self.connectivity.reset_backoff()
+        self._wake.set()
+
+    # ----- Suscripción -----
+    def subscribe_state(self, callback):
+        """callback(state, mask). Devuelve callback (para unsubscribe_state)."""
+        return self.state_listeners.add(callback)
+
+    def unsubscribe_state(self, callback):
+        self.state_listeners.remove(callback)
+
+    def subscribe_commands(self, callback):
+        """callback(nombre, ok, resultado) al terminar cada comando."""
+        return self.command_listeners.add(callback)
+
+    def state(self):
+        """Último PlaybackState (None si todavía no hay nada)."""
+        with self._state_lock:
+            return self._state
+
+    # ----- Poller -----
+    def fetch_playback(self, priority=PRIORITY_POLL):
+        """GET del estado. Con PRIORITY_COMMAND (lo pidió el usuario) usa
+        GovernedSpotify.command: la reserva de los polls no lo deja afuera."""
+        name = "current_playback" if self._poll_device_info else "currently_playing"
+        command = getattr(self.sp, "command", None) if priority == PRIORITY_COMMAND else None
+        fetch = command(name) if command is not None else getattr(self.sp, name)
+        return fetch()
+
+    def fresh_snapshot(self, max_age=SNAPSHOT_MAX_AGE_SECONDS, priority=PRIORITY_POLL):
+        """El snapshot del poller si es reciente; si no, uno nuevo (bloquea)."""
+        return self.snapshots.get_fresh(lambda: self.fetch_playback(priority), max_age)
+
+    def run(self):
+        while not self._stop.is_set():
+            sleep_s = self.poll()
+            # Si el presupuesto compartido está bajo, espaciar los polls
+            sleep_s = max(sleep_s, governor.poll_delay_hint())
+            self._wait(sleep_s)
+
+    def poll(self):
+        """Un poll: estado, eventos y conexión. Devuelve los segundos hasta el próximo."""
+        try:
+            epoch = self._cmd_epoch
+            self.poll_requests.hit()
+            sent_ns = self.clock.monotonic_ns()
+            pb = self.fetch_playback()
+            received_ns = self.clock.monotonic_ns()
+            if epoch != self._cmd_epoch:
+                # Hubo un comando mientras tanto: esta respuesta ya es vieja
+                # y se esperará al poll que dispara _on_command_done.
+                return IDLE_POLL_SECONDS
+            snap = self.snapshots.publish_playback(pb)
+            predicted_ms = self.playback_clock.position_ms()
+            self.playback_clock.anchor(
+                snap.progress_ms if snap.has_item else 0,
+                snap.duration_ms,
+                snap.is_playing,
+                track_id=snap.track_id,
+                sent_ns=sent_ns,
+                received_ns=received_ns,
+            )
+            self.connectivity.on_success()
+            self._publish_state(PlaybackState.from_snapshot(snap), predicted_ms)
+            for event in self._event_detector.feed(snap, predicted_ms):
+                self.events.publish(event)
+            return self.scheduler.next_delay(snap)
+
+        except RateLimited as e:
+            # El gobernador no dejó salir el poll (reserva para comandos / Retry-After)
+            return max(e.retry_after, MIN_POLL_SECONDS)
+        except Exception as e:
+            retry_after = retry_after_from(e)
+            if retry_after is not None:
+                # 429: la red anda; se muestra lo último con la barra en ámbar
+                self.connectivity.on_rate_limited()
+                self._publish_state(self._last_state_as(RATE_LIMITED))
+                return max(retry_after, IDLE_POLL_SECONDS)
+            sleep_s = self.connectivity.on_failure()
+            if self.connectivity.state == OFFLINE:
+                self.playback_clock.set_playing(False)
+                self.playback_clock.reset()
+                self._event_detector.reset()
+                self._publish_state(PlaybackState.message("(sin conexión)", status=OFFLINE))
+            else:
+                # Un fallo aislado: se sigue mostrando lo último, atenuado
+                self._publish_state(self._last_state_as(DEGRADED))
+            return sleep_s
+
+    def _wait(self, seconds):
+        """Espera hasta el próximo poll, de a tramos de WAIT_SLICE_SECONDS.
+
+        Entre tramos: si el reloj de pared se adelantó al monotónico (que no
+        corre durante una suspensión) o, sin conexión, cambió la red, se
+        reinicia el backoff y se hace el poll ya.
+        """
+        deadline = self.clock.monotonic() + seconds
+        skew = self.clock.time() - self.clock.monotonic()
+        while not self._stop.is_set():
+            left = deadline - self.clock.monotonic()
+            if left <= 0 or self.clock.wait(self._wake, min(left, WAIT_SLICE_SECONDS)):
+                break
+            if self.clock.time() - self.clock.monotonic() - skew > RESUME_GAP_SECONDS:
+                log.info("vuelta de suspensión: reintentando ya")
+                self.connectivity.reset_backoff()
+                break
+            if self._network_changed():
+                log.info("cambió la red: reintentando ya")
+                self.connectivity.reset_backoff()
+                break
+        self._wake.clear()
+        # Tras un comando, darle a Spotify un momento para reflejarlo
+        settle = self._settle_at - self.clock.monotonic()
+        if settle > 0:
+            self.clock.wait(self._stop, settle)
+
+    # ----- Estado -----
+    def _publish_state(self, state, predicted_ms=None):
+        """Compara con el último estado y avisa solo si hubo cambios."""
+        with self._state_lock:
+            mask = state.diff(self._state, predicted_ms)
+            self._state = state
+        # Los mensajes ("(sin conexión)", "Esperando reproducción…") no son
+        # datos de Spotify: ni cuentan como primer dato ni pisan el estado guardado
+        live = not state.stale and state.status == ONLINE
+        if live and startup.mark("first_live_data"):
+            log.info("startup: %s", startup.report())
+        if mask:
+            self.state_listeners(state, mask)
+            if mask & (CHG_TEXT | CHG_TRACK | CHG_PLAYING) and live and state.track_id and self._state_file:
+                save_last_state(state.to_dict(), self._state_file)
+
+    def _load_warm_state(self):
+        if not self._state_file:
+            return
+        state = PlaybackState.from_dict(load_last_state(self._state_file))
+        if state is None:
+            return
+        self.playback_clock.anchor(
+            state.progress_ms, state.duration_ms, False, track_id=state.track_id
+        )
+        with self._state_lock:
+            self._state = state
+
+    def _last_state_as(self, status):
+        """El último estado conocido con otro status (se sigue mostrando, atenuado)."""
+        with self._state_lock:
+            state = self._state
+        if state is None:
+            return PlaybackState.message("Esperando reproducción…", status=status)
+        return replace(state, status=status, stale=status != ONLINE)
+
+    def _patch_state(self, predicted_ms=None, **changes):
+        """Publica un cambio optimista sobre el último estado.
+
+        Pasa por _publish_state como cualquier otro: los suscriptores (IPC,
+        sinks, WebSocket) se enteran ya, y el poll que lo confirma no ve
+        diferencia.
+        """
+        state = self.state()
+        if state is not None:
+            self._publish_state(replace(state, **changes), predicted_ms)
+
+    def save_state(self):
+        """Guarda el tema actual con la posición estimada (al cerrar)."""
+        state = self.state()
+        if state is not None and not state.stale and state.track_id and self._state_file:
+            progress = int(self.playback_clock.position_ms())
+            save_last_state(replace(state, progress_ms=progress).to_dict(), self._state_file)
+
+    # ----- Comandos -----
+    def submit(self, name, fn, *args):
+        """Encola un comando sin bloquear a quien llama."""
+        if self.commands.submit(name, fn, *args):
+            self._cmd_epoch += 1
+            return True
+        return False
+
+    def _on_command_done(self, name, ok, result):
+        """En el hilo del ejecutor: pide un poll (tras COMMAND_SETTLE_SECONDS) para confirmar.
+
+        Si un play/pausa falló, deshace ya lo optimista (sin esperar al poll,
+        que sin red puede no llegar).
+        """
+        if name == "toggle" and not ok:
+            self._undo_toggle()
+        self._cmd_epoch += 1
+        self.scheduler.on_command()
+        self._settle_at = self.clock.monotonic() + COMMAND_SETTLE_SECONDS
+        self._wake.set()
+        self.command_listeners(name, ok, result)
+
+    def toggle(self, want):
+        """Play (want=True) o pausa, con el reloj y el estado ya actualizados."""
+        fn = self.sp.start_playback if want else self.sp.pause_playback
+        # Lo optimista va antes del submit: el comando puede fallar enseguida
+        self._optimistic_playing = want
+        self._set_playing(want)
+        if not self.submit("toggle", fn):
+            self._undo_toggle()
+            return False
+        return True
+
+    def _set_playing(self, playing):
+        position = int(self.playback_clock.position_ms())
+        self.playback_clock.set_playing(playing)
+        self._patch_state(position, is_playing=playing, progress_ms=position)
+
+    def _undo_toggle(self):
+        want, self._optimistic_playing = self._optimistic_playing, None
+        state = self.state()
+        if want is not None and state is not None and state.is_playing == want:
+            self._set_playing(not want)
+
+    def skip(self, n):
+        """n=+1 siguiente, n=-1 anterior (las ráfagas se juntan, ver CommandCoalescer)."""
+        self.coalescer.skip(n)
+
+    def adjust_volume(self, delta):
+        """Suma delta al volumen actual (ver commands.set_volume_relative)."""
+        self.coalescer.volume(delta)
+
+    def _on_coalesced(self, name):
+        """Salió un comando de una ráfaga: recién ahí el estado optimista."""
+        self._cmd_epoch += 1
+        if name in ("next", "prev"):
+            self.playback_clock.reset()
+            self._patch_state(progress_ms=0)
+
+    def stats(self) -> dict:
+        return {
+            "polls": self.poll_requests.total,
+            "polls_last_hour": self.poll_requests.per_hour(),
+            "connectivity": self.connectivity.state,
+            "events": dict(self.events.published),
+            "coalescer": self.coalescer.stats(),
+            "commands_dropped": self.commands.dropped,
+            "governor": governor.stats(),
+        }
+
+
+# ----- Un solo poller por proceso -----
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def _claim(engine):
+    global _engine
+    with _engine_lock:
+        if _engine is not None and _engine is not engine:
+            raise RuntimeError("ya hay un PlaybackEngine consultando a Spotify en este proceso")
+        _engine = engine
+
+
+def _release(engine):
+    global _engine
+    with _engine_lock:
+        if _engine is engine:
+            _engine = None
+
+
+def current_engine():
+    """El motor que está corriendo (o None)."""
+    return _engine
+
+
+def shared_engine(sp=None, **kwargs):
+    """El motor del proceso; lo crea y arranca con sp si todavía no hay uno.
+
+    Si ya hay uno, se reusa (sp debe ser None o el mismo cliente).
+    """
+    with _engine_lock:
+        engine = _engine
+    if engine is not None:
+        if sp is not None and sp is not engine.sp:
+            raise RuntimeError("ya hay un PlaybackEngine con otro cliente de Spotify")
+        return engine
+    if sp is None:
+        raise RuntimeError("no hay PlaybackEngine: hace falta un cliente de Spotify")
+    return PlaybackEngine(sp, **kwargs).start()
@@ -0,0 +1,182 @@
+# playback_events.py
+# Eventos de reproducción (tema nuevo, seek, pausa, skip, fin) derivados en un solo lugar
+
+import logging
+import threading
+from collections import Counter
+from dataclasses import dataclass
+
+from config import CLOCK_SNAP_MS, EVENT_END_TOLERANCE_MS
+
+log = logging.getLogger("nowplaying")
+
+TRACK_CHANGED = "track_changed"   # hay otro tema (o ninguno); va después de SKIPPED/ENDED
+SEEKED = "seeked"                 # la posición se alejó de la prevista
+PAUSED = "paused"
+RESUMED = "resumed"
+SKIPPED = "skipped"               # el tema anterior se cortó antes del final
+ENDED = "ended"                   # el tema anterior terminó solo (o se repitió)
+
+ALL_EVENTS = frozenset({TRACK_CHANGED, SEEKED, PAUSED, RESUMED, SKIPPED, ENDED})
+
+
+@dataclass(frozen=True, slots=True)
+class PlaybackEvent:
+    kind: str
+    track_id: str | None            # tema al que se refiere (el anterior en SKIPPED/ENDED)
+    position_ms: int                # posición informada por Spotify
+    expected_ms: int | None = None  # lo que se esperaba (SEEKED, SKIPPED, ENDED)
+    prev_track_id: str | None = None
+    at: float = 0.0                 # fetched_at del snapshot que lo produjo
+    snapshot: object = None         # PlaybackSnapshot que lo produjo
+
+    def to_wire(self) -> dict:
+        """Forma para clientes externos (sin el snapshot)."""
+        return {
+            "kind": self.kind,
+            "track_id": self.track_id,
+            "position_ms": self.position_ms,
+            "expected_ms": self.expected_ms,
+            "prev_track_id": self.prev_track_id,
+        }
+
+
+class EventDetector:
+    """Compara snapshots consecutivos del poller y deduce qué pasó.
+
+    La posición esperada es la que estimaba el PlaybackClock justo antes de
+    anclar la respuesta nueva (predicted_ms); si no se pasa, se extrapola
+    desde el snapshot anterior. Así un seek es "se alejó de lo previsto" y
+    no "cambió el número", y un cambio de tema se clasifica en ENDED (el
+    anterior estaba llegando al final) o SKIPPED.
+    """
+
+    def __init__(self, seek_tolerance_ms=CLOCK_SNAP_MS, end_tolerance_ms=EVENT_END_TOLERANCE_MS):
+        self._seek_tolerance = seek_tolerance_ms
+        self._end_tolerance = end_tolerance_ms
+        self._prev = None
+
+    def reset(self):
+        """Olvida el snapshot anterior (p.ej. tras quedar offline)."""
+        self._prev = None
+
+    def feed(self, snap, predicted_ms=None) -> list:
+        prev, self._prev = self._prev, snap
+        if prev is None:
+            if snap.has_item:
+                return [self._event(TRACK_CHANGED, snap, snap.track_id)]
+            return []
+
+        elapsed_ms = (snap.fetched_at - prev.fetched_at) * 1000
+        if predicted_ms is None:
+            predicted_ms = prev.progress_ms + (elapsed_ms if prev.is_playing else 0)
+        predicted_ms = int(min(predicted_ms, prev.duration_ms))
+        near_end = prev.has_item and predicted_ms >= prev.duration_ms - self._end_tolerance
+
+        events = []
+        if snap.track_id != prev.track_id:
+            if prev.has_item:
+                kind = ENDED if near_end else SKIPPED
+                events.append(self._event(kind, snap, prev.track_id, predicted_ms))
+            events.append(self._event(TRACK_CHANGED, snap, snap.track_id, prev_track_id=prev.track_id))
+            return events
+
+        if not snap.has_item:
+            return events
+        low = high = predicted_ms
+        if snap.is_playing != prev.is_playing:
+            events.append(self._event(RESUMED if snap.is_playing else PAUSED, snap, snap.track_id))
+            # No sabemos en qué momento del intervalo se pausó/reanudó
+            low = min(low, prev.progress_ms)
+            high = max(high, prev.progress_ms + elapsed_ms)
+        if not low - self._seek_tolerance <= snap.progress_ms <= high + self._seek_tolerance:
+            if near_end and snap.progress_ms < self._end_tolerance:
+                # Mismo tema desde el principio: repeat de un tema
+                events.append(self._event(ENDED, snap, snap.track_id, predicted_ms))
+            else:
+                events.append(self._event(SEEKED, snap, snap.track_id, predicted_ms))
+        return events
+
+    @staticmethod
+    def _event(kind, snap, track_id, expected_ms=None, prev_track_id=None):
+        return PlaybackEvent(
+            kind=kind,
+            track_id=track_id,
+            position_ms=snap.progress_ms,
+            expected_ms=expected_ms,
+            prev_track_id=prev_track_id,
+            at=snap.fetched_at,
+            snapshot=snap,
+        )
+
+
+class Listeners:
+    """Lista de callbacks; uno que falla no corta a los demás.
+
+    accepts(*args), si se da, decide por suscriptor si le toca la llamada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs = []             # [(callback, accepts | None)]
+
+    def add(self, callback, accepts=None):
+        """Devuelve callback (para remove)."""
+        with self._lock:
+            self._subs.append((callback, accepts))
+        return callback
+
+    def remove(self, callback):
+        # != y no "is not": cada self.metodo es un objeto nuevo
+        with self._lock:
+            self._subs = [s for s in self._subs if s[0] != callback]
+
+    def __len__(self):
+        return len(self._subs)
+
+    def __call__(self, *args):
+        with self._lock:
+            subs = list(self._subs)
+        for callback, accepts in subs:
+            if accepts is not None and not accepts(*args):
+                continue
+            try:
+                callback(*args)
+            except Exception:
+                log.exception("suscriptor falló: %r", callback)
+
+
+class EventBus(Listeners):
+    """Reparte los eventos a varios suscriptores sin más llamadas a la API.
+
+    Los callbacks corren en el hilo que publica (el del poller): los de Qt
+    deben suscribir el emit de una señal. Un suscriptor que falla no corta
+    a los demás.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.published = Counter()
+
+    def subscribe(self, callback, kinds=None):
+        """callback(event); kinds = solo esos tipos (None = todos). Devuelve callback."""
+        if kinds:
+            kinds = frozenset(kinds)
+            return self.add(callback, lambda event: event.kind in kinds)
+        return self.add(callback)
+
+    def unsubscribe(self, callback):
+        self.remove(callback)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self)
+
+    def publish(self, event):
+        self.published[event.kind] += 1
+        self(event)
+
+
+def log_event(event):
+    """Suscriptor de ejemplo: deja cada evento en el log."""
+    log.info("evento: %s %s @%d ms", event.kind, event.track_id, event.position_ms)
@@ -0,0 +1,295 @@
+# playback_state.py
+# Snapshot inmutable del estado de reproducción, compartido entre el poller y la UI
+
+import threading
+import time
+from dataclasses import dataclass, replace
+
+from config import CLOCK_SNAP_MS, COVER_WIRE_PX
+
+
+@dataclass(frozen=True, slots=True)
+class PlaybackSnapshot:
+    """Lo mínimo que la barra necesita de una respuesta de current_playback()."""
+    track_id: str | None
+    name: str
+    artists: str
+    url: str | None
+    progress_ms: int
+    duration_ms: int
+    is_playing: bool
+    volume_percent: int | None
+    timestamp_ms: int | None    # "timestamp" de Spotify: último cambio de estado
+    fetched_at: float           # time.monotonic() al recibir la respuesta
+    images: tuple = ()          # portada: ((ancho, url), ...) de menor a mayor
+
+    @classmethod
+    def from_playback(cls, pb, fetched_at=None):
+        """Arma el snapshot desde el dict de Spotify (pb puede ser None)."""
+        if fetched_at is None:
+            fetched_at = time.monotonic()
+        pb = pb or {}
+        item = pb.get("item") or {}
+        device = pb.get("device") or {}
+
+        track_id = item.get("id")
+        url = (item.get("external_urls") or {}).get("spotify")
+        if not url and track_id:
+            url = f"https://open.spotify.com/track/{track_id}"
+
+        volume = device.get("volume_percent")
+        images = tuple(sorted(
+            (int(i.get("width") or 0), i["url"])
+            for i in (item.get("album") or {}).get("images") or [] if i.get("url")
+        ))
+        return cls(
+            track_id=track_id,
+            name=item.get("name") or "",
+            artists=", ".join(a["name"] for a in item.get("artists") or []),
+            url=url,
+            progress_ms=int(pb.get("progress_ms") or 0),
+            duration_ms=int(item.get("duration_ms") or 1),
+            is_playing=bool(pb.get("is_playing")),
+            volume_percent=None if volume is None else int(volume),
+            timestamp_ms=pb.get("timestamp"),
+            fetched_at=fetched_at,
+            images=images,
+        )
+
+    @property
+    def has_item(self) -> bool:
+        return bool(self.name)
+
+    def age(self, now=None) -> float:
+        """Segundos desde que se recibió la respuesta."""
+        if now is None:
+            now = time.monotonic()
+        return max(0.0, now - self.fetched_at)
+
+    def is_stale(self, max_age: float, now=None) -> bool:
+        return self.age(now) > max_age
+
+
+class SnapshotStore:
+    """Último snapshot publicado por el poller. Seguro entre hilos."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snap = None
+        self._device_at = None      # cuándo se supo el volumen por última vez
+
+    def get(self):
+        with self._lock:
+            return self._snap
+
+    def publish(self, snap):
+        with self._lock:
+            self._snap = snap
+            self._device_at = snap.fetched_at
+        return snap
+
+    def publish_playback(self, pb, fetched_at=None):
+        """Publica una respuesta de current_playback() o de currently_playing().
+
+        currently_playing() no trae el dispositivo: se conserva el último
+        volumen conocido (y su antigüedad, ver device_is_stale).
+        """
+        if fetched_at is None:
+            fetched_at = self._clock()
+        snap = PlaybackSnapshot.from_playback(pb, fetched_at)
+        with self._lock:
+            if pb and "device" not in pb:
+                if self._snap is not None:
+                    snap = replace(snap, volume_percent=self._snap.volume_percent)
+            else:
+                self._device_at = fetched_at
+            self._snap = snap
+        return snap
+
+    def update(self, **changes):
+        """Corrige campos conocidos localmente (p.ej. el volumen que acabamos de setear)."""
+        with self._lock:
+            if self._snap is not None:
+                self._snap = replace(self._snap, **changes)
+                if "volume_percent" in changes:
+                    self._device_at = self._clock()
+            return self._snap
+
+    def age(self, now=None):
+        """Edad del snapshot en segundos, o None si todavía no hay ninguno."""
+        snap = self.get()
+        return None if snap is None else snap.age(self._clock() if now is None else now)
+
+    def is_stale(self, max_age: float, now=None) -> bool:
+        snap = self.get()
+        return snap is None or snap.is_stale(max_age, self._clock() if now is None else now)
+
+    def device_is_stale(self, max_age: float, now=None) -> bool:
+        with self._lock:
+            device_at = self._device_at
+        if device_at is None:
+            return True
+        return (self._clock() if now is None else now) - device_at > max_age
+
+    def get_fresh(self, fetch, max_age: float, need_device=False):
+        """Devuelve el snapshot si es reciente; si no, llama a fetch() y lo publica.
+
+        need_device=True exige además un volumen reciente (fetch debe ser
+        current_playback, que trae el dispositivo).
+        """
+        snap = self.get()
+        now = self._clock()
+        if (snap is not None and not snap.is_stale(max_age, now)
+                and not (need_device and self.device_is_stale(max_age, now))):
+            return snap
+        return self.publish_playback(fetch())
+
+
+# ----- Estado que ve la UI -----
+# Máscara de cambios: qué partes de PlaybackState cambiaron respecto del anterior
+CHG_TEXT     = 1 << 0
+CHG_PLAYING  = 1 << 1
+CHG_PROGRESS = 1 << 2     # seek / posición distinta de la prevista
+CHG_TRACK    = 1 << 3
+CHG_VOLUME   = 1 << 4
+CHG_STALE    = 1 << 5     # pasó de "último conocido" (warm start) a dato en vivo o viceversa
+CHG_STATUS   = 1 << 6     # online / degraded / offline / rate_limited
+CHG_ALL      = CHG_TEXT | CHG_PLAYING | CHG_PROGRESS | CHG_TRACK | CHG_VOLUME | CHG_STALE | CHG_STATUS
+
+CHG_NAMES = {
+    CHG_TEXT: "text",
+    CHG_PLAYING: "playing",
+    CHG_PROGRESS: "progress",
+    CHG_TRACK: "track",
+    CHG_VOLUME: "volume",
+    CHG_STALE: "stale",
+    CHG_STATUS: "status",
+}
+
+
+def mask_names(mask) -> list:
+    """Máscara CHG_* → nombres (para los protocolos hacia afuera)."""
+    return [name for bit, name in CHG_NAMES.items() if mask & bit]
+
+
+NOTHING_PLAYING = "Nada reproduciéndose"
+
+
+def pick_image(images, min_px):
+    """La imagen más chica de al menos min_px de ancho (si no hay, la más grande)."""
+    for width, url in images:
+        if width >= min_px:
+            return url
+    return images[-1][1] if images else None
+
+
+@dataclass(frozen=True, slots=True)
+class PlaybackState:
+    """Lo que muestra la barra. Se emite una sola vez por cambio real."""
+    text: str
+    is_playing: bool
+    track_id: str | None = None
+    url: str | None = None
+    progress_ms: int = 0
+    duration_ms: int = 1
+    volume_percent: int | None = None
+    stale: bool = False         # True = cargado del disco, todavía sin confirmar
+    status: str = "online"      # ver connectivity.py
+    images: tuple = ()          # portada, como PlaybackSnapshot.images
+
+    @classmethod
+    def from_snapshot(cls, snap):
+        if not snap.has_item:
+            return cls(NOTHING_PLAYING, snap.is_playing, volume_percent=snap.volume_percent)
+        return cls(
+            text=f"{snap.name} — {snap.artists}",
+            is_playing=snap.is_playing,
+            track_id=snap.track_id,
+            url=snap.url,
+            progress_ms=snap.progress_ms,
+            duration_ms=snap.duration_ms,
+            volume_percent=snap.volume_percent,
+            images=snap.images,
+        )
+
+    @classmethod
+    def message(cls, text, status="online"):
+        """Estado sin reproducción con un texto propio (p.ej. "(sin conexión)")."""
+        return cls(text, False, status=status)
+
+    def to_dict(self) -> dict:
+        """Forma compacta para guardar en disco (ver settings_store.save_last_state)."""
+        return {
+            "text": self.text,
+            "track_id": self.track_id,
+            "url": self.url,
+            "progress_ms": self.progress_ms,
+            "duration_ms": self.duration_ms,
+            "volume_percent": self.volume_percent,
+            "images": [list(i) for i in self.images],
+        }
+
+    def to_wire(self, progress_ms=None) -> dict:
+        """Forma para clientes externos (IPC, WebSocket, sinks JSON).
+
+        progress_ms: posición estimada al momento de enviar (si no, la del poll).
+        """
+        return {
+            "text": self.text,
+            "is_playing": self.is_playing,
+            "track_id": self.track_id,
+            "url": self.url,
+            "progress_ms": int(self.progress_ms if progress_ms is None else progress_ms),
+            "duration_ms": self.duration_ms,
+            "volume_percent": self.volume_percent,
+            "status": self.status,
+            "stale": self.stale,
+            "cover_url": pick_image(self.images, COVER_WIRE_PX),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Estado guardado → PlaybackState marcado stale (en pausa hasta el primer poll)."""
+        if not data or not data.get("text"):
+            return None
+        try:
+            return cls(
+                text=str(data["text"]),
+                is_playing=False,
+                track_id=data.get("track_id"),
+                url=data.get("url"),
+                progress_ms=int(data.get("progress_ms") or 0),
+                duration_ms=max(1, int(data.get("duration_ms") or 1)),
+                volume_percent=data.get("volume_percent"),
+                stale=True,
+                images=tuple((int(w), str(u)) for w, u in data.get("images") or ()),
+            )
+        except (TypeError, ValueError):
+            return None
+
+    def diff(self, prev, predicted_ms=None, tolerance_ms=CLOCK_SNAP_MS) -> int:
+        """Máscara CHG_* de lo que cambió respecto de prev (None = todo).
+
+        El progreso avanza solo mientras suena, así que solo cuenta como cambio
+        si se aleja de predicted_ms (lo que estimaba el reloj) más que tolerance_ms.
+        """
+        if prev is None:
+            return CHG_ALL
+        mask = 0
+        if self.text != prev.text:
+            mask |= CHG_TEXT
+        if self.is_playing != prev.is_playing:
+            mask |= CHG_PLAYING
+        if self.track_id != prev.track_id or self.duration_ms != prev.duration_ms:
+            mask |= CHG_TRACK
+        if self.volume_percent != prev.volume_percent:
+            mask |= CHG_VOLUME
+        if self.stale != prev.stale:
+            mask |= CHG_STALE
+        if self.status != prev.status:
+            mask |= CHG_STATUS
+        expected = prev.progress_ms if predicted_ms is None else predicted_ms
+        if abs(self.progress_ms - expected) > tolerance_ms:
+            mask |= CHG_PROGRESS
+        return mask
@@ -0,0 +1,215 @@
+# playback_trace.py
+# -------------------------------------
+# Grabar y reproducir sesiones de polling (current_playback) para pruebas de regresión
+#
+# Grabar una sesión real:
+#   NOWPLAYING_TRACE=sesion.jsonl.gz python main.py
+# Reproducirla 8 horas contra un reloj virtual (tarda segundos):
+#   python playback_trace.py replay sesion.jsonl.gz --hours 8
+# -------------------------------------
+
+import argparse
+import bisect
+import gzip
+import json
+import threading
+import time
+import tracemalloc
+
+from clocks import system_clock, VirtualClock
+from slim_playback import compact_playback
+
+TRACE_VERSION = 1
+
+
+def _open(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class TraceRecorder:
+    """Envuelve el cliente de Spotify y graba cada poll con su tiempo.
+
+    Cada línea: {"t": segundos desde el inicio, "rtt": ms, "pb": ...} o
+    {"t", "rtt", "err": status, "retry_after": s}. El resto de los métodos se
+    delega tal cual al cliente real.
+    """
+
+    def __init__(self, sp, path, clock=system_clock):
+        self._sp = sp
+        self._clock = clock
+        self._t0 = clock.monotonic()
+        self._lock = threading.Lock()
+        self._f = _open(path, "w")
+        self._write({"v": TRACE_VERSION, "kind": "nowplaying-trace", "started": clock.time()})
+
+    def __getattr__(self, name):
+        return getattr(self._sp, name)
+
+    def current_playback(self, *args, **kwargs):
+        return self._poll(self._sp.current_playback, *args, **kwargs)
+
+    def currently_playing(self, *args, **kwargs):
+        return self._poll(self._sp.currently_playing, *args, **kwargs)
+
+    def _poll(self, fetch, *args, **kwargs):
+        t = self._clock.monotonic()
+        try:
+            pb = fetch(*args, **kwargs)
+        except Exception as e:
+            rec = {"err": getattr(e, "http_status", None) or 0}
+            retry_after = (getattr(e, "headers", None) or {}).get("Retry-After")
+            if retry_after:
+                rec["retry_after"] = retry_after
+            self._record(t, rec)
+            raise
+        self._record(t, {"pb": compact_playback(pb)})
+        return pb
+
+    def close(self):
+        with self._lock:
+            self._f.close()
+
+    def _record(self, t, rec):
+        rtt = (self._clock.monotonic() - t) * 1000
+        rec = {"t": round(t - self._t0, 3), "rtt": round(rtt, 1), **rec}
+        self._write(rec)
+
+    def _write(self, rec):
+        with self._lock:
+            self._f.write(json.dumps(rec, ensure_ascii=False, separators=(",", ":")) + "\n")
+            self._f.flush()
+
+
+def load_trace(path):
+    """Devuelve la lista de registros (sin el encabezado), ordenada por t."""
+    with _open(path, "r") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if lines and lines[0].get("kind") == "nowplaying-trace":
+        lines = lines[1:]
+    return sorted(lines, key=lambda r: r["t"])
+
+
+class TraceError(Exception):
+    """Error grabado en la traza (imita a SpotifyException: http_status y headers)."""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"error grabado {status}")
+        self.http_status = status
+        self.headers = {"Retry-After": retry_after} if retry_after else {}
+
+
+class TraceEnded(Exception):
+    """No quedan más registros para reproducir."""
+
+
+class TraceReplayer:
+    """Cliente falso que contesta los polls con lo grabado.
+
+    Para el instante virtual actual busca el último registro anterior y
+    extrapola el progreso si estaba sonando, así el poller puede consultar
+    con otro ritmo que el de la grabación. Simula también la latencia
+    grabada. Con duration > largo de la traza, la repite en bucle.
+    """
+
+    def __init__(self, records, clock, duration=None, on_end=None):
+        if not records:
+            raise ValueError("traza vacía")
+        self._records = records
+        self._times = [r["t"] for r in records]
+        self._span = max(self._times[-1], 1.0)
+        self._clock = clock
+        self._t0 = clock.monotonic()
+        self._duration = duration if duration is not None else self._span
+        self._on_end = on_end
+        self.requests = 0
+        self.commands = 0
+
+    def _elapsed(self):
+        return self._clock.monotonic() - self._t0
+
+    def current_playback(self, *args, **kwargs):
+        elapsed = self._elapsed()
+        if elapsed >= self._duration:
+            if self._on_end:
+                self._on_end()
+            raise TraceEnded()
+        self.requests += 1
+        t = elapsed % self._span
+        i = max(0, bisect.bisect_right(self._times, t) - 1)
+        rec = self._records[i]
+        self._clock.sleep(rec.get("rtt", 0) / 1000)
+        if "err" in rec:
+            raise TraceError(rec["err"], rec.get("retry_after"))
+        pb = rec.get("pb")
+        if not pb:
+            return None
+        pb = dict(pb)
+        if pb.get("is_playing") and pb.get("item"):
+            progress = (pb.get("progress_ms") or 0) + (t - rec["t"]) * 1000
+            pb["progress_ms"] = int(min(progress, pb["item"].get("duration_ms") or progress))
+        return pb
+
+    def currently_playing(self, *args, **kwargs):
+        pb = self.current_playback()
+        if pb:
+            pb.pop("device", None)
+        return pb
+
+    # Los comandos no cambian lo grabado; solo se cuentan
+    def _command(self, *args, **kwargs):
+        self.commands += 1
+
+    next_track = previous_track = start_playback = pause_playback = volume = _command
+
+
+def replay_session(path, hours=8.0, speed=None):
+    """Corre el PlaybackEngine real contra la traza con reloj virtual (sin Qt) y devuelve métricas."""
+    from playback_engine import PlaybackEngine
+
+    clock = VirtualClock(speed=speed)
+    replayer = TraceReplayer(load_trace(path), clock, duration=hours * 3600)
+    engine = PlaybackEngine(replayer, clock=clock, state_file=None).start_commands()
+    replayer._on_end = engine.stop
+
+    emitted = {"states": 0}
+    engine.subscribe_state(lambda *_: emitted.__setitem__("states", emitted["states"] + 1))
+
+    tracemalloc.start()
+    cpu0 = time.process_time()
+    wall0 = time.perf_counter()
+    engine.run()
+    cpu = time.process_time() - cpu0
+    wall = time.perf_counter() - wall0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    engine.stop()
+
+    return {
+        "trace": str(path),
+        "simulated_hours": clock.monotonic() / 3600,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "peak_alloc_bytes": peak,
+        "requests": replayer.requests,
+        "requests_per_hour": replayer.requests / max(hours, 1e-9),
+        "state_changes": emitted["states"],
+        "events": dict(engine.events.published),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Reproducir una traza de polling")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("replay")
+    rp.add_argument("trace")
+    rp.add_argument("--hours", type=float, default=8.0)
+    rp.add_argument("--speed", type=float, help="p.ej. 100 = 100x tiempo real (por defecto, instantáneo)")
+    args = ap.parse_args(argv)
+    if args.cmd == "replay":
+        print(json.dumps(replay_session(args.trace, args.hours, args.speed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
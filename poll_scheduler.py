@@ -0,0 +1,111 @@
+# poll_scheduler.py
+# Cuándo volver a consultar Spotify: poco a mitad de tema, justo al final y en ráfaga tras comandos
+
+import threading
+import time
+from collections import deque
+
+from config import (
+    IDLE_POLL_SECONDS,
+    PAUSED_POLL_SECONDS,
+    MID_TRACK_POLL_SECONDS,
+    TRACK_END_SLACK_SECONDS,
+    MIN_POLL_SECONDS,
+    POLL_BURST_DELAYS,
+)
+
+
+class RequestCounter:
+    """Cuenta requests en una ventana deslizante (por defecto, la última hora)."""
+
+    def __init__(self, window=3600.0, clock=time.monotonic):
+        self._window = window
+        self._clock = clock
+        self._hits = deque()
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def hit(self, now=None):
+        if now is None:
+            now = self._clock()
+        with self._lock:
+            self._hits.append(now)
+            self.total += 1
+            self._trim(now)
+
+    def per_hour(self, now=None) -> int:
+        """Requests en la última ventana (igual a "por hora" con la ventana por defecto)."""
+        if now is None:
+            now = self._clock()
+        with self._lock:
+            self._trim(now)
+            return len(self._hits)
+
+    def _trim(self, now):
+        limit = now - self._window
+        while self._hits and self._hits[0] < limit:
+            self._hits.popleft()
+
+
+class PollScheduler:
+    """Calcula la espera hasta el próximo poll a partir del último snapshot.
+
+    - Reproduciendo: un poll cada MID_TRACK_POLL_SECONDS, salvo que el tema
+      termine antes; en ese caso despierta justo al final previsto
+      (+ TRACK_END_SLACK_SECONDS) para mostrar el tema nuevo enseguida.
+    - En pausa / sin reproducción: PAUSED_POLL_SECONDS / IDLE_POLL_SECONDS.
+    - Tras un comando propio, o si el "timestamp" de Spotify cambió sin que
+      lo esperáramos (alguien tocó otro cliente), una ráfaga de polls cortos.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._burst = deque()
+        self._last_timestamp = None
+        self._expected_end = None
+        self._own_change_until = 0.0
+
+    def on_command(self):
+        """Pide una ráfaga de polls para confirmar rápido un comando."""
+        with self._lock:
+            self._burst = deque(POLL_BURST_DELAYS)
+            # El cambio de "timestamp" que provoque el comando es nuestro
+            self._own_change_until = self._clock() + sum(POLL_BURST_DELAYS) + MIN_POLL_SECONDS
+
+    def next_delay(self, snap, now=None) -> float:
+        if now is None:
+            now = self._clock()
+        with self._lock:
+            self._note_timestamp(snap, now)
+            if snap is not None and snap.is_playing and snap.has_item:
+                remaining = (snap.duration_ms - snap.progress_ms) / 1000.0 - snap.age(now)
+                self._expected_end = now + max(0.0, remaining)
+            else:
+                remaining = None
+                self._expected_end = None
+            if self._burst:
+                return self._burst.popleft()
+
+        if snap is None or not snap.has_item:
+            return IDLE_POLL_SECONDS
+        if remaining is None:
+            return PAUSED_POLL_SECONDS
+        if remaining <= MID_TRACK_POLL_SECONDS:
+            return max(MIN_POLL_SECONDS, remaining + TRACK_END_SLACK_SECONDS)
+        return MID_TRACK_POLL_SECONDS
+
+    def _note_timestamp(self, snap, now):
+        # Se llama con el lock tomado
+        ts = snap.timestamp_ms if snap is not None else None
+        changed = ts is not None and self._last_timestamp is not None and ts != self._last_timestamp
+        self._last_timestamp = ts
+        if not changed or now < self._own_change_until:
+            return
+        # Un cambio cerca del final previsto es el tema siguiente arrancando solo
+        near_end = (
+            self._expected_end is not None
+            and abs(now - self._expected_end) <= MID_TRACK_POLL_SECONDS / 2
+        )
+        if not near_end and not self._burst:
+            self._burst = deque(POLL_BURST_DELAYS)
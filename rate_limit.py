@@ -0,0 +1,191 @@
+# rate_limit.py
+# -------------------------------------
+# Gobernador de rate limit compartido por el poller y los comandos (token bucket)
+# -------------------------------------
+
+import threading
+import time
+
+from config import (
+    RATE_BUCKET_CAPACITY,
+    RATE_BUCKET_PER_SECOND,
+    RATE_POLL_RESERVE,
+    RATE_COMMAND_MAX_WAIT,
+)
+
+PRIORITY_COMMAND = 0    # lo que pidió el usuario: pasa primero y usa la reserva
+PRIORITY_POLL = 1       # polls de fondo: no tocan la reserva y nunca bloquean
+
+
+class RateLimited(Exception):
+    """No hay presupuesto (o Spotify pidió esperar); retry_after en segundos."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"rate limited, reintentar en {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def retry_after_from(exc):
+    """Segundos de Retry-After de una SpotifyException 429 (None si no es 429)."""
+    if getattr(exc, "http_status", None) != 429:
+        return None
+    try:
+        return float((getattr(exc, "headers", None) or {}).get("Retry-After", ""))
+    except (TypeError, ValueError):
+        return 1.0
+
+
+class TokenBucket:
+    def __init__(self, capacity, per_second, clock=time.monotonic):
+        self.capacity = float(capacity)
+        self.per_second = float(per_second)
+        self._clock = clock
+        self._tokens = float(capacity)
+        self._last = clock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.per_second)
+        self._last = now
+
+    def level(self, now=None) -> float:
+        self._refill(self._clock() if now is None else now)
+        return self._tokens
+
+    def try_take(self, reserve=0.0, now=None) -> bool:
+        """Toma un token si quedan más de `reserve` después de tomarlo."""
+        self._refill(self._clock() if now is None else now)
+        if self._tokens - 1 >= reserve:
+            self._tokens -= 1
+            return True
+        return False
+
+    def wait_time(self, reserve=0.0, now=None) -> float:
+        """Segundos hasta que try_take(reserve) pueda funcionar."""
+        self._refill(self._clock() if now is None else now)
+        missing = (reserve + 1) - self._tokens
+        return max(0.0, missing / self.per_second)
+
+
+class RateGovernor:
+    """Un presupuesto de requests para todo el proceso.
+
+    - Token bucket de RATE_BUCKET_CAPACITY que se recarga a
+      RATE_BUCKET_PER_SECOND (por debajo del límite de Spotify).
+    - Los polls no pueden bajar el balde de RATE_POLL_RESERVE: esa reserva
+      queda para los comandos del usuario.
+    - Un 429 con Retry-After frena a todos hasta que pase ese tiempo.
+    - Los polls nunca esperan adentro: reciben RateLimited y el poller
+      usa poll_delay_hint() para espaciar los siguientes.
+    """
+
+    def __init__(self, capacity=RATE_BUCKET_CAPACITY, per_second=RATE_BUCKET_PER_SECOND,
+                 poll_reserve=RATE_POLL_RESERVE, command_max_wait=RATE_COMMAND_MAX_WAIT,
+                 clock=time.monotonic, sleep=time.sleep):
+        self._bucket = TokenBucket(capacity, per_second, clock)
+        self._poll_reserve = poll_reserve
+        self._command_max_wait = command_max_wait
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._blocked_until = 0.0
+        self.throttle_events = 0     # veces que alguien tuvo que esperar o fue rechazado
+        self.retry_after_events = 0  # 429 recibidos
+        self.rejected_polls = 0
+        self.rejected_commands = 0
+        self.waits_seconds = 0.0
+
+    def acquire(self, priority):
+        """Consume un token o lanza RateLimited. Los comandos esperan hasta command_max_wait."""
+        reserve = self._poll_reserve if priority == PRIORITY_POLL else 0.0
+        while True:
+            with self._lock:
+                now = self._clock()
+                wait = max(0.0, self._blocked_until - now)
+                if wait == 0.0:
+                    if self._bucket.try_take(reserve, now):
+                        return
+                    wait = self._bucket.wait_time(reserve, now)
+                self.throttle_events += 1
+                if priority == PRIORITY_POLL or wait > self._command_max_wait:
+                    if priority == PRIORITY_POLL:
+                        self.rejected_polls += 1
+                    else:
+                        self.rejected_commands += 1
+                    raise RateLimited(wait)
+                self.waits_seconds += wait
+            self._sleep(wait)
+
+    def note_retry_after(self, seconds):
+        with self._lock:
+            self.retry_after_events += 1
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    def poll_delay_hint(self) -> float:
+        """Cuánto debería esperar el poller como mínimo para no gastar la reserva."""
+        with self._lock:
+            now = self._clock()
+            blocked = max(0.0, self._blocked_until - now)
+            return max(blocked, self._bucket.wait_time(self._poll_reserve, now))
+
+    def call(self, priority, fn, *args, **kwargs):
+        self.acquire(priority)
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            retry_after = retry_after_from(e)
+            if retry_after is not None:
+                self.note_retry_after(retry_after)
+            raise
+
+    def stats(self) -> dict:
+        with self._lock:
+            now = self._clock()
+            return {
+                "tokens": round(self._bucket.level(now), 2),
+                "blocked_for": max(0.0, self._blocked_until - now),
+                "throttle_events": self.throttle_events,
+                "retry_after_events": self.retry_after_events,
+                "rejected_polls": self.rejected_polls,
+                "rejected_commands": self.rejected_commands,
+                "waits_seconds": round(self.waits_seconds, 3),
+            }
+
+
+# Uno solo por proceso
+governor = RateGovernor()
+
+_POLL_METHODS = frozenset({"current_playback", "currently_playing"})
+
+
+class GovernedSpotify:
+    """Envuelve spotipy.Spotify: cada método pasa por el gobernador.
+
+    current_playback/currently_playing van como polls; el resto como comandos.
+    Los atributos que no son métodos (transport, token_manager...) pasan tal cual.
+    """
+
+    def __init__(self, sp, gov=governor):
+        self._sp = sp
+        self.governor = gov
+
+    def __getattr__(self, name):
+        attr = getattr(self._sp, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+        priority = PRIORITY_POLL if name in _POLL_METHODS else PRIORITY_COMMAND
+
+        def governed(*args, **kwargs):
+            return self.governor.call(priority, attr, *args, **kwargs)
+
+        governed.__name__ = name
+        return governed
+
+    def command(self, name):
+        """El método name con prioridad de comando (p.ej. una lectura que pidió el usuario)."""
+        attr = getattr(self._sp, name)
+
+        def governed(*args, **kwargs):
+            return self.governor.call(PRIORITY_COMMAND, attr, *args, **kwargs)
+
+        governed.__name__ = name
+        return governed
@@ -3,8 +3,11 @@
 
 from pathlib import Path
 import json
+import os
 
 DEFAULT_FILE = Path.home() / ".nowplaying_overlay.json"
+# Último estado de reproducción (para pintar algo al instante al arrancar)
+STATE_FILE = Path.home() / ".nowplaying_state.json"
 
 def load_settings(path: Path = DEFAULT_FILE) -> dict:
     try:
@@ -20,3 +23,21 @@ def save_settings(data: dict, path: Path = DEFAULT_FILE) -> None:
         path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
     except Exception:
         pass
+
+def write_atomic(path: Path, data) -> None:
+    """Escribe en un temporal y lo renombra: nunca queda un archivo a medias (str o bytes)."""
+    tmp = path.with_name(path.name + ".tmp")
+    if isinstance(data, bytes):
+        tmp.write_bytes(data)
+    else:
+        tmp.write_text(data, encoding="utf-8")
+    os.replace(tmp, path)
+
+def load_last_state(path: Path = STATE_FILE) -> dict:
+    return load_settings(path)
+
+def save_last_state(data: dict, path: Path = STATE_FILE) -> None:
+    try:
+        write_atomic(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+    except Exception:
+        pass
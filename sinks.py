@@ -0,0 +1,250 @@
+# sinks.py
+# Salidas a archivo del estado de reproducción (OBS, barras de estado, scripts)
+#
+# Cada sink mira solo los campos que le importan (máscara CHG_*) y el
+# contenido ya escrito: si no cambió, no toca el disco. Las escrituras van a
+# un hilo aparte, se juntan durante SINK_BATCH_SECONDS y reemplazan el
+# archivo de forma atómica (temporal + rename): quien lee nunca ve un
+# archivo a medias. Con un tema sonando sin cambios: cero escrituras.
+
+import logging
+import os
+import threading
+from pathlib import Path
+
+from config import COVER_WIRE_PX, SINK_BATCH_SECONDS
+from payload import encode
+from playback_state import CHG_ALL, CHG_TEXT, CHG_TRACK, pick_image
+from settings_store import write_atomic
+
+log = logging.getLogger("nowplaying")
+
+_NOTHING = object()
+
+
+class SinkWriter:
+    """Hilo que escribe los sinks. Si un sink cambia dos veces antes de
+    escribirse, solo se escribe la última versión (coalesced)."""
+
+    def __init__(self, batch=SINK_BATCH_SECONDS):
+        self._batch = batch
+        self._cond = threading.Condition()
+        self._pending = {}          # sink -> (contenido, payload) (el último gana)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sink-writer", daemon=True)
+        self.batches = 0
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def submit(self, sink, content, payload):
+        with self._cond:
+            if sink in self._pending:
+                sink.coalesced += 1
+            self._pending[sink] = (content, payload)
+            self._cond.notify()
+
+    def flush(self):
+        """Escribe ya lo pendiente (en el hilo que llama)."""
+        with self._cond:
+            pending, self._pending = self._pending, {}
+        if pending:
+            self.batches += 1
+        for sink, (content, payload) in pending.items():
+            sink.write(content, payload)
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify()
+        if self._thread.is_alive():
+            self._thread.join(2)
+        self.flush()
+
+    def _run(self):
+        while not self._stop.is_set():
+            with self._cond:
+                while not self._pending and not self._stop.is_set():
+                    self._cond.wait()
+            # Juntar lo que llegue en la ventana (p.ej. texto + JSON + portada de un cambio de tema)
+            self._stop.wait(self._batch)
+            self.flush()
+
+
+class FileSink:
+    """Base: render(state) → contenido; se escribe solo si cambió.
+
+    `fields` es la máscara CHG_* que puede cambiar el contenido; un cambio
+    de otros campos ni siquiera llega a render(). El contenido cuenta como
+    escrito recién cuando la escritura sale bien: si falla (p.ej. no se pudo
+    bajar la portada), el próximo aviso del motor lo intenta de nuevo.
+    """
+
+    fields = CHG_ALL
+
+    def __init__(self, path, writer):
+        self.path = Path(path)
+        self._writer = writer
+        self._lock = threading.Lock()
+        self._last = None           # último contenido escrito
+        self._queued = _NOTHING     # contenido en cola, todavía sin escribir
+        self._failed = False        # la última escritura falló
+        self._primed = False
+        self.writes = 0
+        self.bytes = 0
+        self.skipped = 0            # avisos del motor que no cambiaron este archivo
+        self.coalesced = 0          # versiones reemplazadas antes de escribirse
+        self.errors = 0
+
+    def render(self, state):
+        raise NotImplementedError
+
+    def __call__(self, state, mask):
+        """Suscriptor de engine.subscribe_state()."""
+        with self._lock:
+            retry = self._failed
+            current = self._last if self._queued is _NOTHING else self._queued
+        if self._primed and not retry and not mask & self.fields:
+            self.skipped += 1
+            return
+        content = self.render(state)
+        if self._primed and not retry and content == current:
+            self.skipped += 1
+            return
+        self._primed = True
+        with self._lock:
+            self._queued = content
+        self._writer.submit(self, content, self.payload(content))
+
+    def payload(self, content):
+        return content
+
+    def write(self, content, payload):
+        """En el hilo del writer. payload None = borrar el archivo."""
+        ok = False
+        try:
+            self._write(payload)
+            ok = True
+        except Exception as e:
+            self.errors += 1
+            log.warning("no se pudo escribir %s: %s", self.path, e)
+        with self._lock:
+            if ok:
+                self._last = content
+            self._failed = not ok
+            if self._queued == content:
+                self._queued = _NOTHING
+
+    def _write(self, payload):
+        if callable(payload):
+            payload = payload()
+        if payload is None:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                return
+        else:
+            if isinstance(payload, str):
+                payload = payload.encode("utf-8")
+            write_atomic(self.path, payload)
+            self.bytes += len(payload)
+        self.writes += 1
+
+    def stats(self) -> dict:
+        return {
+            "path": str(self.path),
+            "writes": self.writes,
+            "bytes": self.bytes,
+            "skipped": self.skipped,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
+
+class TextSink(FileSink):
+    """"título — artistas" (o el mensaje de estado: nada sonando, sin conexión)."""
+
+    fields = CHG_TEXT
+
+    def render(self, state):
+        return state.text
+
+
+class JsonSink(FileSink):
+    """PlaybackState.to_wire(). El progreso es el del poll: no se reescribe
+    mientras avanza solo, únicamente cuando cambia algo (seek incluido)."""
+
+    fields = CHG_ALL
+
+    def render(self, state):
+        return encode(state.to_wire()).decode("utf-8")
+
+
+class CoverSink(FileSink):
+    """Imagen de portada del tema actual; sin tema, el archivo se borra.
+
+    fetch(url) → bytes corre en el hilo del writer; por defecto, la caché de
+    cover_loader (un álbum se descarga una vez aunque cambie el tema).
+    """
+
+    fields = CHG_TRACK
+
+    def __init__(self, path, writer, fetch=None, min_px=COVER_WIRE_PX):
+        super().__init__(path, writer)
+        if fetch is None:
+            from cover_loader import shared_loader
+            fetch = shared_loader().get_bytes
+        self._fetch = fetch
+        self._min_px = min_px
+
+    def render(self, state):
+        return pick_image(state.images, self._min_px)
+
+    def payload(self, url):
+        if not url:
+            return None
+        return lambda: self._fetch(url)
+
+
+class Sinks:
+    """Los sinks configurados, con un writer compartido."""
+
+    def __init__(self, writer=None):
+        self.writer = writer or SinkWriter().start()
+        self.sinks = []
+
+    def add(self, cls, path, **kwargs):
+        sink = cls(path, self.writer, **kwargs)
+        self.sinks.append(sink)
+        return sink
+
+    def attach(self, engine):
+        """Suscribe los sinks al motor y escribe ya el estado actual."""
+        state = engine.state()
+        for sink in self.sinks:
+            engine.subscribe_state(sink)
+            if state is not None:
+                sink(state, CHG_ALL)
+        return self
+
+    def stop(self):
+        """Escribe lo pendiente y termina el writer."""
+        self.writer.stop()
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.writer.batches,
+            "sinks": {type(s).__name__: s.stats() for s in self.sinks},
+        }
+
+
+def build_sinks(text_path=None, json_path=None, cover_path=None):
+    sinks = Sinks()
+    if text_path:
+        sinks.add(TextSink, text_path)
+    if json_path:
+        sinks.add(JsonSink, json_path)
+    if cover_path:
+        sinks.add(CoverSink, cover_path)
+    return sinks
@@ -0,0 +1,111 @@
+# slim_playback.py
+# Camino liviano para los polls: bytes crudos → solo los campos que usa la barra
+#
+# spotipy hace response.json() del /me/player completo (dispositivo, contexto,
+# álbum con imágenes, available_markets...) y la barra usa siete campos.
+# Acá se decodifica con orjson si está instalado y se descarta todo lo demás
+# antes de que llegue al resto del programa.
+
+import time
+
+try:
+    import orjson
+    _loads = orjson.loads
+    JSON_DECODER = "orjson"
+except ImportError:
+    import json
+    _loads = json.loads
+    JSON_DECODER = "json"
+
+
+def compact_playback(pb):
+    """Solo los campos que usa la barra (el resto del JSON se descarta)."""
+    if not pb:
+        return None
+    item = pb.get("item") or None
+    out = {
+        "progress_ms": pb.get("progress_ms"),
+        "is_playing": pb.get("is_playing"),
+        "timestamp": pb.get("timestamp"),
+    }
+    if item:
+        out["item"] = {
+            "id": item.get("id"),
+            "name": item.get("name"),
+            "artists": [{"name": a.get("name")} for a in item.get("artists") or []],
+            "duration_ms": item.get("duration_ms"),
+            "external_urls": item.get("external_urls") or {},
+        }
+        images = (item.get("album") or {}).get("images")
+        if images:
+            out["item"]["album"] = {"images": [
+                {"url": i.get("url"), "width": i.get("width"), "height": i.get("height")}
+                for i in images
+            ]}
+    device = pb.get("device")
+    if device:
+        out["device"] = {"volume_percent": device.get("volume_percent")}
+    return out
+
+
+def parse_playback(raw):
+    """Cuerpo de /me/player o /me/player/currently-playing → dict compacto (o None)."""
+    if not raw:
+        return None         # 204: no hay nada sonando
+    return compact_playback(_loads(raw))
+
+
+class SlimSpotify:
+    """Envuelve un spotipy.Spotify: current_playback/currently_playing sin spotipy.
+
+    Hace el GET con la misma sesión (pool, reintentos, token) pero decodifica
+    los bytes directamente a la forma compacta. Cuenta bytes y tiempo de
+    parseo de cada poll: .stats(). El resto de los métodos se delega.
+    """
+
+    def __init__(self, sp):
+        self._sp = sp
+        self.polls = 0
+        self.bytes = 0
+        self.parse_ns = 0
+
+    def __getattr__(self, name):
+        return getattr(self._sp, name)
+
+    def current_playback(self, *args, **kwargs):
+        return self._get("me/player")
+
+    def currently_playing(self, *args, **kwargs):
+        return self._get("me/player/currently-playing")
+
+    def _get(self, path):
+        from spotipy import SpotifyException
+
+        sp = self._sp
+        r = sp._session.get(
+            sp.prefix + path,
+            headers=sp._auth_headers(),
+            params={"additional_types": "track"},
+            timeout=sp.requests_timeout,
+        )
+        if r.status_code >= 400:
+            raise SpotifyException(
+                r.status_code, -1, f"{r.url}:\n {r.text}", reason=r.reason, headers=r.headers
+            )
+        raw = r.content
+        t0 = time.perf_counter_ns()
+        pb = parse_playback(raw)
+        self.parse_ns += time.perf_counter_ns() - t0
+        self.polls += 1
+        self.bytes += len(raw or b"")
+        return pb
+
+    def stats(self) -> dict:
+        n = max(1, self.polls)
+        return {
+            "decoder": JSON_DECODER,
+            "polls": self.polls,
+            "bytes": self.bytes,
+            "bytes_per_poll": self.bytes / n,
+            "parse_us_per_poll": self.parse_ns / n / 1000,
+        }
@@ -4,17 +4,69 @@
 # -------------------------------------
 
 import spotipy
-from spotipy.oauth2 import SpotifyOAuth
-from config import CLIENT_ID, CLIENT_SEC, REDIRECT, SCOPE, CACHE_PATH
+from spotipy.oauth2 import SpotifyClientCredentials, SpotifyOAuth
+from config import CLIENT_ID, CLIENT_SEC, REDIRECT, SCOPE, CACHE_PATH, API_BASE_URL
+from token_manager import MemoryFileCacheHandler, TokenManager
+from transport import Transport
+from rate_limit import GovernedSpotify, governor
+from slim_playback import SlimSpotify
 
 
-def get_spotify_client():
-    """Devuelve un cliente autenticado de Spotify listo para usar."""
+def get_spotify_client(api_base=API_BASE_URL):
+    """Devuelve un cliente autenticado de Spotify listo para usar.
+
+    Con api_base (o NOWPLAYING_API_BASE) apunta a otra implementación de la
+    API, por ejemplo fake_spotify.py corriendo en local.
+
+    El token vive en memoria (el archivo de cache se lee una vez) y se
+    refresca en segundo plano antes de vencer: sp.token_manager.
+    Todo el tráfico usa una sola sesión HTTP con pool keep-alive, timeouts
+    y reintentos propios: sp.transport (con histogramas de latencia).
+    Los polls no pasan por response.json(): se decodifican solo los campos
+    que usa la barra (sp.slim.stats() para bytes y tiempo de parseo).
+    Cada llamada pasa por el gobernador de rate limit del proceso:
+    sp.governor (ver rate_limit.py).
+    """
+    transport = Transport()
+    if api_base:
+        return _get_local_client(api_base, transport)
     auth = SpotifyOAuth(
         client_id=CLIENT_ID,
         client_secret=CLIENT_SEC,
         redirect_uri=REDIRECT,
         scope=SCOPE,
-        cache_path=CACHE_PATH,
+        cache_handler=MemoryFileCacheHandler(CACHE_PATH),
+        requests_session=transport.session,
+        requests_timeout=transport.timeout,
+    )
+    sp = spotipy.Spotify(
+        auth_manager=auth,
+        requests_session=transport.session,
+        requests_timeout=transport.timeout,
+    )
+    sp.transport = transport
+    sp.token_manager = TokenManager(auth).start()
+    transport.prewarm()
+    sp.slim = SlimSpotify(sp)
+    return GovernedSpotify(sp.slim, governor)
+
+
+def _get_local_client(api_base, transport):
+    base = api_base.rstrip("/")
+    auth = SpotifyClientCredentials(
+        client_id=CLIENT_ID,
+        client_secret=CLIENT_SEC,
+        requests_session=transport.session,
+        requests_timeout=transport.timeout,
+    )
+    auth.OAUTH_TOKEN_URL = f"{base}/api/token"
+    sp = spotipy.Spotify(
+        auth_manager=auth,
+        requests_session=transport.session,
+        requests_timeout=transport.timeout,
     )
-    return spotipy.Spotify(auth_manager=auth)
+    sp.prefix = f"{base}/v1/"
+    sp.transport = transport
+    transport.prewarm(f"{base}/v1/")
+    sp.slim = SlimSpotify(sp)
+    return GovernedSpotify(sp.slim, governor)
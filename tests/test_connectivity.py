@@ -0,0 +1,39 @@
+# tests/test_connectivity.py
+# Estados de la conexión y escalera de backoff (jitter fijo con rng inyectado)
+
+from connectivity import DEGRADED, OFFLINE, ONLINE, Connectivity
+
+
+def _conn(**kwargs):
+    return Connectivity(base=2.0, cap=300.0, offline_after=3, rng=lambda: 1.0, **kwargs)
+
+
+def test_backoff_doubles_up_to_cap():
+    c = _conn()
+    delays = [c.on_failure() for _ in range(10)]
+    assert delays[:4] == [2.0, 4.0, 8.0, 16.0]
+    assert delays[-1] == 300.0
+    assert c.state == OFFLINE
+
+
+def test_backoff_survives_days_offline():
+    c = _conn()
+    for _ in range(1100):
+        delay = c.on_failure()
+    assert delay == 300.0
+
+
+def test_reset_backoff_restarts_the_ladder():
+    c = _conn()
+    for _ in range(6):
+        c.on_failure()
+    c.reset_backoff()
+    assert c.on_failure() == 8.0        # el primer escalón de "offline", no el tope
+    assert c.on_success()
+    assert c.state == ONLINE and c.failures == 0
+
+
+def test_single_failure_is_degraded():
+    c = _conn()
+    c.on_failure()
+    assert c.state == DEGRADED
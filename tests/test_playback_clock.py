@@ -0,0 +1,83 @@
+# tests/test_playback_clock.py
+# PlaybackClock con un reloj virtual en nanosegundos
+
+import pytest
+
+from clocks import VirtualClock
+from playback_clock import PlaybackClock
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+@pytest.fixture
+def pc(clock):
+    return PlaybackClock(clock=clock.monotonic_ns, slew_ms=500, snap_ms=1500)
+
+
+def test_position_advances_while_playing(clock, pc):
+    pc.anchor(10_000, 200_000, True, track_id="a")
+    clock.advance(2)
+    assert pc.position_ms() == pytest.approx(12_000)
+    assert pc.fraction() == pytest.approx(0.06)
+
+
+def test_anchor_at_half_round_trip(clock, pc):
+    sent = clock.monotonic_ns()
+    clock.advance(0.2)
+    pc.anchor(10_000, 200_000, True, track_id="a", sent_ns=sent, received_ns=clock.monotonic_ns())
+    # Spotify midió a los 100 ms: ya pasaron otros 100 ms
+    assert pc.position_ms() == pytest.approx(10_100)
+
+
+def test_small_error_is_slewed(clock, pc):
+    pc.anchor(10_000, 200_000, True, track_id="a")
+    clock.advance(1)
+    pc.anchor(11_300, 200_000, True, track_id="a")
+    assert pc.position_ms() == pytest.approx(11_000)      # sin salto
+    clock.advance(0.25)
+    assert pc.position_ms() == pytest.approx(11_400)      # mitad de la corrección
+    clock.advance(0.25)
+    assert pc.position_ms() == pytest.approx(11_800)      # ya alineado con el ancla
+
+
+def test_large_error_snaps(clock, pc):
+    pc.anchor(10_000, 200_000, True, track_id="a")
+    clock.advance(1)
+    pc.anchor(60_000, 200_000, True, track_id="a")        # seek
+    assert pc.position_ms() == pytest.approx(60_000)
+
+
+def test_new_track_snaps(clock, pc):
+    pc.anchor(10_000, 200_000, True, track_id="a")
+    clock.advance(1)
+    pc.anchor(11_500, 200_000, True, track_id="b")
+    assert pc.position_ms() == pytest.approx(11_500)
+
+
+def test_set_playing_freezes_and_resumes(clock, pc):
+    pc.anchor(10_000, 200_000, True, track_id="a")
+    clock.advance(1)
+    pc.set_playing(False)
+    clock.advance(5)
+    assert pc.position_ms() == pytest.approx(11_000)
+    assert not pc.playing
+    pc.set_playing(True)
+    clock.advance(1)
+    assert pc.position_ms() == pytest.approx(12_000)
+
+
+def test_reset_keeps_playing(clock, pc):
+    pc.anchor(10_000, 200_000, True, track_id="a")
+    pc.reset()
+    assert pc.position_ms() == 0
+    clock.advance(1)
+    assert pc.position_ms() == pytest.approx(1_000)
+
+
+def test_position_is_clamped_to_duration(clock, pc):
+    pc.anchor(9_000, 10_000, True, track_id="a")
+    clock.advance(5)
+    assert pc.position_ms() == 10_000
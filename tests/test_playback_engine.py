@@ -0,0 +1,175 @@
+# tests/test_playback_engine.py
+# PlaybackEngine contra FakeSpotifyClient, con reloj virtual y sin poller propio
+
+import threading
+
+import pytest
+
+from clocks import VirtualClock
+from fake_spotify import FakePlayer, FakeSpotifyClient
+from playback_engine import PlaybackEngine
+from playback_state import CHG_PLAYING
+from rate_limit import PRIORITY_COMMAND, GovernedSpotify, RateGovernor, RateLimited
+
+
+@pytest.fixture
+def engine():
+    clock = VirtualClock()
+    client = FakeSpotifyClient(FakePlayer(clock=clock.monotonic))
+    engine = PlaybackEngine(client, clock=clock, state_file=None).start_commands()
+    yield engine
+    engine.stop()
+
+
+def _record(engine):
+    seen = []
+    engine.subscribe_state(lambda state, mask: seen.append((state, mask)))
+    return seen
+
+
+def _wait_command(engine):
+    done = threading.Event()
+    engine.subscribe_commands(lambda *_: done.set())
+    return done
+
+
+def test_toggle_publishes_playing_change(engine):
+    engine.poll()
+    seen = _record(engine)
+    done = _wait_command(engine)
+
+    assert engine.toggle(False)
+    assert seen, "el cambio optimista no llegó a los suscriptores"
+    state, mask = seen[-1]
+    assert mask & CHG_PLAYING
+    assert state.is_playing is False
+
+    # El poll que confirma la pausa no vuelve a avisar
+    assert done.wait(2)
+    engine.poll()
+    assert not any(mask & CHG_PLAYING for _, mask in seen[1:])
+    assert engine.state().is_playing is False
+
+
+def test_failed_toggle_reverts_optimistic_state(engine):
+    engine.poll()
+
+    def fail(*_):
+        raise ConnectionError("sin red")
+
+    engine.sp.pause_playback = fail
+    seen = _record(engine)
+    done = _wait_command(engine)
+
+    assert engine.toggle(False)
+    assert done.wait(2)
+    assert [state.is_playing for state, mask in seen if mask & CHG_PLAYING] == [False, True]
+    assert engine.state().is_playing is True
+
+
+def test_skips_that_cancel_out_leave_state_alone(engine):
+    engine.poll()
+    before = engine.state()
+    seen = _record(engine)
+
+    engine.skip(+1)
+    engine.skip(-1)
+    engine.coalescer.flush()
+
+    assert engine.state() is before
+    assert seen == []
+    assert not engine.sp.calls["next_track"] and not engine.sp.calls["previous_track"]
+
+
+def test_skip_resets_progress_when_sent(engine):
+    engine.clock.advance(30)
+    engine.poll()
+    assert engine.state().progress_ms > 0
+    seen = _record(engine)
+    done = _wait_command(engine)
+
+    engine.skip(+1)
+    engine.coalescer.flush()
+
+    assert done.wait(2)
+    assert engine.sp.calls["next_track"] == 1
+    assert seen and seen[0][0].progress_ms == 0
+
+
+class _SuspendingClock(VirtualClock):
+    """En la primera espera el reloj de pared salta 10 minutos (suspensión)."""
+
+    def __init__(self):
+        super().__init__()
+        self.suspended = False
+
+    def wait(self, event, timeout):
+        woke = super().wait(event, timeout)
+        if not self.suspended:
+            self.suspended = True
+            self._epoch += 600
+        return woke
+
+
+def _offline_engine(clock):
+    engine = PlaybackEngine(FakeSpotifyClient(), clock=clock, state_file=None)
+    engine.network_probe = None
+    for _ in range(6):
+        engine.connectivity.on_failure()
+    return engine
+
+
+def test_wait_returns_on_resume_from_suspend():
+    clock = _SuspendingClock()
+    engine = _offline_engine(clock)
+    failures = engine.connectivity.failures
+
+    engine._wait(300)
+
+    assert clock.monotonic() < 30, "siguió esperando el backoff entero"
+    assert engine.connectivity.failures < failures
+
+
+def test_wait_returns_on_network_change_while_offline():
+    clock = VirtualClock()
+    engine = _offline_engine(clock)
+    addresses = iter(["10.0.0.5", "10.0.0.5", "192.168.1.20"])
+    engine.network_probe = lambda: next(addresses)
+
+    engine._wait(300)
+
+    assert clock.monotonic() < 30
+
+
+def test_offline_message_does_not_replace_saved_state(tmp_path):
+    clock = VirtualClock()
+    state_file = tmp_path / "state.json"
+    client = FakeSpotifyClient(FakePlayer(clock=clock.monotonic))
+    engine = PlaybackEngine(client, clock=clock, state_file=state_file)
+    engine.poll()
+    track = engine.state().text
+
+    def fail(*_):
+        raise ConnectionError("sin red")
+
+    client.current_playback = client.currently_playing = fail
+    for _ in range(3):
+        engine.poll()
+    assert engine.state().text == "(sin conexión)"
+
+    warm = PlaybackEngine(FakeSpotifyClient(), clock=VirtualClock(), state_file=state_file)
+    assert warm.state().text == track
+    assert warm.state().stale
+
+
+def test_user_refetch_uses_the_command_reserve():
+    clock = VirtualClock()
+    # Balde en la reserva: los polls no pasan, los pedidos del usuario sí
+    gov = RateGovernor(capacity=3, per_second=0.01, poll_reserve=3, clock=clock.monotonic)
+    sp = GovernedSpotify(FakeSpotifyClient(FakePlayer(clock=clock.monotonic)), gov)
+    engine = PlaybackEngine(sp, clock=clock, state_file=None)
+
+    with pytest.raises(RateLimited):
+        engine.fresh_snapshot(0)
+    snap = engine.fresh_snapshot(0, PRIORITY_COMMAND)
+    assert snap.url
@@ -0,0 +1,102 @@
+# tests/test_playback_events.py
+# EventDetector con snapshots armados a mano, y el reparto de EventBus
+
+from playback_events import (
+    ENDED,
+    PAUSED,
+    RESUMED,
+    SEEKED,
+    SKIPPED,
+    TRACK_CHANGED,
+    EventBus,
+    EventDetector,
+    PlaybackEvent,
+)
+from playback_state import PlaybackSnapshot
+
+
+def _snap(track="a", progress_ms=0, at=0.0, playing=True, duration_ms=200_000):
+    return PlaybackSnapshot(
+        track_id=track, name=f"Tema {track}" if track else "", artists="Artista", url=None,
+        progress_ms=progress_ms, duration_ms=duration_ms, is_playing=playing,
+        volume_percent=None, timestamp_ms=None, fetched_at=at,
+    )
+
+
+def _kinds(events):
+    return [e.kind for e in events]
+
+
+def _detector(first):
+    d = EventDetector(seek_tolerance_ms=1500, end_tolerance_ms=3000)
+    d.feed(first)
+    return d
+
+
+def test_first_snapshot_is_a_track_change():
+    d = EventDetector()
+    assert _kinds(d.feed(_snap())) == [TRACK_CHANGED]
+
+
+def test_steady_playback_is_quiet():
+    d = _detector(_snap(progress_ms=10_000, at=0.0))
+    assert d.feed(_snap(progress_ms=20_000, at=10.0)) == []
+
+
+def test_seek_is_distance_from_prediction():
+    d = _detector(_snap(progress_ms=10_000, at=0.0))
+    events = d.feed(_snap(progress_ms=90_000, at=10.0))
+    assert _kinds(events) == [SEEKED]
+    assert events[0].expected_ms == 20_000
+
+
+def test_predicted_position_overrides_extrapolation():
+    d = _detector(_snap(progress_ms=10_000, at=0.0))
+    assert d.feed(_snap(progress_ms=20_000, at=10.0), predicted_ms=20_400) == []
+
+
+def test_pause_and_resume():
+    d = _detector(_snap(progress_ms=10_000, at=0.0))
+    assert _kinds(d.feed(_snap(progress_ms=14_000, at=10.0, playing=False))) == [PAUSED]
+    assert _kinds(d.feed(_snap(progress_ms=14_500, at=20.0, playing=True))) == [RESUMED]
+
+
+def test_track_change_mid_track_is_a_skip():
+    d = _detector(_snap("a", progress_ms=10_000, at=0.0))
+    events = d.feed(_snap("b", progress_ms=500, at=10.0))
+    assert _kinds(events) == [SKIPPED, TRACK_CHANGED]
+    assert events[0].track_id == "a"
+    assert events[1].prev_track_id == "a"
+
+
+def test_track_change_at_the_end_is_ended():
+    d = _detector(_snap("a", progress_ms=195_000, at=0.0))
+    assert _kinds(d.feed(_snap("b", progress_ms=1_000, at=6.0))) == [ENDED, TRACK_CHANGED]
+
+
+def test_repeat_one_is_ended():
+    d = _detector(_snap("a", progress_ms=195_000, at=0.0))
+    assert _kinds(d.feed(_snap("a", progress_ms=1_000, at=6.0))) == [ENDED]
+
+
+def test_reset_forgets_previous():
+    d = _detector(_snap("a", progress_ms=10_000, at=0.0))
+    d.reset()
+    assert _kinds(d.feed(_snap("a", progress_ms=90_000, at=10.0))) == [TRACK_CHANGED]
+
+
+def test_bus_filters_by_kind_and_survives_errors():
+    bus = EventBus()
+    got = []
+
+    def broken(event):
+        raise RuntimeError("falla")
+
+    bus.subscribe(broken)
+    bus.subscribe(got.append, kinds=[PAUSED])
+    bus.publish(PlaybackEvent(SEEKED, "a", 0))
+    bus.publish(PlaybackEvent(PAUSED, "a", 0))
+    assert _kinds(got) == [PAUSED]
+    assert bus.published[SEEKED] == 1
+    bus.unsubscribe(broken)
+    assert bus.subscribers == 1
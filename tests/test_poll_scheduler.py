@@ -0,0 +1,82 @@
+# tests/test_poll_scheduler.py
+# PollScheduler y RequestCounter con tiempos explícitos (sin reloj real)
+
+import pytest
+
+from config import (
+    IDLE_POLL_SECONDS,
+    MID_TRACK_POLL_SECONDS,
+    PAUSED_POLL_SECONDS,
+    POLL_BURST_DELAYS,
+    TRACK_END_SLACK_SECONDS,
+)
+from playback_state import PlaybackSnapshot
+from poll_scheduler import PollScheduler, RequestCounter
+
+
+def _snap(progress_ms=0, duration_ms=200_000, playing=True, ts=1, at=0.0):
+    return PlaybackSnapshot(
+        track_id="a", name="Tema", artists="Artista", url=None,
+        progress_ms=progress_ms, duration_ms=duration_ms, is_playing=playing,
+        volume_percent=None, timestamp_ms=ts, fetched_at=at,
+    )
+
+
+@pytest.fixture
+def now():
+    return [0.0]
+
+
+@pytest.fixture
+def sched(now):
+    return PollScheduler(clock=lambda: now[0])
+
+
+def test_mid_track_polls_slowly(sched):
+    assert sched.next_delay(_snap(progress_ms=10_000), now=0.0) == MID_TRACK_POLL_SECONDS
+
+
+def test_wakes_right_after_track_end(sched):
+    delay = sched.next_delay(_snap(progress_ms=197_000), now=0.0)
+    assert delay == pytest.approx(3.0 + TRACK_END_SLACK_SECONDS)
+
+
+def test_paused_and_idle(sched):
+    assert sched.next_delay(_snap(playing=False), now=0.0) == PAUSED_POLL_SECONDS
+    assert sched.next_delay(None, now=1.0) == IDLE_POLL_SECONDS
+
+
+def test_command_starts_a_burst(sched):
+    sched.on_command()
+    delays = [sched.next_delay(_snap(progress_ms=10_000), now=0.0) for _ in POLL_BURST_DELAYS]
+    assert delays == list(POLL_BURST_DELAYS)
+    assert sched.next_delay(_snap(progress_ms=10_000), now=0.0) == MID_TRACK_POLL_SECONDS
+
+
+def test_external_change_starts_a_burst(sched):
+    sched.next_delay(_snap(progress_ms=10_000, ts=1, at=0.0), now=0.0)
+    # Otro cliente pausó a mitad de tema: cambia el timestamp sin comando propio
+    assert sched.next_delay(_snap(progress_ms=20_000, ts=2, at=10.0), now=10.0) == POLL_BURST_DELAYS[0]
+
+
+def test_own_change_is_not_a_second_burst(sched):
+    sched.next_delay(_snap(progress_ms=10_000, ts=1), now=0.0)
+    sched.on_command()
+    for _ in POLL_BURST_DELAYS:
+        sched.next_delay(_snap(progress_ms=10_000, ts=2), now=0.5)
+    assert sched.next_delay(_snap(progress_ms=10_000, ts=2), now=1.0) == MID_TRACK_POLL_SECONDS
+
+
+def test_track_change_at_expected_end_is_not_external(sched):
+    sched.next_delay(_snap(progress_ms=197_000, ts=1, at=0.0), now=0.0)
+    nxt = _snap(progress_ms=0, ts=2, at=3.25)
+    assert sched.next_delay(nxt, now=3.25) == MID_TRACK_POLL_SECONDS
+
+
+def test_request_counter_window():
+    counter = RequestCounter(window=60.0, clock=lambda: 0.0)
+    for t in (0.0, 10.0, 30.0, 61.0):
+        counter.hit(now=t)
+    assert counter.per_hour(now=61.0) == 3
+    assert counter.per_hour(now=200.0) == 0
+    assert counter.total == 4
@@ -0,0 +1,129 @@
+# tests/test_rate_limit.py
+# TokenBucket, RateGovernor y GovernedSpotify con reloj virtual (sleep no duerme)
+
+import pytest
+
+from clocks import VirtualClock
+from rate_limit import (
+    PRIORITY_COMMAND,
+    PRIORITY_POLL,
+    GovernedSpotify,
+    RateGovernor,
+    RateLimited,
+    TokenBucket,
+    retry_after_from,
+)
+
+
+class _Http429(Exception):
+    http_status = 429
+
+    def __init__(self, retry_after):
+        super().__init__("429")
+        self.headers = {"Retry-After": retry_after}
+
+
+@pytest.fixture
+def clock():
+    return VirtualClock()
+
+
+def _governor(clock, **kwargs):
+    kwargs.setdefault("capacity", 5)
+    kwargs.setdefault("per_second", 1.0)
+    kwargs.setdefault("poll_reserve", 2)
+    kwargs.setdefault("command_max_wait", 2.0)
+    return RateGovernor(clock=clock.monotonic, sleep=clock.sleep, **kwargs)
+
+
+def test_bucket_refills_and_keeps_reserve(clock):
+    bucket = TokenBucket(3, 2.0, clock=clock.monotonic)
+    assert bucket.try_take(reserve=1)
+    assert bucket.try_take(reserve=1)
+    assert not bucket.try_take(reserve=1)
+    assert bucket.wait_time(reserve=1) == pytest.approx(0.5)
+    clock.advance(0.5)
+    assert bucket.try_take(reserve=1)
+
+
+def test_polls_leave_the_reserve_to_commands(clock):
+    gov = _governor(clock)
+    for _ in range(3):
+        gov.acquire(PRIORITY_POLL)
+    with pytest.raises(RateLimited) as e:
+        gov.acquire(PRIORITY_POLL)
+    assert e.value.retry_after == pytest.approx(1.0)
+    assert gov.rejected_polls == 1
+    gov.acquire(PRIORITY_COMMAND)
+    gov.acquire(PRIORITY_COMMAND)
+    assert clock.monotonic() == 0           # la reserva alcanzó: nadie esperó
+
+
+def test_command_waits_for_a_token(clock):
+    gov = _governor(clock, poll_reserve=0)
+    for _ in range(5):
+        gov.acquire(PRIORITY_COMMAND)
+    gov.acquire(PRIORITY_COMMAND)
+    assert clock.monotonic() == pytest.approx(1.0)
+    assert gov.waits_seconds == pytest.approx(1.0)
+
+
+def test_command_gives_up_past_max_wait(clock):
+    gov = _governor(clock, per_second=0.1, poll_reserve=0)
+    for _ in range(5):
+        gov.acquire(PRIORITY_COMMAND)
+    with pytest.raises(RateLimited):
+        gov.acquire(PRIORITY_COMMAND)
+    assert gov.rejected_commands == 1
+    assert clock.monotonic() == 0
+
+
+def test_retry_after_blocks_everyone(clock):
+    gov = _governor(clock, command_max_wait=1.0)
+
+    def fail():
+        raise _Http429("5")
+
+    with pytest.raises(_Http429):
+        gov.call(PRIORITY_COMMAND, fail)
+    assert gov.retry_after_events == 1
+    assert gov.poll_delay_hint() == pytest.approx(5.0)
+    with pytest.raises(RateLimited) as e:
+        gov.acquire(PRIORITY_POLL)
+    assert e.value.retry_after == pytest.approx(5.0)
+    with pytest.raises(RateLimited):
+        gov.acquire(PRIORITY_COMMAND)       # 5 s > command_max_wait
+    clock.advance(5)
+    gov.acquire(PRIORITY_POLL)
+
+
+def test_retry_after_from():
+    assert retry_after_from(ValueError()) is None
+    assert retry_after_from(_Http429("7")) == 7.0
+    assert retry_after_from(_Http429("pronto")) == 1.0
+
+
+def test_governed_spotify_priorities():
+    calls = []
+
+    class Sp:
+        def currently_playing(self):
+            return "pb"
+
+        def next_track(self):
+            return "ok"
+
+    class Gov:
+        def call(self, priority, fn, *args, **kwargs):
+            calls.append((priority, fn.__name__))
+            return fn(*args, **kwargs)
+
+    sp = GovernedSpotify(Sp(), Gov())
+    assert sp.currently_playing() == "pb"
+    assert sp.next_track() == "ok"
+    assert sp.command("currently_playing")() == "pb"
+    assert calls == [
+        (PRIORITY_POLL, "currently_playing"),
+        (PRIORITY_COMMAND, "next_track"),
+        (PRIORITY_COMMAND, "currently_playing"),
+    ]
@@ -0,0 +1,35 @@
+# tests/test_sinks.py
+# Sinks de archivo con el writer vaciado a mano (sin esperar SINK_BATCH_SECONDS)
+
+from playback_state import CHG_PLAYING, CHG_TRACK, PlaybackState
+from sinks import CoverSink, SinkWriter
+
+STATE = PlaybackState("Tema — Artista", True, track_id="t1", images=((640, "https://i/cover"),))
+
+
+def test_failed_cover_fetch_is_retried(tmp_path):
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        if len(calls) == 1:
+            raise OSError("sin red")
+        return b"\xff\xd8" + url.encode()
+
+    writer = SinkWriter()
+    sink = CoverSink(tmp_path / "np.jpg", writer, fetch=fetch)
+
+    sink(STATE, CHG_TRACK)
+    writer.flush()
+    assert sink.errors == 1
+    assert not (tmp_path / "np.jpg").exists()
+
+    # Mismo tema, otro campo: igual se reintenta porque la portada nunca se escribió
+    sink(STATE, CHG_PLAYING)
+    writer.flush()
+    assert (tmp_path / "np.jpg").read_bytes() == b"\xff\xd8https://i/cover"
+
+    sink(STATE, CHG_PLAYING)
+    writer.flush()
+    assert len(calls) == 2
+    assert sink.writes == 1
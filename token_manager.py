@@ -0,0 +1,130 @@
+# token_manager.py
+# -------------------------------------
+# Token OAuth en memoria con refresco proactivo en segundo plano
+# -------------------------------------
+
+import json
+import logging
+import os
+import threading
+import time
+
+from spotipy.cache_handler import CacheHandler
+
+from config import TOKEN_REFRESH_MARGIN_SECONDS, TOKEN_RETRY_SECONDS
+
+log = logging.getLogger("nowplaying")
+
+
+class MemoryFileCacheHandler(CacheHandler):
+    """Cache de token para SpotifyOAuth que no toca el disco en cada request.
+
+    El archivo se lee una sola vez; después el token vive en memoria y solo
+    se reescribe (temporal + rename) cuando cambia.
+    """
+
+    def __init__(self, path):
+        self._path = path
+        self._lock = threading.Lock()
+        self._token = None
+        self._loaded = False
+        self.disk_reads = 0
+        self.disk_writes = 0
+
+    def get_cached_token(self):
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                self._token = self._read()
+            return self._token
+
+    def save_token_to_cache(self, token_info):
+        with self._lock:
+            self._loaded = True
+            if token_info == self._token:
+                return
+            self._token = token_info
+            self._write(token_info)
+
+    def _read(self):
+        self.disk_reads += 1
+        try:
+            with open(self._path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, token_info):
+        tmp = f"{self._path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(token_info, f)
+            os.replace(tmp, self._path)
+            self.disk_writes += 1
+        except OSError as e:
+            log.warning("no se pudo guardar el token: %s", e)
+
+
+class TokenManager:
+    """Refresca el access token TOKEN_REFRESH_MARGIN_SECONDS antes de que venza.
+
+    Spotipy refresca por su cuenta si al hacer un request faltan menos de
+    60 s; con este margen eso no pasa y ningún request (ni un click en la
+    UI) se come la demora del refresco.
+    """
+
+    def __init__(self, auth, margin=TOKEN_REFRESH_MARGIN_SECONDS, retry=TOKEN_RETRY_SECONDS):
+        self._auth = auth
+        self._margin = margin
+        self._retry = retry
+        self._lock = threading.Lock()
+        self._timer = None
+        self._stopped = False
+        self.refreshes = 0
+        self.failures = 0
+
+    def start(self):
+        self._schedule()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._stopped = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def seconds_until_refresh(self):
+        token = self._auth.cache_handler.get_cached_token()
+        if not token or "expires_at" not in token:
+            return None
+        return max(0.0, token["expires_at"] - self._margin - time.time())
+
+    def _schedule(self, delay=None):
+        if delay is None:
+            delay = self.seconds_until_refresh()
+            if delay is None:
+                # Todavía no hay token (primer login): probar más tarde
+                delay = self._retry
+        with self._lock:
+            if self._stopped:
+                return
+            self._timer = threading.Timer(delay, self._refresh)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _refresh(self):
+        token = self._auth.cache_handler.get_cached_token()
+        if not token or not token.get("refresh_token"):
+            self._schedule(self._retry)
+            return
+        try:
+            # Guarda el token nuevo en el cache_handler (memoria + archivo)
+            self._auth.refresh_access_token(token["refresh_token"])
+            self.refreshes += 1
+        except Exception as e:
+            self.failures += 1
+            log.warning("no se pudo refrescar el token: %s", e)
+            self._schedule(self._retry)
+            return
+        self._schedule()
@@ -0,0 +1,143 @@
+# transport.py
+# -------------------------------------
+# Sesión HTTP compartida para Spotify: pool keep-alive, timeouts, reintentos y latencias
+# -------------------------------------
+
+import logging
+import random
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (
+    HTTP_POOL_SIZE,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_READ_TIMEOUT,
+    HTTP_RETRIES,
+    HTTP_BACKOFF_SECONDS,
+    HTTP_BACKOFF_JITTER_SECONDS,
+    LATENCY_BUCKETS_MS,
+)
+
+log = logging.getLogger("nowplaying")
+
+API_URL = "https://api.spotify.com/v1/"
+ACCOUNTS_URL = "https://accounts.spotify.com/"
+
+
+class _JitterRetry(Retry):
+    """Retry con backoff exponencial + jitter aleatorio (funciona con urllib3 1.x y 2.x)."""
+
+    def get_backoff_time(self):
+        base = super().get_backoff_time()
+        if base <= 0:
+            return base
+        return base + random.uniform(0, HTTP_BACKOFF_JITTER_SECONDS)
+
+
+class LatencyHistogram:
+    """Histograma de latencias (ms) por endpoint, con buckets fijos."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self._bounds = list(buckets)
+        self._lock = threading.Lock()
+        self._counts = {}          # endpoint -> [n por bucket] (+1 para "> último")
+        self._totals = Counter()   # endpoint -> suma de ms
+
+    def observe(self, endpoint, ms):
+        i = bisect_left(self._bounds, ms)
+        with self._lock:
+            counts = self._counts.get(endpoint)
+            if counts is None:
+                counts = self._counts[endpoint] = [0] * (len(self._bounds) + 1)
+            counts[i] += 1
+            self._totals[endpoint] += ms
+
+    def snapshot(self) -> dict:
+        """{endpoint: {"count", "mean_ms", "buckets": {"<=25": n, ..., ">3200": n}}}"""
+        with self._lock:
+            out = {}
+            for endpoint, counts in self._counts.items():
+                n = sum(counts)
+                labels = [f"<={b}" for b in self._bounds] + [f">{self._bounds[-1]}"]
+                out[endpoint] = {
+                    "count": n,
+                    "mean_ms": self._totals[endpoint] / n if n else 0.0,
+                    "buckets": dict(zip(labels, counts)),
+                }
+            return out
+
+
+_ID_RE = re.compile(r"/[0-9A-Za-z]{22}(?=/|$)")
+
+
+def _endpoint(request):
+    """'GET /v1/me/player' (los ids de Spotify se reemplazan para agrupar)."""
+    path = requests.utils.urlparse(request.url).path
+    return f"{request.method} {_ID_RE.sub('/{id}', path)}"
+
+
+class Transport:
+    """Una requests.Session para todo el proceso (poller, comandos y OAuth).
+
+    - Pool keep-alive de HTTP_POOL_SIZE conexiones por host, así un comando
+      no espera a que termine el poll.
+    - Timeouts separados de conexión y lectura.
+    - Reintentos con backoff + jitter solo para fallas de red y 5xx (lecturas
+      y 5xx, solo en GET/PUT/DELETE); los 429 no se reintentan acá (los
+      maneja quien llama, respetando Retry-After).
+    - Latencias por endpoint en self.latency.
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE):
+        self.timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+        self.latency = LatencyHistogram()
+        self.bytes_in = 0
+        self.requests = 0
+
+        retry = _JitterRetry(
+            total=HTTP_RETRIES,
+            connect=HTTP_RETRIES,
+            read=HTTP_RETRIES,
+            status=HTTP_RETRIES,
+            status_forcelist=(500, 502, 503, 504),
+            # Timeouts de lectura y 5xx solo se reintentan en métodos idempotentes:
+            # un POST next/previous que Spotify ya ejecutó saltaría dos temas.
+            # Los errores de conexión (el pedido no salió) se reintentan siempre.
+            allowed_methods=frozenset({"GET", "PUT", "DELETE"}),
+            backoff_factor=HTTP_BACKOFF_SECONDS,
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["Connection"] = "keep-alive"
+        self.session.hooks["response"].append(self._on_response)
+
+    def _on_response(self, response, *args, **kwargs):
+        self.requests += 1
+        self.bytes_in += len(response.content or b"")
+        self.latency.observe(_endpoint(response.request), response.elapsed.total_seconds() * 1000)
+
+    def prewarm(self, *urls):
+        """Abre las conexiones (DNS + TCP + TLS) en segundo plano, antes del primer poll."""
+        urls = urls or (API_URL, ACCOUNTS_URL)
+
+        def warm():
+            for url in urls:
+                try:
+                    self.session.head(url, timeout=self.timeout)
+                except requests.RequestException as e:
+                    log.info("prewarm %s falló: %s", url, e)
+
+        threading.Thread(target=warm, name="http-prewarm", daemon=True).start()
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "bytes_in": self.bytes_in, "latency": self.latency.snapshot()}
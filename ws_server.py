@@ -0,0 +1,268 @@
+# ws_server.py
+# -------------------------------------
+# Estado de reproducción por WebSocket, para browser sources de OBS: en vez de
+# releer un JSON con un timer, el overlay recibe cada cambio apenas ocurre.
+# Opcional: requiere `pip install websockets`; sin eso la barra sigue igual.
+#
+# Mensajes (JSON, solo del servidor al cliente):
+#   {"type": "state", "seq": 1, "at_ms": <epoch ms>, "state": {...}}     al conectar
+#   {"type": "delta", "seq": 7, "at_ms": ..., "changed": ["text", "track"],
+#    "patch": {"text": ..., "track_id": ..., "progress_ms": ...}}       solo lo que cambió
+# Mientras suena llega además un delta con "changed": [] y solo progress_ms cada
+# WS_PROGRESS_SECONDS. progress_ms es la posición estimada en at_ms.
+# El cliente puede mandar {"op": "get"} para recibir de nuevo el estado completo.
+#
+#   const ws = new WebSocket("ws://127.0.0.1:47812");
+#   let s = {};
+#   ws.onmessage = (e) => { const m = JSON.parse(e.data);
+#     s = m.type === "state" ? (m.state || {}) : Object.assign(s, m.patch); render(s); };
+#
+# Un cliente lento no frena a nadie: a los que están al día, cada cambio se les
+# escribe de una (codificado una sola vez); a los que tienen más de
+# WS_MAX_CLIENT_BUFFER sin leer, los cambios se fusionan en un único mensaje
+# pendiente que sale cuando vacían el buffer (los ticks de progreso intermedios
+# se pierden, los demás campos no).
+# -------------------------------------
+
+import asyncio
+import json
+import logging
+import time
+
+from config import WS_HOST, WS_MAX_CLIENT_BUFFER, WS_PORT, WS_PROGRESS_SECONDS
+from loop_thread import LoopThread
+from payload import encode
+from playback_state import mask_names
+
+try:
+    from websockets.exceptions import ConnectionClosed
+    try:
+        from websockets.asyncio.server import broadcast, serve
+    except ImportError:
+        from websockets import broadcast, serve      # websockets < 13
+except ImportError:
+    serve = None
+
+log = logging.getLogger("nowplaying")
+
+
+class _Peer:
+    __slots__ = ("ws", "pending", "data", "wake", "busy")
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.pending = None         # próximo mensaje (dict), ya fusionado
+        self.data = None            # ... y su JSON, si es el mismo que recibieron todos
+        self.wake = asyncio.Event()
+        self.busy = False           # _pump esperando que el cliente lea
+
+    def behind(self, limit) -> bool:
+        return self.busy or self.pending is not None or \
+            self.ws.transport.get_write_buffer_size() > limit
+
+
+def _merge(old, new):
+    """Fusiona un delta nuevo en el mensaje que el cliente todavía no recibió."""
+    key = "state" if old["type"] == "state" else "patch"
+    merged = dict(old, seq=new["seq"])
+    body = dict(old[key] or {})
+    body.update(new["patch"])
+    merged[key] = body
+    if "progress_ms" in new["patch"]:
+        merged["at_ms"] = new["at_ms"]
+    if key == "patch":
+        merged["changed"] = old["changed"] + [c for c in new["changed"] if c not in old["changed"]]
+    return merged
+
+
+class WsServer:
+    """Servidor asyncio en un hilo propio, alimentado por un PlaybackEngine.
+
+    Nunca corre en el hilo de Qt: el motor publica desde su hilo y el
+    servidor lo pasa a su loop con call_soon_threadsafe. Cada cambio se
+    codifica una sola vez para todos los clientes al día.
+    """
+
+    def __init__(self, engine, host=WS_HOST, port=WS_PORT, progress_seconds=WS_PROGRESS_SECONDS,
+                 max_buffer=WS_MAX_CLIENT_BUFFER):
+        if serve is None:
+            raise RuntimeError("falta el paquete websockets (pip install websockets)")
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self._progress_seconds = progress_seconds
+        self._max_buffer = max_buffer
+        self._thread = LoopThread("ws-server")
+        self._peers = set()
+        self._state = None
+        self._last = {}             # último to_wire() enviado, para armar los deltas
+        self._seq = 0
+        self.messages_sent = 0
+        self.bytes_sent = 0
+        self.encodes = 0
+        self.coalesced = 0
+
+    # ----- Ciclo de vida -----
+    @property
+    def address(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        self._thread.start(self._listen)
+        self.engine.subscribe_state(self.publish)
+        return self
+
+    def stop(self):
+        self.engine.unsubscribe_state(self.publish)
+        self._thread.stop()
+
+    async def _listen(self):
+        server = await serve(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        self._prime()
+        if self._progress_seconds > 0:
+            asyncio.get_running_loop().call_later(self._progress_seconds, self._tick)
+        return server
+
+    # ----- Desde otros hilos (poller) -----
+    def publish(self, state, mask):
+        """Suscriptor de engine.subscribe_state()."""
+        self._thread.call_soon(self._broadcast_state, state, mask)
+
+    # ----- En el hilo del servidor -----
+    def _wire(self, state):
+        progress = self.engine.playback_clock.position_ms() if state.track_id else None
+        return state.to_wire(progress)
+
+    def _prime(self):
+        state = self.engine.state()
+        if state is not None:
+            self._state = state
+            self._last = self._wire(state)
+
+    def _full(self):
+        state = self.engine.state()
+        self._seq += 1
+        return {
+            "type": "state",
+            "seq": self._seq,
+            "at_ms": int(time.time() * 1000),
+            "state": self._wire(state) if state is not None else None,
+        }
+
+    def _broadcast_state(self, state, mask):
+        self._state = state
+        wire = self._wire(state)
+        patch = {k: v for k, v in wire.items() if k not in self._last or self._last[k] != v}
+        self._last = wire
+        if patch:
+            self._delta(patch, mask_names(mask))
+
+    def _tick(self):
+        state = self._state
+        if self._peers and state is not None and state.is_playing and state.track_id:
+            progress = int(self.engine.playback_clock.position_ms())
+            self._last["progress_ms"] = progress
+            self._delta({"progress_ms": progress}, [])
+        self._thread.loop.call_later(self._progress_seconds, self._tick)
+
+    def _delta(self, patch, changed):
+        if not self._peers:
+            return
+        self._seq += 1
+        msg = {
+            "type": "delta",
+            "seq": self._seq,
+            "at_ms": int(time.time() * 1000),
+            "changed": changed,
+            "patch": patch,
+        }
+        data = self._encode(msg)
+        ready = []
+        for peer in self._peers:
+            if not peer.behind(self._max_buffer):
+                ready.append(peer.ws)
+            elif peer.pending is None:
+                peer.pending, peer.data = msg, data
+                peer.wake.set()
+            else:
+                # Todavía no recibió lo anterior: un solo mensaje con lo último
+                peer.pending, peer.data = _merge(peer.pending, msg), None
+                self.coalesced += 1
+        if ready:
+            broadcast(ready, data)          # escribe sin esperar a nadie
+            self.messages_sent += len(ready)
+            self.bytes_sent += len(data) * len(ready)
+
+    def _encode(self, msg) -> str:
+        self.encodes += 1
+        return encode(msg).decode("utf-8")
+
+    async def _pump(self, peer):
+        """Mensajes de un cliente atrasado (o el estado inicial), de a uno."""
+        transport = peer.ws.transport
+        while True:
+            await peer.wake.wait()
+            peer.wake.clear()
+            peer.busy = True
+            try:
+                while transport.get_write_buffer_size() > self._max_buffer:
+                    await asyncio.sleep(0.05)
+                msg, data = peer.pending, peer.data
+                peer.pending = peer.data = None
+                if msg is None:
+                    continue
+                if data is None:
+                    data = self._encode(msg)
+                await peer.ws.send(data)
+                self.messages_sent += 1
+                self.bytes_sent += len(data)
+            except ConnectionClosed:
+                return
+            finally:
+                peer.busy = False
+
+    async def _handle(self, ws, path=None):
+        peer = _Peer(ws)
+        peer.pending = self._full()
+        peer.wake.set()
+        self._peers.add(peer)
+        pump = asyncio.ensure_future(self._pump(peer))
+        try:
+            async for message in ws:
+                try:
+                    op = json.loads(message).get("op")
+                except (ValueError, AttributeError):
+                    continue
+                if op == "get":
+                    peer.pending, peer.data = self._full(), None
+                    peer.wake.set()
+        except ConnectionClosed:
+            pass
+        finally:
+            self._peers.discard(peer)
+            pump.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "address": self.address,
+            "clients": len(self._peers),
+            "messages_sent": self.messages_sent,
+            "bytes_sent": self.bytes_sent,
+            "encodes": self.encodes,
+            "coalesced": self.coalesced,
+        }
+
+
+def start_ws_server(engine, port=WS_PORT):
+    """Arranca el servidor WebSocket; si falta websockets o el puerto está ocupado, avisa y sigue."""
+    if serve is None:
+        log.warning("servidor WebSocket deshabilitado: falta el paquete websockets")
+        return None
+    try:
+        server = WsServer(engine, port=port).start()
+    except OSError as e:
+        log.warning("servidor WebSocket deshabilitado: %s", e)
+        return None
+    log.info("servidor WebSocket en %s", server.address)
+    return server